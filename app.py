@@ -3,13 +3,29 @@ from pathlib import Path
 
 import streamlit as st
 
-from catalog import WoodTypeCatalog
+from catalog import WoodTypeCatalog, get_shared_catalog
 from components.assembly_builder import render_assembly_builder
 from components.catalog_view import render_catalog_management
 from components.cutlist_viewer import render_cut_list
 from components.new_project import new_project_dialog
+from components.remnant_view import render_remnant_inventory
+from inventory import get_shared_inventory
 from models.wood import Project
 from project_manager import ProjectManager
+from storage.writer import get_writer
+from tracing import format_profile, profile, record_trace, span
+
+CATALOG_DB = "catalog.db"
+SAMPLE_CATALOG = "sample_catalog.json"
+
+
+def load_catalog() -> WoodTypeCatalog:
+    """Open the catalog database, seeding a new one from the sample catalog"""
+    is_new = not Path(CATALOG_DB).exists()
+    catalog = WoodTypeCatalog(CATALOG_DB)
+    if is_new and Path(SAMPLE_CATALOG).exists():
+        catalog.import_json(SAMPLE_CATALOG)
+    return catalog
 
 
 # Load custom CSS
@@ -57,15 +73,94 @@ def calculate_project_stats(project: Project):
     }
 
 
+def render_project_browser(project_manager: ProjectManager, catalog):
+    """List every project from the project index, without loading them"""
+    with st.expander("🗂️ Browse Projects"):
+        st.dataframe(
+            [
+                {
+                    "Project": summary.name,
+                    "Description": summary.description,
+                    "Assemblies": summary.assembly_count,
+                    "Pieces": summary.piece_count,
+                    "Est. Cost": f"₪{summary.estimated_cost(catalog):.2f}",
+                }
+                for summary in project_manager.get_project_summaries()
+            ],
+            hide_index=True,
+            use_container_width=True,
+        )
+
+
+def render_debug_panel(trace, profile_text):
+    """Show the timings of this rerun, with trace and profile downloads"""
+    with st.sidebar.expander("🐞 Rerun Timings", expanded=True):
+        st.dataframe(trace.summary(), hide_index=True, use_container_width=True)
+        st.download_button(
+            "📥 Export Chrome Trace",
+            trace.chrome_trace_json(),
+            file_name="rerun_trace.json",
+            mime="application/json",
+            help="Open in chrome://tracing or https://ui.perfetto.dev",
+            use_container_width=True,
+        )
+        if st.button("⏱️ Profile Next Rerun", use_container_width=True):
+            st.session_state.profile_next_rerun = True
+            st.rerun()
+        if profile_text:
+            st.text(profile_text)
+            st.download_button(
+                "📥 Export Profile",
+                profile_text,
+                file_name="rerun_profile.txt",
+                mime="text/plain",
+                use_container_width=True,
+            )
+
+
 def main():
-    # Initialize catalog and session state
-    if "catalog" not in st.session_state:
-        st.session_state.catalog = WoodTypeCatalog("sample_catalog.json")
+    """Run the app; with debug timings on, time the rerun and show the
+    spans (and, on request, a cProfile of the rerun) in the sidebar"""
+    debug = st.session_state.get("debug_timings", False)
+    profiling = debug and st.session_state.pop("profile_next_rerun", False)
+    with record_trace(enabled=debug) as trace, profile(enabled=profiling) as profiler:
+        with span("rerun"):
+            render_app()
+    if debug:
+        render_debug_panel(trace, format_profile(profiler) if profiler else None)
+
+
+def render_app():
+    # One catalog for all sessions; edits publish a new one, so each rerun
+    # works with the catalog as of its start
+    shared_catalog = get_shared_catalog(CATALOG_DB, load_catalog)
+    shared_catalog.refresh()  # Saves of other server processes
+    catalog = shared_catalog.current
+
+    # Likewise one remnant inventory
+    inventory = get_shared_inventory(CATALOG_DB)
+    inventory.refresh()
+
+    # Initialize session state
     if "project_manager" not in st.session_state:
-        st.session_state.project_manager = ProjectManager()
+        # Saves are written in the background, shared by all sessions
+        st.session_state.project_manager = ProjectManager(writer=get_writer())
     if "current_project" not in st.session_state:
         st.session_state.current_project = Project(name="Untitled Project")
 
+    # Pick up changes other sessions made to the catalog and open project
+    if st.session_state.get("catalog_version", catalog.version) != catalog.version:
+        # Edits pending in the catalog editor refer to the old rows
+        st.session_state.editor_key = st.session_state.get("editor_key", 0) + 1
+        st.toast("The wood catalog was updated in another session")
+    st.session_state.catalog_version = catalog.version
+    project_name = st.session_state.current_project.name
+    if st.session_state.project_manager.is_outdated(project_name):
+        st.session_state.current_project = (
+            st.session_state.project_manager.load_project(project_name)
+        )
+        st.toast(f"Loaded the changes made to '{project_name}' in another session")
+
     # Project management section
     with st.sidebar:
         st.markdown(
@@ -101,6 +196,8 @@ def main():
                     st.session_state.project_manager.load_project(selected_project)
                 )
 
+            render_project_browser(st.session_state.project_manager, catalog)
+
         # New project button
         if st.button("➕ Create New Project", use_container_width=True):
             new_project_dialog()
@@ -129,15 +226,29 @@ def main():
 
             # Save button
             st.markdown("---")
-            if st.button("💾 Save Project", use_container_width=True):
+            saved = st.button("💾 Save Project", use_container_width=True)
+            if saved:
                 st.session_state.project_manager.save_project(
-                    st.session_state.current_project
+                    st.session_state.current_project, wait=True
                 )
+            if st.button("🗑️ Delete Project", use_container_width=True, type="primary"):
+                delete_project_dialog()
+            save_error = st.session_state.project_manager.save_error(
+                st.session_state.current_project.name
+            )
+            if save_error is not None:
+                st.error(f"The last save failed: {save_error}")
+            elif saved:
                 st.success(
                     f"Project '{st.session_state.current_project.name}' saved successfully!"
                 )
-            if st.button("🗑️ Delete Project", use_container_width=True, type="primary"):
-                delete_project_dialog()
+
+        st.markdown("---")
+        st.toggle(
+            "🐞 Debug timings",
+            key="debug_timings",
+            help="Time each rerun and show where it spent its time",
+        )
 
     # Main content area
     st.markdown(
@@ -224,16 +335,20 @@ def main():
         """
         )
 
-    with tab2:
-        render_assembly_builder(
-            st.session_state.catalog, st.session_state.current_project
-        )
+    with tab2, span("render.assembly_builder"):
+        render_assembly_builder(catalog, st.session_state.current_project)
 
-    with tab3:
-        render_cut_list(st.session_state.current_project, st.session_state.catalog)
+    with tab3, span("render.cut_list"):
+        render_cut_list(
+            st.session_state.current_project,
+            catalog,
+            inventory,
+        )
 
-    with tab4:
-        render_catalog_management(st.session_state.catalog)
+    with tab4, span("render.catalog"):
+        render_catalog_management(shared_catalog)
+        st.markdown("---")
+        render_remnant_inventory(inventory, catalog)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,347 @@
+"""Compute the cut lists of many projects from the command line.
+
+Every project found is processed in a worker pool. Each gets a directory
+under the output directory with ``summary.csv`` and ``detailed.csv`` (and
+``boards.csv`` with --optimize). The run also writes ``report.csv``, one row
+per project, and ``purchase_summary.csv``, the wood needed by all projects
+together. Nothing here imports streamlit or plotly. The projects are only
+read: nothing is written to their directories.
+
+Projects of the same name from different sources are written to
+``<name> (2)``, ``<name> (3)`` and so on, in the order they were found.
+
+    python batch.py projects --output cut_lists
+    python batch.py "projects/Table*" --optimize patterns --workers 8
+"""
+
+import argparse
+import glob
+import os
+import sys
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+from catalog import WoodTypeCatalog
+from core.columnar import aggregate_cut_list, detailed_cut_list_columns
+from core.export import (
+    SUMMARY_COLUMNS,
+    stream_boards_csv,
+    stream_csv,
+    stream_detailed_csv,
+    stream_summary_csv,
+    write_chunks,
+)
+from optimizer.parallel import METHODS, optimize_cut_list_parallel
+from project_manager import ProjectManager
+from storage.codecs import EXTENSIONS
+from storage.project_store import MANIFEST
+
+DEFAULT_CATALOGS = ("catalog.db", "sample_catalog.json")
+REPORT_COLUMNS = [
+    "Project",
+    "Assemblies",
+    "Pieces",
+    "Total Length (m)",
+    "Total Price",
+    "Boards",
+    "Stock Length (m)",
+    "Stock Price",
+    "Error",
+]
+
+_catalog: Optional[WoodTypeCatalog] = None  # Loaded once per worker
+_managers: Dict[str, ProjectManager] = {}  # Per projects directory
+
+
+class ProjectJob(NamedTuple):
+    """A project to process"""
+
+    projects_dir: str
+    name: str
+    output_name: str = ""  # Unique among the jobs of a run; see find_projects
+
+
+class WoodTypeTotal(NamedTuple):
+    """What one project needs of one wood type"""
+
+    wood_type_index: int
+    total_length: float
+    total_price: float
+    stock_counts: Dict[float, int]
+    stock_price: float
+
+
+class ProjectResult(NamedTuple):
+    """Outcome of processing one project, sent back by the workers"""
+
+    name: str
+    assemblies: int = 0
+    pieces: int = 0
+    totals: List[WoodTypeTotal] = []
+    error: str = ""
+
+
+def _manager(projects_dir: str) -> ProjectManager:
+    if projects_dir not in _managers:
+        _managers[projects_dir] = ProjectManager(projects_dir, read_only=True)
+    return _managers[projects_dir]
+
+
+def _is_project_dir(path: str) -> bool:
+    return any(
+        os.path.exists(os.path.join(path, MANIFEST + extension))
+        for extension in EXTENSIONS
+    )
+
+
+def find_projects(sources: Iterable[str]) -> List[ProjectJob]:
+    """Resolve projects directories and glob patterns into projects, each
+    with a unique output name"""
+    jobs = []
+    for source in sources:
+        if os.path.isdir(source) and not _is_project_dir(source):
+            jobs.extend(
+                ProjectJob(source, name) for name in _manager(source).store.names()
+            )
+            continue
+        for match in sorted(glob.glob(source)):
+            path = Path(match)
+            name, extension = os.path.splitext(path.name)
+            if path.is_dir():
+                name = path.name
+            elif extension not in EXTENSIONS:
+                continue
+            if name in _manager(str(path.parent)).store.names():
+                jobs.append(ProjectJob(str(path.parent), name))
+    # A project matched by several sources is processed once
+    unique: Dict[tuple, ProjectJob] = {}
+    for job in jobs:
+        unique.setdefault((os.path.realpath(job.projects_dir), job.name), job)
+    jobs = list(unique.values())
+
+    taken = set()
+    for i, job in enumerate(jobs):
+        output_name, n = job.name, 1
+        while output_name in taken:
+            n += 1
+            output_name = f"{job.name} ({n})"
+        taken.add(output_name)
+        jobs[i] = job._replace(output_name=output_name)
+    return jobs
+
+
+def _init_worker(catalog_path: str) -> None:
+    global _catalog
+    _catalog = WoodTypeCatalog(catalog_path)
+
+
+def process_project(
+    job: ProjectJob,
+    output_dir: str,
+    method: Optional[str] = None,
+    kerf: float = 0.0,
+    time_limit: float = 3.0,
+) -> ProjectResult:
+    """Compute and write the cut list of one project"""
+    try:
+        project = _manager(job.projects_dir).load_project(job.name)
+        cut_list = aggregate_cut_list(project, _catalog)
+        plans = {}
+        if method:
+            plans = optimize_cut_list_parallel(
+                project, _catalog, kerf, method, time_limit, parallel=False
+            )
+
+        project_dir = Path(output_dir) / (job.output_name or job.name)
+        os.makedirs(project_dir, exist_ok=True)
+        write_chunks(stream_summary_csv(cut_list), project_dir / "summary.csv")
+        write_chunks(
+            stream_detailed_csv(detailed_cut_list_columns(project, _catalog)),
+            project_dir / "detailed.csv",
+        )
+        if method:
+            write_chunks(
+                stream_boards_csv(plans[index] for index in sorted(plans)),
+                project_dir / "boards.csv",
+            )
+
+        totals = []
+        for item in cut_list:
+            plan = plans.get(item.wood_type_index)
+            totals.append(
+                WoodTypeTotal(
+                    item.wood_type_index,
+                    item.total_length,
+                    item.total_price,
+                    dict(plan.stock_counts) if plan else {},
+                    plan.total_price if plan else 0.0,
+                )
+            )
+        return ProjectResult(
+            name=job.output_name or job.name,
+            assemblies=len(project.assemblies),
+            pieces=sum(len(assembly.pieces) for assembly in project.assemblies),
+            totals=totals,
+        )
+    except Exception as e:  # One broken project must not stop the run
+        return ProjectResult(
+            name=job.output_name or job.name, error=f"{type(e).__name__}: {e}"
+        )
+
+
+def run_batch(
+    jobs: List[ProjectJob],
+    catalog_path: str,
+    output_dir: str,
+    method: Optional[str] = None,
+    kerf: float = 0.0,
+    time_limit: float = 3.0,
+    workers: Optional[int] = None,
+) -> List[ProjectResult]:
+    """Process the projects, in a process pool unless ``workers`` is 1"""
+    workers = workers or os.cpu_count() or 1
+    args = (output_dir, method, kerf, time_limit)
+    results = []
+    if workers == 1 or len(jobs) <= 1:
+        _init_worker(catalog_path)
+        for job in jobs:
+            results.append(process_project(job, *args))
+            _progress(results[-1], len(results), len(jobs))
+    else:
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=(catalog_path,)
+        ) as executor:
+            futures = [executor.submit(process_project, job, *args) for job in jobs]
+            for future in as_completed(futures):
+                results.append(future.result())
+                _progress(results[-1], len(results), len(jobs))
+    return sorted(results, key=lambda result: result.name)
+
+
+def _progress(result: ProjectResult, done: int, total: int) -> None:
+    status = f"error: {result.error}" if result.error else "ok"
+    print(f"[{done}/{total}] {result.name}: {status}", file=sys.stderr)
+
+
+def iter_report_rows(results: Iterable[ProjectResult]):
+    """Yield one report row per project, in ``REPORT_COLUMNS`` order"""
+    for result in results:
+        yield [
+            result.name,
+            result.assemblies,
+            result.pieces,
+            sum(total.total_length for total in result.totals),
+            sum(total.total_price for total in result.totals),
+            sum(sum(total.stock_counts.values()) for total in result.totals),
+            sum(
+                length * count
+                for total in result.totals
+                for length, count in total.stock_counts.items()
+            ),
+            sum(total.stock_price for total in result.totals),
+            result.error,
+        ]
+
+
+def iter_purchase_rows(results: Iterable[ProjectResult], catalog: WoodTypeCatalog):
+    """Yield the wood needed by all projects together, per wood type, in
+    ``SUMMARY_COLUMNS`` order followed by the boards to buy"""
+    lengths: Dict[int, float] = defaultdict(float)
+    stock: Dict[int, Dict[float, int]] = defaultdict(lambda: defaultdict(int))
+    for result in results:
+        for total in result.totals:
+            lengths[total.wood_type_index] += total.total_length
+            for length, count in total.stock_counts.items():
+                stock[total.wood_type_index][length] += count
+
+    for index in sorted(lengths):
+        wood_type = catalog.get_wood_type(index)
+        yield [
+            f"{wood_type.width}x{wood_type.height}mm",
+            wood_type.description,
+            lengths[index],
+            wood_type.price_per_meter,
+            lengths[index] * wood_type.price_per_meter,
+            ", ".join(
+                f"{count} x {length}m"
+                for length, count in sorted(stock[index].items(), reverse=True)
+            ),
+        ]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Compute the cut lists of many projects."
+    )
+    parser.add_argument(
+        "sources",
+        nargs="*",
+        default=["projects"],
+        help="Projects directories or glob patterns (default: projects)",
+    )
+    parser.add_argument("--catalog", help="Catalog file (default: catalog.db)")
+    parser.add_argument("--output", default="cut_lists", help="Output directory")
+    parser.add_argument(
+        "--optimize", choices=METHODS, help="Also plan the stock boards to buy"
+    )
+    parser.add_argument(
+        "--kerf", type=float, default=0.0, help="Saw blade width in millimetres"
+    )
+    parser.add_argument(
+        "--time-limit",
+        type=float,
+        default=3.0,
+        help="Seconds per project for the pattern optimizer",
+    )
+    parser.add_argument(
+        "--workers", type=int, help="Worker processes (default: one per CPU)"
+    )
+    args = parser.parse_args(argv)
+
+    catalog_path = args.catalog or next(
+        (path for path in DEFAULT_CATALOGS if os.path.exists(path)), None
+    )
+    if catalog_path is None or not os.path.exists(catalog_path):
+        parser.error(f"Catalog not found: {catalog_path or DEFAULT_CATALOGS[0]}")
+    jobs = find_projects(args.sources)
+    if not jobs:
+        parser.error("No projects found")
+
+    start = time.perf_counter()
+    os.makedirs(args.output, exist_ok=True)
+    results = run_batch(
+        jobs,
+        catalog_path,
+        args.output,
+        args.optimize,
+        args.kerf / 1000,
+        args.time_limit,
+        args.workers,
+    )
+
+    output = Path(args.output)
+    write_chunks(
+        stream_csv(iter_report_rows(results), REPORT_COLUMNS), output / "report.csv"
+    )
+    write_chunks(
+        stream_csv(
+            iter_purchase_rows(results, WoodTypeCatalog(catalog_path)),
+            [*SUMMARY_COLUMNS, "Boards to Buy"],
+        ),
+        output / "purchase_summary.csv",
+    )
+
+    failed = sum(1 for result in results if result.error)
+    print(
+        f"{len(results) - failed} of {len(results)} projects processed in "
+        f"{time.perf_counter() - start:.1f}s, written to {output}",
+        file=sys.stderr,
+    )
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,108 @@
+"""Compare the storage codecs on generated projects and catalogs.
+
+For every codec, saves and loads large generated projects (in both project
+layouts) and a large catalog, and reports the best time of a few runs and
+the size on disk.
+
+    python -m benchmarks.bench_codecs [--assemblies 400] [--pieces 50]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, List
+
+from benchmarks.workload import generate_project, generate_wood_types
+from models.wood import Project
+from storage.catalog_store import FileCatalogStore
+from storage.codecs import CODECS, MsgpackCodec
+from storage.project_store import AssemblyProjectStore, FileProjectStore
+
+
+def best_time(run: Callable[[], object], repeat: int) -> float:
+    """Best wall-clock time of ``repeat`` runs, in milliseconds"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def size_on_disk(path: Path) -> int:
+    if path.is_file():
+        return path.stat().st_size
+    return sum(file.stat().st_size for file in path.rglob("*") if file.is_file())
+
+
+def available_codecs() -> List[str]:
+    names = []
+    for name, codec in CODECS.items():
+        if isinstance(codec, MsgpackCodec):
+            try:
+                codec.dumps({})
+            except ImportError:
+                print(f"Skipping {name}: msgpack is not installed")
+                continue
+        names.append(name)
+    return names
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--assemblies", type=int, default=400)
+    parser.add_argument("--pieces", type=int, default=50, help="Pieces per assembly")
+    parser.add_argument("--wood-types", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    project = generate_project("Benchmark", args.assemblies, args.pieces)
+    wood_types = generate_wood_types(args.wood_types)
+    rows = list(enumerate(wood_types))
+    print(
+        f"{args.assemblies} assemblies x {args.pieces} pieces, "
+        f"{args.wood_types} wood types, best of {args.repeat}\n"
+    )
+    print(f"{'case':<28}{'save ms':>10}{'load ms':>10}{'size KiB':>10}")
+
+    for name in available_codecs():
+        with tempfile.TemporaryDirectory() as tmp:
+            for layout, store_class in (
+                ("file", FileProjectStore),
+                ("assemblies", AssemblyProjectStore),
+            ):
+                store = store_class(os.path.join(tmp, layout), name)
+
+                def save():
+                    # Drop earlier files so that every run writes everything
+                    store.delete(project.name)
+                    store.save(project)
+
+                save_ms = best_time(save, args.repeat)
+                load_ms = best_time(
+                    lambda: Project.model_validate(store.load_data(project.name)),
+                    args.repeat,
+                )
+                path = store.path(project.name)
+                size = size_on_disk(path if layout == "file" else path.parent)
+                print(
+                    f"{name + ' project/' + layout:<28}"
+                    f"{save_ms:>10.1f}{load_ms:>10.1f}{size / 1024:>10.1f}"
+                )
+
+            catalog = FileCatalogStore(
+                Path(tmp) / f"catalog{CODECS[name].extension}", CODECS[name]
+            )
+            save_ms = best_time(lambda: catalog.write(rows), args.repeat)
+            load_ms = best_time(catalog.load, args.repeat)
+            print(
+                f"{name + ' catalog':<28}"
+                f"{save_ms:>10.1f}{load_ms:>10.1f}"
+                f"{size_on_disk(catalog.path) / 1024:>10.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,290 @@
+"""Time the cut list pipeline on a generated workload against a baseline.
+
+Covers the cut list computations, the CSV exports, saving and loading
+projects, loading and editing the catalog, both optimizers and remnant
+lookups. Each case reports the best time of a few runs. Results are
+compared with a baseline of the same preset and machine class (OS, CPU
+architecture and core count), and the exit code is 1 if a case got slower
+than the baseline by more than the threshold:
+
+    python -m benchmarks.bench_pipeline --save-baseline   # before a change
+    python -m benchmarks.bench_pipeline                   # after it
+
+``benchmarks/baseline.json`` is committed with the reference timings of
+the machines they were taken on; runs on another machine class print
+their timings without failing.
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from benchmarks.workload import (
+    PRESETS,
+    WorkloadSpec,
+    generate_remnants,
+    generate_workload,
+)
+from catalog import WoodTypeCatalog
+from core.columnar import aggregate_cut_list, detailed_cut_list_columns
+from core.cutlist import calculate_cut_list, get_detailed_cut_list
+from core.export import export_detailed_csv, export_summary_csv
+from inventory import RemnantInventory
+from optimizer.packing import optimize_cut_list
+from optimizer.patterns import solve_cut_list
+from project_manager import ProjectManager
+from storage.catalog_store import write_catalog_file
+from storage.writer import BackgroundWriter
+
+DEFAULT_BASELINE = Path(__file__).with_name("baseline.json")
+DEFAULT_THRESHOLD = 0.25  # 25% slower than the baseline is a regression
+REMNANTS = 20000  # In the inventory of the remnant cases
+MIN_SAMPLE_TIME = 0.05  # Fast cases are looped until a sample takes this long
+
+Case = Tuple[str, Callable[[], object]]
+
+
+def build_cases(
+    spec: WorkloadSpec, workdir: str, time_limit: float, writer: BackgroundWriter
+) -> List[Case]:
+    """The benchmark cases, set up on a workload written to ``workdir``;
+    background saves go through ``writer``"""
+    wood_types, project = generate_workload(spec, "Benchmark")
+    catalog_json = os.path.join(workdir, "catalog.json")
+    catalog_db = os.path.join(workdir, "catalog.db")
+    write_catalog_file(catalog_json, wood_types)
+    catalog = WoodTypeCatalog(catalog_db)
+    catalog.import_json(catalog_json)
+
+    inventory = RemnantInventory(catalog_db)
+    for index, lengths in generate_remnants(REMNANTS, spec.wood_types).items():
+        inventory.add(catalog.row_ids[index], lengths)
+    lookups = iter(range(sys.maxsize))
+
+    def best_fit():
+        n = next(lookups)
+        inventory.best_fit(catalog.row_ids[n % spec.wood_types], 0.3 + n % 200 / 100)
+
+    projects_dir = os.path.join(workdir, "projects")
+    manager = ProjectManager(projects_dir)
+    manager.save_project(project)
+    cut_list = calculate_cut_list(project, catalog)
+    detailed = get_detailed_cut_list(project, catalog)
+
+    def save_new():
+        manager.delete_project(project.name)
+        manager.save_project(project)
+
+    edits = iter(range(sys.maxsize))
+    # Its own directory, so that its saves do not merge with the ones above
+    background = ProjectManager(os.path.join(workdir, "background"), writer=writer)
+    background.save_project(project, wait=True)
+
+    def save_edit():
+        # One assembly changed, as after an edit in the assembly builder
+        assembly = project.assemblies[0]
+        assembly.units = 1 + next(edits) % 4
+        manager.save_project(project)
+
+    def save_background():
+        # What the script thread waits for when saves are written behind it
+        project.assemblies[0].units = 1 + next(edits) % 4
+        background.save_project(project)
+
+    def edit_catalog():
+        price = 10 + next(edits) % 50
+        catalog.update_from_editor({0: {"Price/m": price}})
+
+    return [
+        ("cut_list.calculate", lambda: calculate_cut_list(project, catalog)),
+        ("cut_list.detailed", lambda: get_detailed_cut_list(project, catalog)),
+        ("cut_list.aggregate_columnar", lambda: aggregate_cut_list(project, catalog)),
+        (
+            "cut_list.detailed_columnar",
+            lambda: detailed_cut_list_columns(project, catalog),
+        ),
+        ("export.summary_csv", lambda: export_summary_csv(cut_list)),
+        ("export.detailed_csv", lambda: export_detailed_csv(detailed)),
+        ("project.save", save_new),
+        ("project.save_one_assembly", save_edit),
+        ("project.save_background", save_background),
+        (
+            "project.load",
+            lambda: ProjectManager(projects_dir).load_project(project.name),
+        ),
+        ("project.load_cached", lambda: manager.load_project(project.name)),
+        ("catalog.load", lambda: WoodTypeCatalog(catalog_db)),
+        ("catalog.edit_row", edit_catalog),
+        ("optimizer.heuristic", lambda: optimize_cut_list(project, catalog)),
+        (
+            "optimizer.heuristic_remnants",
+            lambda: optimize_cut_list(project, catalog, inventory=inventory),
+        ),
+        ("inventory.best_fit", best_fit),
+        (
+            "optimizer.patterns",
+            lambda: solve_cut_list(project, catalog, time_limit=time_limit),
+        ),
+    ]
+
+
+def _sample(run: Callable[[], object], loops: int) -> float:
+    start = time.perf_counter()
+    for _ in range(loops):
+        run()
+    return time.perf_counter() - start
+
+
+def measure(run: Callable[[], object], repeat: int) -> float:
+    """Best time of one call in milliseconds, over ``repeat`` samples of
+    enough calls that timer noise does not matter"""
+    loops = 1
+    elapsed = _sample(run, loops)
+    while elapsed < MIN_SAMPLE_TIME:
+        loops *= 2 if elapsed == 0 else max(2, int(MIN_SAMPLE_TIME / elapsed) + 1)
+        elapsed = _sample(run, loops)
+    best = elapsed
+    for _ in range(repeat - 1):
+        best = min(best, _sample(run, loops))
+    return best / loops * 1000
+
+
+def run_cases(cases: List[Case], repeat: int) -> Dict[str, float]:
+    results = {}
+    for name, run in cases:
+        results[name] = measure(run, repeat)
+        print(f"  {name:<30}{results[name]:>10.3f} ms", file=sys.stderr)
+    return results
+
+
+def machine_class() -> str:
+    """What a baseline is comparable across: OS, architecture and cores"""
+    return f"{platform.system().lower()}-{platform.machine()}-{os.cpu_count()}cpu"
+
+
+def load_baseline(path: Path) -> Optional[dict]:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def compare(
+    results: Dict[str, float], baseline: Dict[str, float], threshold: float
+) -> List[str]:
+    """Print the results next to the baseline; return the regressed cases"""
+    regressions = []
+    print(f"{'case':<30}{'ms':>10}{'baseline':>10}{'change':>9}")
+    for name, ms in results.items():
+        before = baseline.get(name)
+        if before is None:
+            print(f"{name:<30}{ms:>10.3f}{'-':>10}{'-':>9}")
+            continue
+        change = ms / before - 1 if before > 0 else 0.0
+        flag = ""
+        if change > threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:<30}{ms:>10.3f}{before:>10.3f}{change:>+9.1%}{flag}")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--preset", choices=PRESETS, default="medium")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--only", nargs="+", help="Run the cases whose name contains one of these"
+    )
+    parser.add_argument(
+        "--time-limit",
+        type=float,
+        default=1.0,
+        help="Seconds for the pattern optimizer",
+    )
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="Store the results as the new baseline",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help="Allowed slowdown against the baseline, as a fraction",
+    )
+    args = parser.parse_args(argv)
+
+    spec = PRESETS[args.preset]
+    print(
+        f"{args.preset}: {spec.assemblies} assemblies x {spec.pieces} pieces, "
+        f"{spec.wood_types} wood types, best of {args.repeat}",
+        file=sys.stderr,
+    )
+    writer = BackgroundWriter()
+    with tempfile.TemporaryDirectory() as workdir:
+        cases = build_cases(spec, workdir, args.time_limit, writer)
+        if args.only:
+            cases = [
+                (name, run)
+                for name, run in cases
+                if any(part in name for part in args.only)
+            ]
+        results = run_cases(cases, args.repeat)
+        writer.close()  # Before the workload directory goes away
+
+    # Baselines are kept per preset and machine class; timings only compare
+    # on similar machines
+    stored = load_baseline(args.baseline) or {}
+    machine = machine_class()
+    by_machine = stored.setdefault(args.preset, {})
+    if args.save_baseline:
+        previous = by_machine.get(machine, {}).get("results", {})
+        by_machine[machine] = {
+            "workload": spec._asdict(),
+            "python": platform.python_version(),
+            "processor": platform.processor(),
+            "results": {**previous, **results},
+        }
+        args.baseline.write_text(json.dumps(stored, indent=2, sort_keys=True) + "\n")
+        print(f"Baseline saved to {args.baseline} for {machine}", file=sys.stderr)
+        return 0
+
+    baseline = by_machine.get(machine)
+    if baseline is None:
+        others = ", ".join(sorted(by_machine)) or "none"
+        print(
+            f"No {args.preset} baseline for {machine} in {args.baseline} "
+            f"(there are: {others})",
+            file=sys.stderr,
+        )
+        compare(results, {}, args.threshold)
+        return 0
+    if baseline["workload"] != spec._asdict():
+        print("The baseline was taken on another workload", file=sys.stderr)
+    if baseline.get("python") != platform.python_version():
+        print(
+            f"The baseline was taken with Python {baseline.get('python')}",
+            file=sys.stderr,
+        )
+    regressions = compare(results, baseline["results"], args.threshold)
+    if regressions:
+        print(
+            f"{len(regressions)} cases are more than {args.threshold:.0%} "
+            f"slower than the baseline",
+            file=sys.stderr,
+        )
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
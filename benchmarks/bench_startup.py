@@ -0,0 +1,80 @@
+"""Measure how long importing each part of the app takes.
+
+Every module is imported in a fresh interpreter, a few times, and the best
+time is reported with the heavy libraries the import pulled in. Modules
+that must stay usable without the UI are checked not to load streamlit,
+plotly or pandas; the exit code is 1 if one does.
+
+    python -m benchmarks.bench_startup [--repeat 5]
+"""
+
+import argparse
+import importlib.util
+import json
+import subprocess
+import sys
+
+# Modules that scripts and worker processes import
+HEADLESS_MODULES = [
+    "models.wood",
+    "core",
+    "core.cutlist",
+    "core.export",
+    "core.columnar",
+    "catalog",
+    "project_manager",
+    "optimizer.parallel",
+    "batch",
+]
+UI_MODULES = ["components.cutlist_viewer", "app"]
+HEAVY = ["numpy", "pandas", "plotly", "pyarrow", "streamlit"]
+FORBIDDEN = {"pandas", "plotly", "streamlit"}
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps([elapsed, [name for name in {heavy!r} if name in sys.modules]]))
+"""
+
+
+def measure(module: str, repeat: int):
+    """Best import time in milliseconds and the heavy modules loaded"""
+    best, loaded = float("inf"), []
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-c", PROBE.format(module=module, heavy=HEAVY)],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        elapsed, loaded = json.loads(output.splitlines()[-1])
+        best = min(best, elapsed * 1000)
+    return best, loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    modules = list(HEADLESS_MODULES)
+    if importlib.util.find_spec("streamlit") is not None:
+        modules += UI_MODULES
+    else:
+        print("streamlit is not installed, skipping the UI modules\n")
+
+    failed = False
+    print(f"{'module':<28}{'import ms':>10}  heavy modules loaded")
+    for module in modules:
+        best, loaded = measure(module, args.repeat)
+        flag = ""
+        if module in HEADLESS_MODULES and FORBIDDEN & set(loaded):
+            flag, failed = "  <- must not load UI libraries", True
+        print(f"{module:<28}{best:>10.1f}  {', '.join(loaded) or '-'}{flag}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
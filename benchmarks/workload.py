@@ -0,0 +1,209 @@
+"""Generate synthetic catalogs and projects for benchmarks and testing.
+
+Workloads are reproducible from a seed. Piece lengths follow one of
+``LENGTH_DISTRIBUTIONS``:
+
+- ``uniform``: anywhere between ``min_length`` and ``max_length``
+- ``normal``: clustered around the middle of that range
+- ``furniture``: mostly short rails and stretchers, some legs and posts and a
+  few long boards, rounded to 5 mm like real cutting lists
+
+Generated workloads can also be written to disk, to try the app on more
+than the bundled sample project:
+
+    python -m benchmarks.workload --preset large --projects 3 --output workload
+"""
+
+import argparse
+import os
+import random
+from typing import Callable, Dict, List, NamedTuple
+
+from models.wood import Assembly, AssemblyPiece, Project, WoodType
+
+WIDTHS = [20, 22, 25, 45, 50, 70, 95, 120, 145]
+HEIGHTS = [20, 22, 25, 45, 50, 70]
+STOCK_LENGTHS = [2.4, 3.0, 3.6, 4.2, 4.8, 6.0]
+
+# Share, mean and spread in metres of the pieces of furniture
+FURNITURE_PIECES = [(0.55, 0.45, 0.15), (0.30, 0.9, 0.2), (0.15, 2.0, 0.4)]
+
+
+def _uniform(rng: random.Random, low: float, high: float) -> float:
+    return rng.uniform(low, high)
+
+
+def _normal(rng: random.Random, low: float, high: float) -> float:
+    return rng.gauss((low + high) / 2, (high - low) / 6)
+
+
+def _furniture(rng: random.Random, low: float, high: float) -> float:
+    share = rng.random()
+    for weight, mean, spread in FURNITURE_PIECES:
+        if share < weight:
+            break
+        share -= weight
+    return round(rng.gauss(mean, spread) / 0.005) * 0.005
+
+
+LENGTH_DISTRIBUTIONS: Dict[str, Callable[[random.Random, float, float], float]] = {
+    "uniform": _uniform,
+    "normal": _normal,
+    "furniture": _furniture,
+}
+
+
+class WorkloadSpec(NamedTuple):
+    """Size and shape of a generated workload"""
+
+    assemblies: int
+    pieces: int  # Per assembly
+    wood_types: int
+    lengths: str = "furniture"
+
+
+PRESETS: Dict[str, WorkloadSpec] = {
+    "small": WorkloadSpec(assemblies=20, pieces=10, wood_types=40),
+    "medium": WorkloadSpec(assemblies=200, pieces=25, wood_types=200),
+    "large": WorkloadSpec(assemblies=1000, pieces=50, wood_types=2000),
+}
+
+
+def generate_wood_types(count: int, seed: int = 0) -> List[WoodType]:
+    """A catalog of random wood types"""
+    rng = random.Random(seed)
+    return [
+        WoodType(
+            width=float(rng.choice(WIDTHS)),
+            height=float(rng.choice(HEIGHTS)),
+            price_per_meter=round(rng.uniform(5, 80), 2),
+            available_lengths=sorted(
+                rng.sample(STOCK_LENGTHS, rng.randint(1, len(STOCK_LENGTHS)))
+            ),
+            description=f"Wood type {i}",
+        )
+        for i in range(count)
+    ]
+
+
+def generate_project(
+    name: str,
+    assemblies: int,
+    pieces: int,
+    wood_types: int = 40,
+    seed: int = 0,
+    lengths: str = "uniform",
+    min_length: float = 0.1,
+    max_length: float = 3.0,
+) -> Project:
+    """A project of random assemblies.
+
+    Args:
+        name: Project name
+        assemblies: Number of assemblies
+        pieces: Pieces per assembly
+        wood_types: Pieces use wood type indices below this
+        seed: Seed of the random generator
+        lengths: Name of the piece length distribution
+        min_length: Shortest piece in metres
+        max_length: Longest piece in metres
+    """
+    if lengths not in LENGTH_DISTRIBUTIONS:
+        raise ValueError(f"Unknown length distribution: {lengths}")
+    draw = LENGTH_DISTRIBUTIONS[lengths]
+    rng = random.Random(seed)
+
+    def length() -> float:
+        value = draw(rng, min_length, max_length)
+        return round(min(max(value, min_length), max_length), 3)
+
+    return Project(
+        name=name,
+        description=f"Generated project with {assemblies} assemblies",
+        assemblies=[
+            Assembly(
+                name=f"Assembly {i}",
+                units=rng.randint(1, 4),
+                pieces=[
+                    AssemblyPiece(
+                        wood_type_index=rng.randrange(wood_types),
+                        length=length(),
+                        quantity=rng.randint(1, 8),
+                    )
+                    for _ in range(pieces)
+                ],
+            )
+            for i in range(assemblies)
+        ],
+    )
+
+
+def generate_remnants(
+    count: int, wood_types: int, seed: int = 0
+) -> Dict[int, List[float]]:
+    """Remnant lengths per wood type index, as left over by earlier cuts"""
+    rng = random.Random(seed)
+    remnants: Dict[int, List[float]] = {}
+    for _ in range(count):
+        remnants.setdefault(rng.randrange(wood_types), []).append(
+            round(rng.uniform(0.3, 2.4), 3)
+        )
+    return remnants
+
+
+def generate_workload(spec: WorkloadSpec, name: str = "Workload", seed: int = 0):
+    """A catalog and a project that uses it, as ``(wood_types, project)``"""
+    wood_types = generate_wood_types(spec.wood_types, seed)
+    project = generate_project(
+        name, spec.assemblies, spec.pieces, spec.wood_types, seed, spec.lengths
+    )
+    return wood_types, project
+
+
+def main():
+    from project_manager import ProjectManager
+    from storage.catalog_store import write_catalog_file
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--preset", choices=PRESETS, default="medium")
+    parser.add_argument("--assemblies", type=int, help="Override the preset")
+    parser.add_argument("--pieces", type=int, help="Pieces per assembly")
+    parser.add_argument("--wood-types", type=int)
+    parser.add_argument("--lengths", choices=LENGTH_DISTRIBUTIONS)
+    parser.add_argument("--projects", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="workload", help="Output directory")
+    args = parser.parse_args()
+
+    spec = PRESETS[args.preset]._replace(
+        **{
+            field: getattr(args, field)
+            for field in WorkloadSpec._fields
+            if getattr(args, field) is not None
+        }
+    )
+    os.makedirs(args.output, exist_ok=True)
+    catalog_path = os.path.join(args.output, "catalog.json")
+    write_catalog_file(catalog_path, generate_wood_types(spec.wood_types, args.seed))
+    manager = ProjectManager(os.path.join(args.output, "projects"))
+    for n in range(args.projects):
+        manager.delete_project(f"Generated {n + 1}")  # From an earlier run
+        manager.save_project(
+            generate_project(
+                f"Generated {n + 1}",
+                spec.assemblies,
+                spec.pieces,
+                spec.wood_types,
+                args.seed + n,
+                spec.lengths,
+            )
+        )
+    print(
+        f"Wrote {spec.wood_types} wood types to {catalog_path} and "
+        f"{args.projects} projects of {spec.assemblies} x {spec.pieces} pieces "
+        f"to {manager.projects_dir}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Callable, Hashable, Optional, TypeVar, Union
+
+from models.wood import Project
+
+if TYPE_CHECKING:
+    from models.compact import CompactProject
+
+T = TypeVar("T")
+
+
+def digest(data: bytes) -> str:
+    """Return a short, stable hex digest of the given bytes"""
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def project_digest(project: Union[Project, "CompactProject"]) -> str:
+    """Return a stable digest of a project's content"""
+    if hasattr(project, "content_bytes"):  # CompactProject
+        return digest(project.content_bytes())
+    return digest(project.model_dump_json().encode())
+
+
+class LRUCache:
+    """A thread-safe cache holding at most ``max_entries`` items, evicting the
+    least recently used one first."""
+
+    def __init__(self, max_entries: int = 32):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._items: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._items
+
+    def get(self, key: Hashable, default: Optional[Any] = None) -> Any:
+        """Get an item and mark it as recently used"""
+        with self._lock:
+            if key not in self._items:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self._items.move_to_end(key)
+            return self._items[key]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """Store an item, evicting the least recently used ones if full"""
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], T]) -> T:
+        """Get an item, computing and storing it on a miss"""
+        sentinel = object()
+        value = self.get(key, sentinel)
+        if value is sentinel:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def invalidate(self, key: Hashable) -> None:
+        """Drop a single item"""
+        with self._lock:
+            self._items.pop(key, None)
+
+    def clear(self) -> None:
+        """Drop all items"""
+        with self._lock:
+            self._items.clear()
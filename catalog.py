@@ -1,112 +1,461 @@
+import copy
 import json
+import os
+import threading
+import time
+from bisect import bisect_left, bisect_right, insort
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
 
+from cache import digest
+from catalog_diff import ROW_ID, CatalogDelta
 from models.wood import WoodType
+from storage.catalog_store import (
+    CatalogStore,
+    open_catalog_store,
+    read_catalog_file,
+    write_catalog_file,
+)
+from storage.versioning import ConflictError, VersionConflict
+from tracing import traced
+
+
+def format_dimensions(width: float, height: float) -> str:
+    """Format dimensions with 1 decimal place"""
+    return f"{width:.1f}x{height:.1f}mm"
+
+
+def wood_type_label(wood_type: WoodType) -> str:
+    """Label of a wood type as shown in the assembly tables"""
+    return f"{format_dimensions(wood_type.width, wood_type.height)} - {wood_type.description}"
+
+
+def _dimension_key(value: float) -> int:
+    """Dimensions are matched at 0.1mm, the precision the catalog shows"""
+    return int(round(value * 10))
+
+
+CATALOG_SAVE_ATTEMPTS = 5  # Rebases tried when other sessions keep saving
+REFRESH_INTERVAL = 1.0  # Seconds between checks for saves of other processes
+
+
+class CatalogIndex:
+    """Lookup indexes over the catalog rows, kept in step with every edit.
+
+    Exact lookups by dimensions and by label are hash lookups; range queries
+    over width, height and price bisect sorted (value, row index) lists.
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self) -> None:
+        self._by_dimensions: Dict[Tuple[int, int], List[int]] = {}
+        self._by_width: Dict[int, List[int]] = {}
+        self._by_height: Dict[int, List[int]] = {}
+        self._by_label: Dict[str, List[int]] = {}
+        self._sorted: Dict[str, List[Tuple[float, int]]] = {
+            "width": [],
+            "height": [],
+            "price_per_meter": [],
+        }
+
+    def copy(self) -> "CatalogIndex":
+        other = CatalogIndex()
+        for mapping, source in zip(other._maps(), self._maps()):
+            mapping.update((key, list(indices)) for key, indices in source.items())
+        other._sorted = {field: list(values) for field, values in self._sorted.items()}
+        return other
+
+    def rebuild(self, wood_types: List[WoodType]) -> None:
+        """Rebuild all indexes from scratch"""
+        self.clear()
+        for index, wood_type in enumerate(wood_types):
+            self.add(index, wood_type)
+
+    @staticmethod
+    def _keys(wood_type: WoodType):
+        width = _dimension_key(wood_type.width)
+        height = _dimension_key(wood_type.height)
+        return (width, height), width, height, wood_type_label(wood_type)
+
+    def _maps(self):
+        return self._by_dimensions, self._by_width, self._by_height, self._by_label
+
+    def add(self, index: int, wood_type: WoodType) -> None:
+        """Index a row"""
+        for mapping, key in zip(self._maps(), self._keys(wood_type)):
+            insort(mapping.setdefault(key, []), index)
+        for field, values in self._sorted.items():
+            insort(values, (getattr(wood_type, field), index))
+
+    def remove(self, index: int, wood_type: WoodType) -> None:
+        """Remove a row, given the values it was indexed with"""
+        for mapping, key in zip(self._maps(), self._keys(wood_type)):
+            indices = mapping.get(key, [])
+            if index in indices:
+                indices.remove(index)
+            if not indices:
+                mapping.pop(key, None)
+        for field, values in self._sorted.items():
+            entry = (getattr(wood_type, field), index)
+            pos = bisect_left(values, entry)
+            if pos < len(values) and values[pos] == entry:
+                del values[pos]
+
+    def find(
+        self, width: Optional[float] = None, height: Optional[float] = None
+    ) -> List[int]:
+        """Row indices matching the given dimensions"""
+        if width is not None and height is not None:
+            key = (_dimension_key(width), _dimension_key(height))
+            return list(self._by_dimensions.get(key, []))
+        if width is not None:
+            return list(self._by_width.get(_dimension_key(width), []))
+        if height is not None:
+            return list(self._by_height.get(_dimension_key(height), []))
+        return sorted(index for _, index in self._sorted["width"])
+
+    def range(
+        self, field: str, low: Optional[float] = None, high: Optional[float] = None
+    ) -> List[int]:
+        """Row indices whose ``field`` lies in [low, high]"""
+        values = self._sorted[field]
+        start = 0 if low is None else bisect_left(values, (low, -1))
+        end = len(values) if high is None else bisect_right(values, (high, len(values)))
+        return [index for _, index in values[start:end]]
+
+    def index_of_label(self, label: str) -> Optional[int]:
+        """First row with the given label"""
+        indices = self._by_label.get(label)
+        return indices[0] if indices else None
+
+
+EMPTY_WOOD_TYPE = WoodType(
+    width=0.0,
+    height=0.0,
+    price_per_meter=0.0,
+    available_lengths=[],
+    description="",
+)
 
 
 class WoodTypeCatalog:
-    def __init__(self, file_path: str):
-        """Initialize the catalog with a JSON file path."""
+    def __init__(self, file_path: str, store: Optional[CatalogStore] = None):
+        """Initialize the catalog with a file path.
+
+        Args:
+            file_path: A JSON or MessagePack (.msgpack) file, or a SQLite
+                database (.db, .sqlite, .sqlite3) that is written row by row
+            store: Storage backend to use instead of the one picked from
+                the file extension
+        """
         self.file_path = Path(file_path)
+        self._store = store or open_catalog_store(self.file_path)
         self.wood_types = []
+        self.row_ids: List[int] = []  # Stable ID of each row
+        self._next_row_id = 0
+        self._positions: Optional[Dict[int, int]] = None  # Row ID -> index
+        self.version = 0  # Bumped on every change
+        self.stored_version = 0  # Store version the rows were read or saved at
+        self._stored_next_row_id = 0  # Rows from this ID on are not stored yet
+        self._digest: Optional[str] = None
+        self._options: Optional[List[str]] = None
+        self._index = CatalogIndex()
         self._load_catalog()
 
     def __len__(self):
         return len(self.wood_types)
 
+    @traced("catalog.load")
     def _load_catalog(self):
-        """Load the catalog from JSON file. Creates a new one if it doesn't exist."""
-        if not self.file_path.exists():
+        """Load the catalog from storage. Creates a new one if it doesn't exist."""
+        if not self._store.exists():
             self._save_catalog()  # Create empty catalog
             return
 
-        with open(self.file_path, "r") as f:
-            data = json.load(f).get("wood_types", [])
-            self.wood_types = [
-                WoodType(
-                    width=item["width"],
-                    height=item["height"],
-                    price_per_meter=item["price_per_meter"],
-                    available_lengths=item.get("available_lengths", []),
-                    description=item.get("description", ""),
+        self.stored_version, rows = self._store.load_versioned()
+        self.wood_types = [wood_type for _, wood_type in rows]
+        self.row_ids = [row_id for row_id, _ in rows]
+        self._next_row_id = max(self.row_ids, default=-1) + 1
+        self._stored_next_row_id = self._next_row_id
+        self._positions = None
+        self._index.rebuild(self.wood_types)
+
+    def is_outdated(self) -> bool:
+        """Whether another session saved the catalog since it was loaded or
+        saved here"""
+        return self._store.version() != self.stored_version
+
+    def refresh(self) -> bool:
+        """Load the catalog again if it is outdated; returns whether it was"""
+        if not self.is_outdated():
+            return False
+        self._load_catalog()
+        self._changed()
+        return True
+
+    def copy(self) -> "WoodTypeCatalog":
+        """A copy to edit while others keep reading this catalog. Edits
+        replace wood types rather than change them, so they are shared."""
+        other = copy.copy(self)
+        other.wood_types = list(self.wood_types)
+        other.row_ids = list(self.row_ids)
+        other._positions = None if self._positions is None else dict(self._positions)
+        other._index = self._index.copy()
+        return other
+
+    def _changed(self) -> None:
+        """Mark the catalog as changed, invalidating derived data."""
+        self.version += 1
+        self._digest = None
+        self._options = None
+
+    def digest(self) -> str:
+        """Return a stable digest of the catalog content."""
+        if self._digest is None:
+            self._digest = digest(
+                json.dumps(
+                    [wt.model_dump() for wt in self.wood_types], sort_keys=True
+                ).encode()
+            )
+        return self._digest
+
+    @traced("catalog.save")
+    def _save_catalog(
+        self, changed: Optional[List[int]] = None, deleted: Sequence[int] = ()
+    ):
+        """Save the catalog; backends that can will only write the rows
+        whose IDs are given.
+
+        Saving all rows replaces whatever is stored. Saving some rows after
+        another session saved the catalog keeps its changes: the catalog is
+        reloaded and this session's edits are applied again, except those
+        of rows the other session changed too.
+
+        Raises:
+            ConflictError: Edits were dropped for rows changed in another
+                session; the catalog holds its version of them
+        """
+        lost: List[int] = []
+        for attempt in range(CATALOG_SAVE_ATTEMPTS):
+            expected = None if changed is None else self.stored_version
+            try:
+                version = self._store.write(
+                    list(zip(self.row_ids, self.wood_types)),
+                    changed,
+                    deleted,
+                    expected,
                 )
-                for item in data
-            ]
-
-    def _save_catalog(self):
-        """Save the catalog to JSON file."""
-        data = {
-            "wood_types": [
-                {
-                    "width": wt.width,
-                    "height": wt.height,
-                    "price_per_meter": wt.price_per_meter,
-                    "available_lengths": wt.available_lengths,
-                    "description": wt.description,
-                }
-                for wt in self.wood_types
-            ]
+                break
+            except VersionConflict as e:
+                if not e.row_ids or attempt == CATALOG_SAVE_ATTEMPTS - 1:
+                    # The store cannot tell which rows the other session
+                    # changed (file catalogs), or it keeps saving
+                    self._load_catalog()
+                    self._changed()
+                    raise ConflictError(
+                        "The catalog was changed in another session at the same "
+                        "time; your last edit was not saved"
+                    ) from e
+                changed, deleted = self._rebase(changed, deleted, e.row_ids, lost)
+        if expected is not None and version != expected + 1:
+            # Other sessions saved other rows in between
+            self._load_catalog()
+            self._changed()
+        else:
+            self.stored_version = version
+            self._stored_next_row_id = self._next_row_id
+        if lost:
+            raise ConflictError(
+                f"{len(lost)} wood type(s) were changed in another session at "
+                "the same time; the catalog now shows their changes"
+            )
+
+    def _rebase(
+        self,
+        changed: List[int],
+        deleted: List[int],
+        conflicts: List[int],
+        lost: List[int],
+    ) -> Tuple[List[int], List[int]]:
+        """Reload the catalog and apply this session's unsaved edits to it
+        again, skipping rows in ``conflicts``; those whose edit differs from
+        the stored row are added to ``lost``. Returns the rows to save."""
+        ours = dict(zip(self.row_ids, self.wood_types))
+        inserted = [
+            ours[row_id]
+            for row_id in changed
+            if row_id >= self._stored_next_row_id and row_id in ours
+        ]
+        updated = {
+            row_id: ours[row_id]
+            for row_id in changed
+            if row_id < self._stored_next_row_id and row_id in ours
         }
-        with open(self.file_path, "w") as f:
-            json.dump(data, f, indent=2)
+        self._load_catalog()
+        positions = self._row_positions()
+        for row_id in conflicts:
+            ours_row = updated.pop(row_id, None)
+            theirs = positions.get(row_id)
+            if row_id in deleted:
+                if theirs is not None:  # Changed there, deleted here
+                    lost.append(row_id)
+            elif ours_row is not None:
+                if theirs is None or self.wood_types[theirs] != ours_row:
+                    lost.append(row_id)
+
+        changed = []
+        for row_id, wood_type in updated.items():
+            if row_id in positions:
+                self._replace_row(positions[row_id], wood_type)
+                changed.append(row_id)
+        deleted = [
+            row_id
+            for row_id in deleted
+            if row_id in positions and row_id not in conflicts
+        ]
+        self._delete_indices([positions[row_id] for row_id in deleted])
+        for wood_type in inserted:
+            self._append_row(wood_type)
+            changed.append(self.row_ids[-1])
+        self._changed()
+        return changed, deleted
+
+    def import_json(self, file_path: str) -> None:
+        """Replace the catalog with the wood types of a JSON catalog file
+        (or of a catalog file in any other codec)."""
+        self.wood_types = read_catalog_file(file_path)
+        self.row_ids = list(range(len(self.wood_types)))
+        self._next_row_id = len(self.wood_types)
+        self._positions = None
+        self._index.rebuild(self.wood_types)
+        self._changed()
+        self._save_catalog()
+
+    def export_json(self, file_path: str) -> None:
+        """Write the catalog to a JSON catalog file."""
+        write_catalog_file(file_path, self.wood_types)
+
+    @staticmethod
+    def _parse_editor_row(row: Dict[str, Any], current: WoodType) -> WoodType:
+        """Build a wood type from an editor row; missing cells keep the
+        current values."""
+        row = {name: value for name, value in row.items() if value is not None}
+        available_lengths = list(current.available_lengths)
+        if "Available Lengths" in row:
+            # Convert string lengths back to list
+            available_lengths = []
+            try:
+                lengths_str = row["Available Lengths"]
+                available_lengths = [
+                    float(x.strip()) for x in lengths_str.split(",") if x.strip()
+                ]
+            except:
+                pass  # Keep empty list if parsing fails
+
+        price = row.get("Price/m", current.price_per_meter)
+        if isinstance(price, str):
+            price = price.strip("₪")
+        return WoodType(
+            width=float(row.get("Width (mm)", current.width)),
+            height=float(row.get("Height (mm)", current.height)),
+            price_per_meter=float(price),
+            available_lengths=available_lengths,
+            description=row.get("Description", current.description),
+        )
+
+    def _replace_row(self, index: int, wood_type: WoodType) -> None:
+        self._index.remove(index, self.wood_types[index])
+        self.wood_types[index] = wood_type
+        self._index.add(index, wood_type)
+
+    def _append_row(self, wood_type: WoodType) -> None:
+        self.wood_types.append(wood_type)
+        self.row_ids.append(self._next_row_id)
+        if self._positions is not None:
+            self._positions[self._next_row_id] = len(self.wood_types) - 1
+        self._next_row_id += 1
+        self._index.add(len(self.wood_types) - 1, wood_type)
+
+    def _delete_indices(self, indices: List[int]) -> None:
+        # Sort in reverse order to avoid index shifting
+        reindex = False
+        for index in sorted(set(indices), reverse=True):
+            if 0 <= index < len(self.wood_types):
+                if index == len(self.wood_types) - 1:
+                    self._index.remove(index, self.wood_types[index])
+                else:
+                    reindex = True  # Later rows move up
+                self.wood_types.pop(index)
+                self.row_ids.pop(index)
+        self._positions = None
+        if reindex:
+            self._index.rebuild(self.wood_types)
+
+    def _row_positions(self) -> Dict[int, int]:
+        if self._positions is None:
+            self._positions = {row_id: i for i, row_id in enumerate(self.row_ids)}
+        return self._positions
 
     def update_from_editor(self, edited_rows: Dict[int, Dict[str, Any]]) -> None:
         """Update catalog from edited table rows."""
         for index, row in edited_rows.items():
-            # Convert string lengths back to list
-            available_lengths = []
-            if "Available Lengths" in row:
-                try:
-                    lengths_str = row["Available Lengths"]
-                    available_lengths = [
-                        float(x.strip()) for x in lengths_str.split(",") if x.strip()
-                    ]
-                except:
-                    pass  # Keep empty list if parsing fails
-
-            # Create updated wood type
-            updated_wood_type = WoodType(
-                width=float(row.get("Width (mm)", self.wood_types[index].width)),
-                height=float(row.get("Height (mm)", self.wood_types[index].height)),
-                price_per_meter=float(
-                    row.get("Price/m", self.wood_types[index].price_per_meter).strip(
-                        "₪"
-                    )
-                ),
-                available_lengths=available_lengths,
-                description=row.get("Description", self.wood_types[index].description),
+            self._replace_row(
+                index, self._parse_editor_row(row, self.wood_types[index])
             )
-            self.wood_types[index] = updated_wood_type
-        self._save_catalog()
+        self._changed()
+        self._save_catalog(changed=[self.row_ids[index] for index in edited_rows])
 
     def add_empty_row(self) -> None:
         """Add an empty row to the catalog."""
-        new_wood_type = WoodType(
-            width=0.0,
-            height=0.0,
-            price_per_meter=0.0,
-            available_lengths=[],
-            description="",
-        )
-        self.wood_types.append(new_wood_type)
-        self._save_catalog()
+        self._append_row(EMPTY_WOOD_TYPE.model_copy(deep=True))
+        self._changed()
+        self._save_catalog(changed=[self.row_ids[-1]])
 
     def delete_rows(self, rows_to_delete: List[int]) -> None:
         """Delete rows from the catalog."""
-        # Sort in reverse order to avoid index shifting
-        for index in sorted(rows_to_delete, reverse=True):
-            if 0 <= index < len(self.wood_types):
-                self.wood_types.pop(index)
-        self._save_catalog()
+        deleted = [
+            self.row_ids[index]
+            for index in set(rows_to_delete)
+            if 0 <= index < len(self.row_ids)
+        ]
+        self._delete_indices(rows_to_delete)
+        self._changed()
+        self._save_catalog(changed=[], deleted=deleted)
 
-    def to_editable_table(self) -> List[Dict]:
+    def apply_delta(self, delta: CatalogDelta) -> None:
+        """Apply inserts, updates and deletes by row ID, then save once."""
+        if not delta:
+            return
+        positions = self._row_positions()
+        changed = []
+        for row_id, cells in delta.updates.items():
+            if row_id in positions:
+                index = positions[row_id]
+                self._replace_row(
+                    index, self._parse_editor_row(cells, self.wood_types[index])
+                )
+                changed.append(row_id)
+        deleted = [row_id for row_id in delta.deletes if row_id in positions]
+        if deleted:
+            self._delete_indices([positions[row_id] for row_id in deleted])
+        for row in delta.inserts:
+            self._append_row(self._parse_editor_row(row, EMPTY_WOOD_TYPE))
+            changed.append(self.row_ids[-1])
+        self._changed()
+        self._save_catalog(changed=changed, deleted=deleted)
+
+    def to_editable_table(self, include_ids: bool = False) -> List[Dict]:
         """Convert the catalog to an editable table format.
 
+        Args:
+            include_ids: Add each row's stable ID in a hidden column
+
         Returns:
             List of dictionaries containing formatted wood type data
         """
-        return [
+        rows = [
             {
                 "Width (mm)": round(wt.width, 1),
                 "Height (mm)": round(wt.height, 1),
@@ -116,6 +465,10 @@ class WoodTypeCatalog:
             }
             for wt in self.wood_types
         ]
+        if include_ids:
+            for row, row_id in zip(rows, self.row_ids):
+                row[ROW_ID] = row_id
+        return rows
 
     def get_wood_type(self, index: int) -> Optional[WoodType]:
         """Get a wood type by index."""
@@ -130,13 +483,63 @@ class WoodTypeCatalog:
     def find_wood_types(
         self, width: Optional[float] = None, height: Optional[float] = None
     ) -> List[WoodType]:
-        """Find wood types matching the given dimensions."""
-        results = self.wood_types
-        if width is not None:
-            results = [wt for wt in results if wt.width == width]
-        if height is not None:
-            results = [wt for wt in results if wt.height == height]
-        return results
+        """Find wood types matching the given dimensions (to 0.1mm)."""
+        return [self.wood_types[i] for i in self._index.find(width, height)]
+
+    def find_indices(
+        self, width: Optional[float] = None, height: Optional[float] = None
+    ) -> List[int]:
+        """Find the indices of wood types matching the given dimensions."""
+        return self._index.find(width, height)
+
+    def find_in_range(
+        self,
+        width: Tuple[Optional[float], Optional[float]] = (None, None),
+        height: Tuple[Optional[float], Optional[float]] = (None, None),
+        price_per_meter: Tuple[Optional[float], Optional[float]] = (None, None),
+    ) -> List[int]:
+        """Find the indices of wood types within inclusive (low, high) ranges.
+
+        A bound of None leaves that side of the range open.
+        """
+        result = None
+        for field, (low, high) in (
+            ("width", width),
+            ("height", height),
+            ("price_per_meter", price_per_meter),
+        ):
+            if low is None and high is None:
+                continue
+            indices = set(self._index.range(field, low, high))
+            result = indices if result is None else result & indices
+        if result is None:
+            return list(range(len(self.wood_types)))
+        return sorted(result)
+
+    def wood_type_options(self) -> List[str]:
+        """Get the labels of all wood types, in catalog order.
+
+        The list is built once per catalog version and shared by every
+        assembly table, so it must not be modified.
+        """
+        if self._options is None:
+            self._options = [wood_type_label(wt) for wt in self.wood_types]
+        return self._options
+
+    def get_label(self, index: int) -> Optional[str]:
+        """Get the label of a wood type, as shown in the assembly tables."""
+        if 0 <= index < len(self.wood_types):
+            return self.wood_type_options()[index]
+        return None
+
+    def index_of_label(self, label: str) -> Optional[int]:
+        """Get the index of the first wood type with the given label."""
+        return self._index.index_of_label(label)
+
+    def index_of_row(self, row_id: int) -> Optional[int]:
+        """Get the index of the wood type with the given row ID, if it was
+        not deleted."""
+        return self._row_positions().get(row_id)
 
     def to_table(self) -> List[Dict]:
         """Convert the catalog to a table format suitable for display.
@@ -154,3 +557,76 @@ class WoodTypeCatalog:
             }
             for wt in self.wood_types
         ]
+
+
+class SharedCatalog:
+    """One catalog shared by all sessions of the process.
+
+    ``current`` is never modified, so sessions read it without locks. Edits
+    are applied to a copy, saved, and the copy replaces ``current``
+    (copy-on-write); a session rendering the old catalog keeps a consistent
+    one until its next rerun. Its ``version`` tells sessions whether the
+    catalog changed since they last looked.
+    """
+
+    def __init__(self, catalog: WoodTypeCatalog):
+        self._current = catalog
+        self._lock = threading.Lock()  # Serializes edits
+        self._checked = time.monotonic()
+
+    @property
+    def current(self) -> WoodTypeCatalog:
+        """The catalog as of now; must not be modified"""
+        return self._current
+
+    @property
+    def version(self) -> int:
+        """Bumped on every edit, in any session"""
+        return self._current.version
+
+    def edit(self, change: Callable[[WoodTypeCatalog], None]) -> WoodTypeCatalog:
+        """Apply ``change`` to a copy of the catalog and publish the copy.
+
+        A ``ConflictError`` still publishes the copy, which then holds what
+        another process saved; other errors leave the catalog as it was.
+        """
+        with self._lock:
+            catalog = self._current.copy()
+            try:
+                change(catalog)
+            except ConflictError:
+                self._current = catalog
+                raise
+            self._current = catalog
+            return catalog
+
+    def refresh(self) -> bool:
+        """Load saves of other processes, checking at most every
+        ``REFRESH_INTERVAL`` seconds; returns whether there were any"""
+        if time.monotonic() - self._checked < REFRESH_INTERVAL:
+            return False
+        with self._lock:
+            self._checked = time.monotonic()
+            if not self._current.is_outdated():
+                return False
+            catalog = self._current.copy()
+            catalog.refresh()
+            self._current = catalog
+            return True
+
+
+_shared: Dict[str, SharedCatalog] = {}
+_shared_lock = threading.Lock()
+
+
+def get_shared_catalog(
+    file_path: str, load: Optional[Callable[[], WoodTypeCatalog]] = None
+) -> SharedCatalog:
+    """Return the catalog of ``file_path`` shared by all sessions, loading it
+    (with ``load``, if given) on first use"""
+    key = os.path.abspath(file_path)
+    with _shared_lock:
+        if key not in _shared:
+            catalog = load() if load is not None else WoodTypeCatalog(file_path)
+            _shared[key] = SharedCatalog(catalog)
+        return _shared[key]
@@ -0,0 +1,103 @@
+"""Row diffs for the catalog editor.
+
+Every catalog row carries a stable ID (``WoodTypeCatalog.row_ids``) that is
+sent to the editor as a hidden column. Edits are turned into a minimal
+``CatalogDelta`` of inserted rows, changed cells and deleted row IDs,
+either straight from the editor's own change state, which only lists what
+changed, or by diffing the edited rows against the originals by ID.
+"""
+
+from typing import Any, Dict, List, Mapping, NamedTuple, Optional, Sequence
+
+ROW_ID = "_row_id"
+
+
+class CatalogDelta(NamedTuple):
+    """Minimal set of changes to apply to the catalog.
+
+    The fields have no defaults, as a default list or dict would be shared
+    by every delta; use ``create`` to leave some of them empty.
+    """
+
+    inserts: List[Dict[str, Any]]  # New rows, in editor format
+    updates: Dict[int, Dict[str, Any]]  # Row ID -> changed cells
+    deletes: List[int]  # Row IDs
+
+    def __bool__(self):
+        return bool(self.inserts or self.updates or self.deletes)
+
+    @classmethod
+    def create(
+        cls,
+        inserts: Optional[List[Dict[str, Any]]] = None,
+        updates: Optional[Dict[int, Dict[str, Any]]] = None,
+        deletes: Optional[List[int]] = None,
+    ) -> "CatalogDelta":
+        """Build a delta, with new empty containers for the missing parts"""
+        return cls(
+            [] if inserts is None else inserts,
+            {} if updates is None else updates,
+            [] if deletes is None else deletes,
+        )
+
+    @classmethod
+    def from_editor_state(
+        cls, state: Mapping[str, Any], row_ids: Sequence[int]
+    ) -> "CatalogDelta":
+        """Build a delta from ``st.data_editor`` change state.
+
+        The state holds ``edited_rows`` (position -> changed cells),
+        ``added_rows`` and ``deleted_rows`` (positions), all relative to the
+        rows the editor was given, so the work is proportional to the edit.
+        """
+        deletes = [
+            row_ids[int(position)]
+            for position in state.get("deleted_rows", [])
+            if 0 <= int(position) < len(row_ids)
+        ]
+        deleted = set(deletes)
+        updates = {}
+        for position, cells in state.get("edited_rows", {}).items():
+            position = int(position)
+            if 0 <= position < len(row_ids) and row_ids[position] not in deleted:
+                updates[row_ids[position]] = {
+                    name: value for name, value in cells.items() if name != ROW_ID
+                }
+        inserts = [
+            {name: value for name, value in row.items() if name != ROW_ID}
+            for row in state.get("added_rows", [])
+        ]
+        return cls(inserts, updates, deletes)
+
+
+def _row_id(row: Mapping[str, Any]) -> Optional[int]:
+    value = row.get(ROW_ID)
+    if value is None or value != value:  # Missing or NaN
+        return None
+    return int(value)
+
+
+def diff_rows(
+    old_rows: Sequence[Mapping[str, Any]], new_rows: Sequence[Mapping[str, Any]]
+) -> CatalogDelta:
+    """Diff two versions of the editor table by row ID"""
+    old_by_id = {_row_id(row): row for row in old_rows}
+    seen = set()
+    inserts = []
+    updates = {}
+    for row in new_rows:
+        row_id = _row_id(row)
+        if row_id is None or row_id not in old_by_id or row_id in seen:
+            inserts.append({k: v for k, v in row.items() if k != ROW_ID})
+            continue
+        seen.add(row_id)
+        old = old_by_id[row_id]
+        changed = {
+            name: value
+            for name, value in row.items()
+            if name != ROW_ID and old.get(name) != value
+        }
+        if changed:
+            updates[row_id] = changed
+    deletes = [row_id for row_id in old_by_id if row_id not in seen]
+    return CatalogDelta(inserts, updates, deletes)
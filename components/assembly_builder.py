@@ -1,21 +1,58 @@
 import streamlit as st
 
-from catalog import WoodTypeCatalog
+from cache import LRUCache, project_digest
+from catalog import (  # noqa: F401 - format_dimensions is re-exported, it used to live here
+    WoodTypeCatalog,
+    format_dimensions,
+)
 from components.assembly_table import render_assembly_table
+from core.columnar import assembly_breakdown
 from models.wood import Assembly, Project
 
+PAGE_SIZES = [10, 25, 50, 100]
 
-def format_dimensions(width: float, height: float) -> str:
-    """Format dimensions with 1 decimal place"""
-    return f"{width:.1f}x{height:.1f}mm"
+# Per-assembly totals, keyed on the content of the project and catalog
+_assembly_summaries = LRUCache(max_entries=16)
 
 
 def calculate_piece_price(length: float, price_per_meter: float) -> float:
     return length * price_per_meter
 
 
+def get_assembly_summaries(project: Project, catalog: WoodTypeCatalog) -> list[dict]:
+    """Pieces, length and price of every assembly, recomputed only when the
+    project or the catalog changed"""
+
+    def compute():
+        breakdown = assembly_breakdown(project, catalog)
+        return [
+            {
+                "Assembly": name,
+                "Units": int(units),
+                "Pieces": int(pieces),
+                "Total Length (m)": round(float(length), 2),
+                "Total Price": f"₪{price:.2f}",
+            }
+            for name, units, pieces, length, price in zip(
+                breakdown["Assembly"],
+                breakdown["Units"],
+                breakdown["Total Pieces"],
+                breakdown["Total Length (m)"],
+                breakdown["Total Price"],
+            )
+        ]
+
+    return _assembly_summaries.get_or_compute(
+        (project_digest(project), catalog.digest()), compute
+    )
+
+
 def render_assembly_builder(catalog: WoodTypeCatalog, project: Project):
-    """Render the assembly builder tab"""
+    """Render the assembly builder tab.
+
+    Assemblies are listed a page at a time as summaries; only the ones
+    picked for editing get an editor, so reruns stay fast on large projects.
+    """
     st.header("Assembly Builder")
 
     # Add new assembly section
@@ -30,27 +67,73 @@ def render_assembly_builder(catalog: WoodTypeCatalog, project: Project):
                     and project.name != "Untitled Project"
                 ):
                     st.session_state.project_manager.save_project(project)
+                # Show the new assembly, open for editing
+                st.session_state.assembly_search = ""
+                st.session_state.assembly_page = -1  # Last page
+                st.session_state.open_assemblies = [len(project.assemblies) - 1]
                 st.success(f"Added new assembly: {new_assembly_name}")
             else:
                 st.error("Please enter an assembly name")
 
-    # Display existing assemblies in two columns
-    if project.assemblies:
-        # Split assemblies into two columns
-        col1, col2 = st.columns(2)
-        assemblies_left = project.assemblies[::2]  # Even indices
-        assemblies_right = project.assemblies[1::2]  # Odd indices
-
-        # Render left column
-        with col1:
-            for i, assembly in enumerate(assemblies_left):
-                if render_assembly_table(assembly, catalog, i * 2, project):
-                    break  # Assembly was deleted, break to allow rerender
-
-        # Render right column
-        with col2:
-            for i, assembly in enumerate(assemblies_right):
-                if render_assembly_table(assembly, catalog, i * 2 + 1, project):
-                    break  # Assembly was deleted, break to allow rerender
-    else:
+    if not project.assemblies:
         st.info("No assemblies yet. Add one using the form above.")
+        return
+
+    # Search and pagination
+    search_col, size_col, page_col = st.columns([0.6, 0.2, 0.2])
+    with search_col:
+        search = st.text_input("🔍 Search assemblies", key="assembly_search")
+    with size_col:
+        page_size = st.selectbox("Per page", PAGE_SIZES, key="assembly_page_size")
+    matches = [
+        i
+        for i, assembly in enumerate(project.assemblies)
+        if search.lower() in assembly.name.lower()
+    ]
+    pages = max(1, -(-len(matches) // page_size))
+    page = st.session_state.get("assembly_page", 1)
+    st.session_state.assembly_page = pages if page == -1 else min(max(page, 1), pages)
+    with page_col:
+        page = st.number_input(
+            "Page", min_value=1, max_value=pages, key="assembly_page"
+        )
+    visible = matches[(page - 1) * page_size : page * page_size]
+
+    if not visible:
+        st.info("No assemblies match the search.")
+        return
+
+    summaries = get_assembly_summaries(project, catalog)
+    st.caption(f"{len(matches)} of {len(project.assemblies)} assemblies")
+    st.dataframe(
+        [summaries[i] for i in visible], hide_index=True, use_container_width=True
+    )
+
+    # Editors, for the picked assemblies only
+    deleted = st.session_state.pop("assembly_deleted", False)
+    if deleted or "open_assemblies" not in st.session_state:
+        st.session_state.open_assemblies = visible[:1]
+    else:
+        st.session_state.open_assemblies = [
+            i for i in st.session_state.open_assemblies if i in visible
+        ]
+    open_assemblies = st.multiselect(
+        "Edit assemblies",
+        options=visible,
+        format_func=lambda i: project.assemblies[i].name,
+        key="open_assemblies",
+    )
+
+    # Display the open assemblies in two columns
+    columns = st.columns(2)
+    for n, index in enumerate(open_assemblies):
+        with columns[n % 2]:
+            # Keyed by position in the project, so editors keep their state
+            # across pages
+            if render_assembly_table(
+                project.assemblies[index], catalog, index, project
+            ):
+                # Assembly was deleted and the positions after it shifted,
+                # so the open editors are reset on the rerun
+                st.session_state.assembly_deleted = True
+                st.rerun()
@@ -1,15 +1,9 @@
-import pandas as pd
 import streamlit as st
 
 from catalog import WoodTypeCatalog
 from models.wood import Assembly, AssemblyPiece
 
 
-def format_dimensions(width: float, height: float) -> str:
-    """Format dimensions with 1 decimal place"""
-    return f"{width:.1f}x{height:.1f}mm"
-
-
 def render_assembly_table(
     assembly: Assembly, catalog: WoodTypeCatalog, index: int, project=None
 ):
@@ -20,10 +14,7 @@ def render_assembly_table(
 
     with st.expander(f"📦 {assembly.name}", expanded=True):
         # Convert assembly pieces to table format
-        wood_type_options = [
-            f"{format_dimensions(wt.width, wt.height)} - {wt.description}"
-            for wt in catalog.get_all_wood_types()
-        ]
+        wood_type_options = catalog.wood_type_options()
         units = st.number_input(
             "Number of units",
             min_value=1,
@@ -34,11 +25,11 @@ def render_assembly_table(
         # Initialize pieces_data with at least one empty row if no pieces exist
         pieces_data = []
         for piece in assembly.pieces:
-            wood_type = catalog.get_wood_type(piece.wood_type_index)
-            if wood_type:
+            label = catalog.get_label(piece.wood_type_index)
+            if label is not None:
                 pieces_data.append(
                     {
-                        "Wood Type": f"{format_dimensions(wood_type.width, wood_type.height)} - {wood_type.description}",
+                        "Wood Type": label,
                         "Length (cm)": piece.length * 100,  # Convert to cm for display
                         "Quantity": piece.quantity,
                         "_wood_type_index": piece.wood_type_index,
@@ -56,6 +47,8 @@ def render_assembly_table(
             )
 
         # Convert to DataFrame
+        import pandas as pd
+
         df = pd.DataFrame(pieces_data)
 
         # Create the editable table
@@ -144,16 +137,7 @@ def handle_table_edit(edited_data: list, assembly: Assembly, catalog: WoodTypeCa
             continue
 
         # Find the wood type index from the selection
-        wood_type_str = str(wood_type)
-        wood_types = catalog.get_all_wood_types()
-
-        # Try to find the matching wood type
-        wood_type_index = None
-        for i, wt in enumerate(wood_types):
-            formatted = f"{format_dimensions(wt.width, wt.height)} - {wt.description}"
-            if formatted == wood_type_str:
-                wood_type_index = i
-                break
+        wood_type_index = catalog.index_of_label(str(wood_type))
 
         # If no match found, keep the existing wood type index
         if wood_type_index is None:
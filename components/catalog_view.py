@@ -1,23 +1,29 @@
 import streamlit as st
 
-from catalog import WoodTypeCatalog
+from catalog import SharedCatalog, WoodTypeCatalog
+from catalog_diff import ROW_ID, CatalogDelta, diff_rows
+from storage.versioning import ConflictError
 
 
-def render_catalog_management(catalog: WoodTypeCatalog):
+def render_catalog_management(shared_catalog: SharedCatalog):
     """Render the wood catalog management tab"""
     st.header("Wood Catalog Management")
+    catalog = shared_catalog.current
 
     # Initialize the editor key in session state if not present
     if "editor_key" not in st.session_state:
         st.session_state.editor_key = 0
+    if "catalog_conflict" in st.session_state:
+        st.warning(st.session_state.pop("catalog_conflict"))
 
-    # Get current catalog data
-    catalog_data = catalog.to_editable_table()
+    # Get current catalog data, with the stable row IDs in a hidden column
+    catalog_data = catalog.to_editable_table(include_ids=True)
+    editor_key = f"catalog_editor_{st.session_state.editor_key}"
 
     # Create the editable table
     edited_data = st.data_editor(
         catalog_data,
-        key=f"catalog_editor_{st.session_state.editor_key}",
+        key=editor_key,
         num_rows="dynamic",
         use_container_width=True,
         column_config={
@@ -36,45 +42,51 @@ def render_catalog_management(catalog: WoodTypeCatalog):
             "Description": st.column_config.TextColumn(
                 help="Description of the wood type"
             ),
+            ROW_ID: None,
         },
         hide_index=True,
     )
 
     # Handle any changes to the data
     if edited_data is not None:
-        handle_table_edit(edited_data, catalog)
+        handle_table_edit(
+            edited_data,
+            shared_catalog,
+            catalog,
+            catalog_data,
+            st.session_state.get(editor_key),
+        )
 
 
-def handle_table_edit(edited_data, catalog: WoodTypeCatalog):
-    """Handle edits to the catalog table"""
-    if len(edited_data) != len(catalog):
-        # Handle row deletion or addition
-        current_count = len(catalog)
-        edited_count = len(edited_data)
-        if edited_count < current_count:
-            # Find deleted rows
-            deleted_indices = []
-            for i in range(current_count):
-                if (
-                    i >= edited_count
-                    or edited_data[i] != catalog.to_editable_table()[i]
-                ):
-                    deleted_indices.append(i)
-            catalog.delete_rows(deleted_indices)
-            st.session_state.editor_key += 1
-            st.rerun()
-        elif edited_count > current_count:
-            # Handle row addition
-            catalog.add_empty_row()
-            st.session_state.editor_key += 1
-            st.rerun()
+def handle_table_edit(
+    edited_data,
+    shared_catalog: SharedCatalog,
+    catalog: WoodTypeCatalog,
+    catalog_data=None,
+    editor_state=None,
+):
+    """Handle edits to the catalog table.
+
+    ``catalog`` is the catalog the table shows; the edits are applied by
+    row ID to the shared catalog, which may have changed since.
+
+    The editor's change state lists only what changed, so it is preferred;
+    without it the edited rows are diffed against the original rows by ID.
+    """
+    if editor_state is not None:
+        delta = CatalogDelta.from_editor_state(editor_state, catalog.row_ids)
     else:
-        # Handle row edits
-        edited_rows = {}
-        for i, row in enumerate(edited_data):
-            if row != catalog.to_editable_table()[i]:
-                edited_rows[i] = row
-        if edited_rows:
-            catalog.update_from_editor(edited_rows)
-            st.session_state.editor_key += 1
-            st.rerun()
+        if catalog_data is None:
+            catalog_data = catalog.to_editable_table(include_ids=True)
+        delta = diff_rows(catalog_data, edited_data)
+
+    if delta:
+        try:
+            catalog = shared_catalog.edit(lambda copy: copy.apply_delta(delta))
+        except ConflictError as e:
+            st.session_state.catalog_conflict = str(e)  # Shown after the rerun
+        else:
+            # This session's own edit, not one to announce
+            st.session_state.catalog_version = catalog.version
+        st.session_state.editor_key += 1
+        st.rerun()
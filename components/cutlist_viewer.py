@@ -1,126 +1,241 @@
-import io
+from typing import NamedTuple, Optional, Tuple
 
-import pandas as pd
-import plotly.express as px
 import streamlit as st
 
+from cache import LRUCache, project_digest
 from catalog import WoodTypeCatalog
-from models.wood import CutList, Project, WoodType
-
-
-def calculate_cut_list(project: Project, catalog: WoodTypeCatalog) -> list[CutList]:
-    """Calculate the cut list from all assemblies in the project"""
-    # Group pieces by wood type
-    wood_type_pieces = {}
-
-    for assembly in project.assemblies:
-        for piece in assembly.pieces:
-            wood_type = catalog.get_wood_type(piece.wood_type_index)
-            if wood_type:
-                if piece.wood_type_index not in wood_type_pieces:
-                    wood_type_pieces[piece.wood_type_index] = {
-                        "wood_type": wood_type,
-                        "total_length": 0,
-                        "total_price": 0,
+from core.columnar import aggregate_cut_list, detailed_cut_list_columns, flatten_project
+from core.cutlist import (  # noqa: F401 - re-exported, they used to live here
+    calculate_cut_list,
+    get_detailed_cut_list,
+)
+from core.export import (
+    export_detailed_csv,
+    export_detailed_parquet,
+    export_summary_csv,
+    format_stock_counts,
+    has_pyarrow,
+)
+from inventory import RemnantInventory
+from models.wood import CutList, CuttingPlan, Project
+from optimizer.incremental import IncrementalOptimizer
+from optimizer.parallel import merge_cutting_plans
+from tracing import span, traced
+
+
+def render_cutting_plan(plan: CuttingPlan):
+    """Render the boards to buy and how to cut them for one wood type"""
+    if plan.boards:
+        import pandas as pd
+
+        st.write("Boards to Buy:", format_stock_counts(plan))
+        st.caption(
+            f"Stock: {plan.total_stock_length:.1f}m (₪{plan.total_price:.2f}) · "
+            f"Waste: {plan.waste_length:.2f}m ({1 - plan.efficiency:.1%})"
+            + (f" · Within {plan.gap:.1%} of optimal" if plan.gap is not None else "")
+            + (
+                f" · Remnants used: {plan.remnant_length:.1f}m"
+                if plan.remnant_length
+                else ""
+            )
+        )
+        st.dataframe(
+            pd.DataFrame(
+                [
+                    {
+                        "Board": f"{board.stock_length}m"
+                        + (" (remnant)" if board.remnant_id is not None else ""),
+                        "Cuts (m)": ", ".join(f"{p.length}" for p in board.pieces),
+                        "Offcut (m)": round(board.offcut, 3),
                     }
-
-                # Add piece length and price to totals, multiplied by assembly units
-                total_length = piece.length * piece.quantity * assembly.units
-                wood_type_pieces[piece.wood_type_index]["total_length"] += total_length
-                wood_type_pieces[piece.wood_type_index]["total_price"] += (
-                    total_length * wood_type.price_per_meter
-                )
-
-    # Convert to list of CutList objects
-    return [
-        CutList(
-            wood_type=info["wood_type"],
-            total_length=info["total_length"],
-            total_price=info["total_price"],
+                    for board in plan.boards
+                ]
+            ),
+            hide_index=True,
+            use_container_width=True,
+        )
+    if plan.unplaced:
+        st.warning(
+            f"{len(plan.unplaced)} piece(s) are longer than any available length"
         )
-        for info in wood_type_pieces.values()
-    ]
 
 
-def get_detailed_cut_list(project: Project, catalog: WoodTypeCatalog) -> list[dict]:
-    """Get a detailed cut list with assembly information"""
-    detailed_list = []
+class CutListView(NamedTuple):
+    """Everything the cut list tab derives from a project and the catalog"""
 
-    for assembly in project.assemblies:
-        for piece in assembly.pieces:
-            wood_type = catalog.get_wood_type(piece.wood_type_index)
-            if wood_type:
-                # Calculate quantities accounting for assembly units
-                total_quantity = piece.quantity * assembly.units
-                total_length = piece.length * total_quantity
-                total_price = total_length * wood_type.price_per_meter
+    key: Tuple[str, str]  # Digests of the project and catalog
+    cut_list: list[CutList]
+    summary_csv: str
+    detailed_csv: str
+    detailed: object  # Detailed cut list columns, for exports on request
+    fig_length: object
+    fig_cost: object
 
-                detailed_list.append(
-                    {
-                        "Assembly": f"{assembly.name} (x{assembly.units})",
-                        "Wood Type": f"{wood_type.width}x{wood_type.height}mm",
-                        "Description": wood_type.description,
-                        "Length (m)": piece.length,
-                        "Quantity per Unit": piece.quantity,
-                        "Total Quantity": total_quantity,
-                        "Total Length (m)": total_length,
-                        "Price/m": wood_type.price_per_meter,
-                        "Total Price": total_price,
-                    }
-                )
 
-    return detailed_list
+# Shared by all sessions, keyed on the content of the project and catalog
+_cut_list_views = LRUCache(max_entries=16)
+_parquet_exports = LRUCache(max_entries=4)  # Only built when asked for
+
 
+@traced("cut_list.charts")
+def build_distribution_charts(cut_list: list[CutList]):
+    """Build the length and cost distribution pie charts"""
+    # Plotting libraries are only loaded once there is something to plot
+    import pandas as pd
+    import plotly.express as px
 
-def export_summary_csv(cut_list: list[CutList]) -> str:
-    """Create a CSV string for the summary cut list"""
-    data = []
+    # Prepare data for the pie chart
+    chart_data = []
     for item in cut_list:
-        data.append(
+        wood_name = f"{item.wood_type.width}x{item.wood_type.height}mm"
+        if item.wood_type.description:
+            wood_name += f" - {item.wood_type.description}"
+
+        chart_data.append(
             {
-                "Dimensions": f"{item.wood_type.width}x{item.wood_type.height}mm",
-                "Description": item.wood_type.description,
+                "Wood Type": wood_name,
                 "Total Length (m)": item.total_length,
-                "Price/m": item.wood_type.price_per_meter,
-                "Total Price": item.total_price,
+                "Total Price (₪)": item.total_price,
             }
         )
 
-    df = pd.DataFrame(data)
-    buffer = io.StringIO()
-    df.to_csv(buffer, index=False)
-    return buffer.getvalue()
-
-
-def export_detailed_csv(detailed_list: list[dict]) -> str:
-    """Create a CSV string for the detailed cut list"""
-    df = pd.DataFrame(detailed_list)
-    buffer = io.StringIO()
-    df.to_csv(buffer, index=False)
-    return buffer.getvalue()
-
+    df = pd.DataFrame(chart_data)
 
-def render_cut_list(project: Project, catalog: WoodTypeCatalog):
-    """Render the cut list summary tab"""
+    fig_length = px.pie(
+        df,
+        values="Total Length (m)",
+        names="Wood Type",
+        title="Wood Distribution by Total Length",
+        hole=0.4,  # Makes it a donut chart
+        color_discrete_sequence=px.colors.qualitative.Set3,
+    )
+    fig_length.update_traces(
+        textposition="inside",
+        textinfo="percent+label",
+        hovertemplate="<b>%{label}</b><br>Length: %{value:.1f}m<br>Percentage: %{percent}<extra></extra>",
+    )
+
+    fig_cost = px.pie(
+        df,
+        values="Total Price (₪)",
+        names="Wood Type",
+        title="Wood Distribution by Cost",
+        hole=0.4,  # Makes it a donut chart
+        color_discrete_sequence=px.colors.qualitative.Set3,
+    )
+    fig_cost.update_traces(
+        textposition="inside",
+        textinfo="percent+label",
+        hovertemplate="<b>%{label}</b><br>Cost: ₪%{value:.2f}<br>Percentage: %{percent}<extra></extra>",
+    )
+    return fig_length, fig_cost
+
+
+def build_cut_list_view(
+    project: Project, catalog: WoodTypeCatalog, key: Tuple[str, str] = ("", "")
+) -> CutListView:
+    """Compute the cut list, its CSV exports and charts"""
+    columns = flatten_project(project)
+    cut_list = aggregate_cut_list(columns, catalog)
+    if not cut_list:
+        return CutListView(key, cut_list, "", "", None, None, None)
+    fig_length, fig_cost = build_distribution_charts(cut_list)
+    detailed = detailed_cut_list_columns(columns, catalog)
+    return CutListView(
+        key=key,
+        cut_list=cut_list,
+        summary_csv=export_summary_csv(cut_list),
+        detailed_csv=export_detailed_csv(detailed),
+        detailed=detailed,
+        fig_length=fig_length,
+        fig_cost=fig_cost,
+    )
+
+
+def get_cut_list_view(project: Project, catalog: WoodTypeCatalog) -> CutListView:
+    """Get the cut list view, recomputing it only when the project or the
+    catalog changed"""
+    key = (project_digest(project), catalog.digest())
+    return _cut_list_views.get_or_compute(
+        key, lambda: build_cut_list_view(project, catalog, key)
+    )
+
+
+def get_detailed_parquet(view: CutListView) -> bytes:
+    """The Parquet export of a view, built on first request"""
+    return _parquet_exports.get_or_compute(
+        view.key, lambda: export_detailed_parquet(view.detailed)
+    )
+
+
+def render_cut_list(
+    project: Project,
+    catalog: WoodTypeCatalog,
+    inventory: Optional[RemnantInventory] = None,
+):
+    """Render the cut list summary tab; boards are planned from the remnants
+    in ``inventory`` first when the user asks for it"""
     st.header("Cut List Summary")
 
     if not project.assemblies:
         st.info("No assemblies added yet. Add some assemblies to see the cut list.")
         return
 
-    cut_list = calculate_cut_list(project, catalog)
+    view = get_cut_list_view(project, catalog)
 
-    if not cut_list:
+    if not view.cut_list:
         st.info("No wood pieces added to assemblies yet.")
         return
 
+    kerf_col, solver_col, remnant_col = st.columns(3)
+    with kerf_col:
+        kerf_mm = st.number_input(
+            "Saw kerf (mm)",
+            min_value=0.0,
+            value=3.0,
+            step=0.5,
+            help="Width of the saw blade, lost at every cut",
+        )
+    with solver_col:
+        near_optimal = st.toggle(
+            "Near-optimal boards",
+            help="Spend up to a few seconds searching cutting patterns "
+            "for less waste",
+        )
+    with remnant_col:
+        use_remnants = st.toggle(
+            "Use remnants first",
+            value=True,
+            disabled=not inventory,
+            help="Cut pieces from the remnant inventory before buying new stock",
+        )
+    # Only the wood types whose pieces changed since the last rerun are solved
+    if "cut_list_optimizer" not in st.session_state:
+        st.session_state.cut_list_optimizer = IncrementalOptimizer()
+    with span("cut_list.optimize"):
+        cutting_plans = st.session_state.cut_list_optimizer.optimize(
+            project,
+            catalog,
+            kerf=kerf_mm / 1000,
+            method="patterns" if near_optimal else "heuristic",
+            inventory=inventory if use_remnants else None,
+        )
+    cut_list = merge_cutting_plans(view.cut_list, cutting_plans)
+
+    if inventory is not None and st.button(
+        "✂️ Record Cuts in Remnant Inventory",
+        help="Once the boards are cut: remove the remnants used from the "
+        "inventory and add the offcuts left over",
+    ):
+        used, added = inventory.record_cuts(cutting_plans.values(), catalog)
+        st.success(f"Used {used} remnant(s), added {added} offcut(s)")
+
     # Export buttons
     col1, col2 = st.columns(2)
     with col1:
-        summary_csv = export_summary_csv(cut_list)
         st.download_button(
             "📥 Export Summary",
-            summary_csv,
+            view.summary_csv,
             file_name=f"{project.name}_summary.csv",
             mime="text/csv",
             help="Download a summary of total wood needed by type",
@@ -128,33 +243,26 @@ def render_cut_list(project: Project, catalog: WoodTypeCatalog):
         )
 
     with col2:
-        detailed_list = get_detailed_cut_list(project, catalog)
-        detailed_csv = export_detailed_csv(detailed_list)
         st.download_button(
             "📥 Export Detailed Cut List",
-            detailed_csv,
+            view.detailed_csv,
             file_name=f"{project.name}_detailed.csv",
             mime="text/csv",
             help="Download a detailed cut list with assembly information",
             use_container_width=True,
         )
-
-    # Prepare data for the pie chart
-    chart_data = []
-    for item in cut_list:
-        wood_name = f"{item.wood_type.width}x{item.wood_type.height}mm"
-        if item.wood_type.description:
-            wood_name += f" - {item.wood_type.description}"
-
-        chart_data.append(
-            {
-                "Wood Type": wood_name,
-                "Total Length (m)": item.total_length,
-                "Total Price (₪)": item.total_price,
-            }
-        )
-
-    df = pd.DataFrame(chart_data)
+        # Parquet is slower to write, so only when asked for
+        if has_pyarrow() and st.toggle(
+            "Parquet export", help="Prepare the detailed cut list in Parquet format"
+        ):
+            st.download_button(
+                "📥 Export Detailed (Parquet)",
+                get_detailed_parquet(view),
+                file_name=f"{project.name}_detailed.parquet",
+                mime="application/vnd.apache.parquet",
+                help="Download the detailed cut list in Parquet format",
+                use_container_width=True,
+            )
 
     # Display the cut list
     st.markdown("---")
@@ -182,6 +290,8 @@ def render_cut_list(project: Project, catalog: WoodTypeCatalog):
                     "Available Lengths:",
                     ", ".join(f"{l}m" for l in item.wood_type.available_lengths),
                 )
+            if item.cutting_plan:
+                render_cutting_plan(item.cutting_plan)
 
     # Display total price
     st.markdown("---")
@@ -193,33 +303,7 @@ def render_cut_list(project: Project, catalog: WoodTypeCatalog):
     chart_tab1, chart_tab2 = st.tabs(["Distribution by Length", "Distribution by Cost"])
 
     with chart_tab1:
-        fig_length = px.pie(
-            df,
-            values="Total Length (m)",
-            names="Wood Type",
-            title="Wood Distribution by Total Length",
-            hole=0.4,  # Makes it a donut chart
-            color_discrete_sequence=px.colors.qualitative.Set3,
-        )
-        fig_length.update_traces(
-            textposition="inside",
-            textinfo="percent+label",
-            hovertemplate="<b>%{label}</b><br>Length: %{value:.1f}m<br>Percentage: %{percent}<extra></extra>",
-        )
-        st.plotly_chart(fig_length, use_container_width=True)
+        st.plotly_chart(view.fig_length, use_container_width=True)
 
     with chart_tab2:
-        fig_cost = px.pie(
-            df,
-            values="Total Price (₪)",
-            names="Wood Type",
-            title="Wood Distribution by Cost",
-            hole=0.4,  # Makes it a donut chart
-            color_discrete_sequence=px.colors.qualitative.Set3,
-        )
-        fig_cost.update_traces(
-            textposition="inside",
-            textinfo="percent+label",
-            hovertemplate="<b>%{label}</b><br>Cost: ₪%{value:.2f}<br>Percentage: %{percent}<extra></extra>",
-        )
-        st.plotly_chart(fig_cost, use_container_width=True)
+        st.plotly_chart(view.fig_cost, use_container_width=True)
@@ -1,6 +1,7 @@
 import streamlit as st
 
 from models.wood import Project
+from storage.versioning import ConflictError
 
 
 @st.dialog("Create New Project")
@@ -9,12 +10,24 @@ def new_project_dialog():
     new_project_name = st.text_input("Project Name")
     new_project_description = st.text_area("Description (optional)")
     if st.button("Create", type="primary", use_container_width=True):
-        if new_project_name:
+        project_manager = st.session_state.project_manager
+        if not new_project_name:
+            st.error("Please enter a project name")
+        elif new_project_name in project_manager.get_available_projects():
+            st.error(f"A project named '{new_project_name}' already exists")
+        else:
             new_project = Project(
                 name=new_project_name, description=new_project_description
             )
+            try:
+                # Waits, as another session may create the same name meanwhile
+                project_manager.save_project(new_project, wait=True)
+            except ConflictError as e:  # Without a background writer
+                st.error(str(e))
+                return
+            error = project_manager.save_error(new_project_name)
+            if error is not None:
+                st.error(str(error))
+                return
             st.session_state.current_project = new_project
-            st.session_state.project_manager.save_project(new_project)
             st.rerun()
-        else:
-            st.error("Please enter a project name")
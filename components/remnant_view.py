@@ -0,0 +1,71 @@
+import streamlit as st
+
+from catalog import WoodTypeCatalog
+from inventory import RemnantInventory
+
+
+def parse_lengths(text: str) -> list[float]:
+    """Parse comma-separated lengths in metres, skipping invalid entries"""
+    lengths = []
+    for part in text.split(","):
+        try:
+            length = float(part.strip())
+        except ValueError:
+            continue
+        if length > 0:
+            lengths.append(length)
+    return lengths
+
+
+def render_remnant_inventory(inventory: RemnantInventory, catalog: WoodTypeCatalog):
+    """Render the remnant inventory: remnants per wood type and a form to
+    add more"""
+    st.subheader("Remnant Inventory")
+    st.caption(
+        "Leftover pieces are used before new stock when planning boards. "
+        "Record the cuts in the cut list tab to update them."
+    )
+
+    if len(catalog):
+        with st.form("add_remnants", clear_on_submit=True):
+            col1, col2 = st.columns([2, 1])
+            with col1:
+                wood_type_index = st.selectbox(
+                    "Wood Type",
+                    options=range(len(catalog)),
+                    format_func=catalog.get_label,
+                )
+            with col2:
+                lengths = st.text_input(
+                    "Lengths (m)", help="Comma-separated, e.g. 1.2, 0.85, 0.6"
+                )
+            if st.form_submit_button("➕ Add Remnants"):
+                added = inventory.add(
+                    catalog.row_ids[wood_type_index], parse_lengths(lengths)
+                )
+                if added:
+                    st.success(f"Added {len(added)} remnant(s)")
+                else:
+                    st.warning("Enter at least one length")
+
+    # After the form, so that remnants added above are listed
+    rows = []
+    for row_id in inventory.row_ids():
+        remnants = inventory.remnants(row_id)
+        index = catalog.index_of_row(row_id)
+        rows.append(
+            {
+                "Wood Type": (
+                    catalog.get_label(index)
+                    if index is not None
+                    else f"#{row_id} (deleted)"
+                ),
+                "Remnants": len(remnants),
+                "Total Length (m)": round(sum(r.length for r in remnants), 2),
+                "Longest (m)": remnants[-1].length,
+            }
+        )
+    if rows:
+        st.dataframe(rows, hide_index=True, use_container_width=True)
+    else:
+        st.info("No remnants in stock yet.")
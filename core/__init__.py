@@ -0,0 +1,30 @@
+"""Streamlit-free computations: cut lists, columnar aggregation and exports.
+
+The functions below are imported from their submodule on first use, so
+``import core`` itself is nearly free, and NumPy, pandas, plotly and
+pyarrow are only loaded by the code paths that need them.
+"""
+
+import importlib
+
+_EXPORTS = {
+    "calculate_cut_list": "core.cutlist",
+    "get_detailed_cut_list": "core.cutlist",
+    "aggregate_cut_list": "core.columnar",
+    "detailed_cut_list_columns": "core.columnar",
+    "assembly_breakdown": "core.columnar",
+    "export_summary_csv": "core.export",
+    "export_detailed_csv": "core.export",
+    "export_detailed_parquet": "core.export",
+    "stream_summary_csv": "core.export",
+    "stream_detailed_csv": "core.export",
+    "stream_purchase_list_csv": "core.export",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        return getattr(importlib.import_module(_EXPORTS[name]), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,199 @@
+"""Columnar cut list aggregation.
+
+Flattens a project once into NumPy columns (one row per assembly piece) and
+computes the cut list totals, the detailed cut list and per-assembly
+breakdowns with grouped reductions instead of nested Python loops.
+"""
+
+from typing import Dict, List, NamedTuple
+
+import numpy as np
+
+from models.wood import CutList, Project
+from tracing import traced
+
+
+class ProjectColumns(NamedTuple):
+    """A project flattened to one row per assembly piece"""
+
+    wood_type_index: np.ndarray  # int64
+    length: np.ndarray  # float64, metres
+    quantity: np.ndarray  # int64
+    units: np.ndarray  # int64, units of the piece's assembly
+    assembly_id: np.ndarray  # int64, position of the assembly in the project
+    assembly_names: List[str]
+    assembly_units: np.ndarray  # int64, per assembly
+
+    def __len__(self):
+        return len(self.length)
+
+
+class CatalogColumns(NamedTuple):
+    """The catalog fields needed for aggregation, one row per wood type"""
+
+    price_per_meter: np.ndarray
+    labels: np.ndarray  # object, e.g. "50.0x22.0mm"
+    descriptions: np.ndarray  # object
+
+
+@traced("cut_list.flatten")
+def flatten_project(project: Project) -> ProjectColumns:
+    """Flatten a project into columns"""
+    counts = [len(assembly.pieces) for assembly in project.assemblies]
+    pieces = [piece for assembly in project.assemblies for piece in assembly.pieces]
+    assembly_units = np.fromiter(
+        (assembly.units for assembly in project.assemblies),
+        dtype=np.int64,
+        count=len(counts),
+    )
+    assembly_id = np.repeat(np.arange(len(counts), dtype=np.int64), counts)
+    return ProjectColumns(
+        wood_type_index=np.fromiter(
+            (p.wood_type_index for p in pieces), dtype=np.int64, count=len(pieces)
+        ),
+        length=np.fromiter((p.length for p in pieces), dtype=float, count=len(pieces)),
+        quantity=np.fromiter(
+            (p.quantity for p in pieces), dtype=np.int64, count=len(pieces)
+        ),
+        units=assembly_units[assembly_id],
+        assembly_id=assembly_id,
+        assembly_names=[assembly.name for assembly in project.assemblies],
+        assembly_units=assembly_units,
+    )
+
+
+def catalog_columns(catalog) -> CatalogColumns:
+    """Extract the catalog fields used by the aggregations"""
+    wood_types = catalog.get_all_wood_types()
+    return CatalogColumns(
+        price_per_meter=np.fromiter(
+            (wt.price_per_meter for wt in wood_types),
+            dtype=float,
+            count=len(wood_types),
+        ),
+        labels=np.array(
+            [f"{wt.width}x{wt.height}mm" for wt in wood_types] or [""], dtype=object
+        ),
+        descriptions=np.array(
+            [wt.description for wt in wood_types] or [""], dtype=object
+        ),
+    )
+
+
+def as_columns(project) -> ProjectColumns:
+    """Accept a ``Project`` or anything that can flatten itself to columns"""
+    if isinstance(project, ProjectColumns):
+        return project
+    if hasattr(project, "to_columns"):
+        return project.to_columns()
+    return flatten_project(project)
+
+
+def _valid(columns: ProjectColumns, catalog) -> np.ndarray:
+    """Mask of the rows that refer to an existing wood type"""
+    index = columns.wood_type_index
+    return (index >= 0) & (index < len(catalog))
+
+
+@traced("cut_list.aggregate")
+def aggregate_cut_list(project, catalog) -> List[CutList]:
+    """Columnar equivalent of ``calculate_cut_list``"""
+    columns = as_columns(project)
+    valid = _valid(columns, catalog)
+    index = columns.wood_type_index[valid]
+    if not len(index):
+        return []
+
+    total_length = (
+        columns.length[valid] * columns.quantity[valid] * columns.units[valid]
+    )
+    length_by_type = np.bincount(index, weights=total_length, minlength=len(catalog))
+    prices = catalog_columns(catalog).price_per_meter
+
+    # Keep the order in which the wood types first appear, like the loop does
+    used, first = np.unique(index, return_index=True)
+    used = used[np.argsort(first)]
+
+    wood_types = catalog.get_all_wood_types()
+    return [
+        CutList(
+            wood_type=wood_types[i],
+            total_length=float(length_by_type[i]),
+            total_price=float(length_by_type[i] * prices[i]),
+            wood_type_index=int(i),
+        )
+        for i in used
+    ]
+
+
+@traced("cut_list.detailed_columns")
+def detailed_cut_list_columns(project, catalog) -> Dict[str, np.ndarray]:
+    """Columnar equivalent of ``get_detailed_cut_list``.
+
+    Returns:
+        The detailed cut list as a mapping of column name to array, which
+        ``pandas.DataFrame`` accepts directly
+    """
+    columns = as_columns(project)
+    valid = _valid(columns, catalog)
+    index = columns.wood_type_index[valid]
+    assembly_id = columns.assembly_id[valid]
+    catalog_data = catalog_columns(catalog)
+
+    assembly_labels = np.array(
+        [
+            f"{name} (x{units})"
+            for name, units in zip(columns.assembly_names, columns.assembly_units)
+        ]
+        or [""],
+        dtype=object,
+    )
+    total_quantity = columns.quantity[valid] * columns.units[valid]
+    total_length = columns.length[valid] * total_quantity
+    price = catalog_data.price_per_meter[index]
+    return {
+        "Assembly": assembly_labels[assembly_id],
+        "Wood Type": catalog_data.labels[index],
+        "Description": catalog_data.descriptions[index],
+        "Length (m)": columns.length[valid],
+        "Quantity per Unit": columns.quantity[valid],
+        "Total Quantity": total_quantity,
+        "Total Length (m)": total_length,
+        "Price/m": price,
+        "Total Price": total_length * price,
+    }
+
+
+def get_detailed_cut_list_columnar(project, catalog) -> list[dict]:
+    """The detailed cut list as rows, matching ``get_detailed_cut_list``"""
+    detailed = detailed_cut_list_columns(project, catalog)
+    names = list(detailed)
+    return [
+        dict(zip(names, row))
+        for row in zip(*(detailed[name].tolist() for name in names))
+    ]
+
+
+@traced("cut_list.assembly_breakdown")
+def assembly_breakdown(project, catalog) -> Dict[str, np.ndarray]:
+    """Per-assembly totals: pieces, length and price including units"""
+    columns = as_columns(project)
+    valid = _valid(columns, catalog)
+    assembly_id = columns.assembly_id[valid]
+    n = len(columns.assembly_names)
+
+    pieces = columns.quantity[valid] * columns.units[valid]
+    length = columns.length[valid] * pieces
+    price = (
+        length
+        * catalog_columns(catalog).price_per_meter[columns.wood_type_index[valid]]
+    )
+    return {
+        "Assembly": np.array(columns.assembly_names, dtype=object),
+        "Units": columns.assembly_units,
+        "Total Pieces": np.bincount(assembly_id, weights=pieces, minlength=n).astype(
+            np.int64
+        ),
+        "Total Length (m)": np.bincount(assembly_id, weights=length, minlength=n),
+        "Total Price": np.bincount(assembly_id, weights=price, minlength=n),
+    }
@@ -0,0 +1,81 @@
+"""Cut list computations on ``Project`` models.
+
+Plain Python with no UI or data frame dependencies, so the cut list can be
+computed in scripts and worker processes; see ``core.columnar`` for the
+vectorized equivalents used on large projects.
+"""
+
+from typing import TYPE_CHECKING
+
+from models.wood import CutList, Project
+from tracing import traced
+
+if TYPE_CHECKING:
+    from catalog import WoodTypeCatalog
+
+
+@traced("cut_list.calculate")
+def calculate_cut_list(project: Project, catalog: "WoodTypeCatalog") -> list[CutList]:
+    """Calculate the cut list from all assemblies in the project"""
+    # Group pieces by wood type
+    wood_type_pieces = {}
+
+    for assembly in project.assemblies:
+        for piece in assembly.pieces:
+            wood_type = catalog.get_wood_type(piece.wood_type_index)
+            if wood_type:
+                if piece.wood_type_index not in wood_type_pieces:
+                    wood_type_pieces[piece.wood_type_index] = {
+                        "wood_type": wood_type,
+                        "total_length": 0,
+                        "total_price": 0,
+                    }
+
+                # Add piece length and price to totals, multiplied by assembly units
+                total_length = piece.length * piece.quantity * assembly.units
+                wood_type_pieces[piece.wood_type_index]["total_length"] += total_length
+                wood_type_pieces[piece.wood_type_index]["total_price"] += (
+                    total_length * wood_type.price_per_meter
+                )
+
+    # Convert to list of CutList objects
+    return [
+        CutList(
+            wood_type=info["wood_type"],
+            total_length=info["total_length"],
+            total_price=info["total_price"],
+            wood_type_index=index,
+        )
+        for index, info in wood_type_pieces.items()
+    ]
+
+
+@traced("cut_list.detailed")
+def get_detailed_cut_list(project: Project, catalog: "WoodTypeCatalog") -> list[dict]:
+    """Get a detailed cut list with assembly information"""
+    detailed_list = []
+
+    for assembly in project.assemblies:
+        for piece in assembly.pieces:
+            wood_type = catalog.get_wood_type(piece.wood_type_index)
+            if wood_type:
+                # Calculate quantities accounting for assembly units
+                total_quantity = piece.quantity * assembly.units
+                total_length = piece.length * total_quantity
+                total_price = total_length * wood_type.price_per_meter
+
+                detailed_list.append(
+                    {
+                        "Assembly": f"{assembly.name} (x{assembly.units})",
+                        "Wood Type": f"{wood_type.width}x{wood_type.height}mm",
+                        "Description": wood_type.description,
+                        "Length (m)": piece.length,
+                        "Quantity per Unit": piece.quantity,
+                        "Total Quantity": total_quantity,
+                        "Total Length (m)": total_length,
+                        "Price/m": wood_type.price_per_meter,
+                        "Total Price": total_price,
+                    }
+                )
+
+    return detailed_list
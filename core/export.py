@@ -0,0 +1,229 @@
+"""Cut list exports.
+
+CSV exports are produced by generators that yield the file in chunks of
+rows, so purchase lists spanning many projects never have to be held in
+memory as a whole. The detailed cut list can also be exported as Parquet or
+as an Arrow IPC stream for tools that ingest columnar data; those formats
+need the optional ``pyarrow`` package.
+"""
+
+import csv
+import io
+from itertools import islice
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Sequence, Tuple, Union
+
+from models.wood import CutList, CuttingPlan
+from tracing import traced
+
+SUMMARY_COLUMNS = [
+    "Dimensions",
+    "Description",
+    "Total Length (m)",
+    "Price/m",
+    "Total Price",
+]
+DETAILED_COLUMNS = [
+    "Assembly",
+    "Wood Type",
+    "Description",
+    "Length (m)",
+    "Quantity per Unit",
+    "Total Quantity",
+    "Total Length (m)",
+    "Price/m",
+    "Total Price",
+]
+BOARD_COLUMNS = [
+    "Wood Type",
+    "Description",
+    "Board (m)",
+    "Cuts (m)",
+    "Offcut (m)",
+    "Remnant",
+]
+CHUNK_ROWS = 1000
+
+DetailedList = Union[List[dict], Dict[str, Sequence[Any]]]
+
+
+def iter_summary_rows(cut_list: Iterable[CutList]) -> Iterator[list]:
+    """Yield the summary cut list as rows, in ``SUMMARY_COLUMNS`` order"""
+    for item in cut_list:
+        yield [
+            f"{item.wood_type.width}x{item.wood_type.height}mm",
+            item.wood_type.description,
+            item.total_length,
+            item.wood_type.price_per_meter,
+            item.total_price,
+        ]
+
+
+def iter_detailed_rows(
+    detailed_list: DetailedList, columns: Sequence[str] = DETAILED_COLUMNS
+) -> Iterator[list]:
+    """Yield the detailed cut list as rows, given as row dicts or as columns"""
+    if isinstance(detailed_list, dict):
+        # Convert column chunks to Python values a chunk at a time
+        total = len(detailed_list[columns[0]]) if detailed_list else 0
+        for start in range(0, total, CHUNK_ROWS):
+            chunk = [
+                _to_list(detailed_list[name][start : start + CHUNK_ROWS])
+                for name in columns
+            ]
+            yield from (list(row) for row in zip(*chunk))
+    else:
+        for row in detailed_list:
+            yield [row.get(name) for name in columns]
+
+
+def format_stock_counts(plan: CuttingPlan) -> str:
+    """Format the boards to buy, e.g. '3 x 6.0m, 1 x 2.4m'"""
+    return ", ".join(
+        f"{count} x {length}m" for length, count in plan.stock_counts.items()
+    )
+
+
+def iter_board_rows(plans: Iterable[CuttingPlan]) -> Iterator[list]:
+    """Yield every board of the cutting plans, in ``BOARD_COLUMNS`` order"""
+    for plan in plans:
+        wood_type = plan.wood_type
+        for board in plan.boards:
+            yield [
+                f"{wood_type.width}x{wood_type.height}mm",
+                wood_type.description,
+                board.stock_length,
+                ", ".join(f"{piece.length}" for piece in board.pieces),
+                round(board.offcut, 3),
+                "" if board.remnant_id is None else board.remnant_id,
+            ]
+
+
+def _to_list(values) -> list:
+    return values.tolist() if hasattr(values, "tolist") else list(values)
+
+
+def stream_csv(
+    rows: Iterable[Sequence[Any]],
+    columns: Sequence[str],
+    chunk_rows: int = CHUNK_ROWS,
+) -> Iterator[str]:
+    """Yield a CSV file as text chunks of at most ``chunk_rows`` rows"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(columns)
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, chunk_rows))
+        writer.writerows(chunk)
+        text = buffer.getvalue()
+        if text:
+            yield text
+        if len(chunk) < chunk_rows:
+            return
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def stream_summary_csv(cut_list: Iterable[CutList]) -> Iterator[str]:
+    """Stream the summary cut list as CSV"""
+    return stream_csv(iter_summary_rows(cut_list), SUMMARY_COLUMNS)
+
+
+def stream_detailed_csv(detailed_list: DetailedList) -> Iterator[str]:
+    """Stream the detailed cut list as CSV"""
+    return stream_csv(iter_detailed_rows(detailed_list), DETAILED_COLUMNS)
+
+
+def stream_purchase_list_csv(
+    detailed_lists: Iterable[Tuple[str, DetailedList]]
+) -> Iterator[str]:
+    """Stream the detailed cut lists of many projects as one CSV, with a
+    leading "Project" column.
+
+    Args:
+        detailed_lists: (project name, detailed cut list) pairs; may be a
+            generator so that only one project is in memory at a time
+    """
+
+    def rows():
+        for project_name, detailed_list in detailed_lists:
+            for row in iter_detailed_rows(detailed_list):
+                yield [project_name, *row]
+
+    return stream_csv(rows(), ["Project", *DETAILED_COLUMNS])
+
+
+def stream_boards_csv(plans: Iterable[CuttingPlan]) -> Iterator[str]:
+    """Stream the boards of the cutting plans as CSV"""
+    return stream_csv(iter_board_rows(plans), BOARD_COLUMNS)
+
+
+def write_chunks(chunks: Iterable[str], path: Union[str, Path]) -> None:
+    """Write streamed text chunks to a file"""
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        for chunk in chunks:
+            f.write(chunk)
+
+
+@traced("export.summary_csv")
+def export_summary_csv(cut_list: List[CutList]) -> str:
+    """Create a CSV string for the summary cut list"""
+    return "".join(stream_summary_csv(cut_list))
+
+
+@traced("export.detailed_csv")
+def export_detailed_csv(detailed_list: DetailedList) -> str:
+    """Create a CSV string for the detailed cut list, given as rows or as
+    columns"""
+    return "".join(stream_detailed_csv(detailed_list))
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+    except ImportError as e:
+        raise ImportError(
+            "Parquet and Arrow exports need pyarrow: pip install pyarrow"
+        ) from e
+    return pyarrow
+
+
+def has_pyarrow() -> bool:
+    """Whether the columnar exports are available"""
+    try:
+        _require_pyarrow()
+    except ImportError:
+        return False
+    return True
+
+
+def detailed_to_arrow(detailed_list: DetailedList):
+    """Convert the detailed cut list to a ``pyarrow.Table``"""
+    pa = _require_pyarrow()
+    if isinstance(detailed_list, dict):
+        return pa.table({name: detailed_list[name] for name in DETAILED_COLUMNS})
+    return pa.Table.from_pylist(
+        [{name: row.get(name) for name in DETAILED_COLUMNS} for row in detailed_list]
+    )
+
+
+@traced("export.detailed_parquet")
+def export_detailed_parquet(detailed_list: DetailedList) -> bytes:
+    """Export the detailed cut list as Parquet"""
+    _require_pyarrow()
+    import pyarrow.parquet as pq
+
+    buffer = io.BytesIO()
+    pq.write_table(detailed_to_arrow(detailed_list), buffer)
+    return buffer.getvalue()
+
+
+def export_detailed_arrow(detailed_list: DetailedList) -> bytes:
+    """Export the detailed cut list as an Arrow IPC stream"""
+    pa = _require_pyarrow()
+    table = detailed_to_arrow(detailed_list)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
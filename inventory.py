@@ -0,0 +1,189 @@
+"""Inventory of remnants: offcuts kept from earlier projects.
+
+Remnants are indexed per wood type in a list of ``(length, ID)`` sorted by
+length, so the shortest remnant that still holds a piece is found with a
+binary search however large the inventory grows. Wood types are identified
+by their stable catalog row ID (``WoodTypeCatalog.row_ids``), not by their
+position, which changes when rows are deleted. The cut list optimizer
+takes these lists and uses remnants before buying new stock. Once the
+boards have been cut, ``record_cuts`` removes the remnants a plan used and
+adds the offcuts it left.
+
+``get_shared_inventory`` returns one inventory per database for all
+sessions of the process; ``refresh`` loads what other processes wrote.
+"""
+
+import os
+import threading
+import time
+from bisect import bisect_left, insort
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+from models.wood import CuttingPlan
+from optimizer.packing import RemnantKey, to_meters, to_units
+from storage.remnant_store import SqliteRemnantStore
+
+MIN_REMNANT_LENGTH = 0.3  # Shorter offcuts are not worth keeping, in metres
+REFRESH_INTERVAL = 1.0  # Seconds between checks for changes of other processes
+
+
+class Remnant(NamedTuple):
+    """A leftover piece of one wood type"""
+
+    remnant_id: int
+    row_id: int  # Of the wood type in the catalog
+    length: float  # Metres
+
+
+class RemnantInventory:
+    """Remnants per wood type, sorted by length. Safe to share between
+    threads."""
+
+    def __init__(
+        self,
+        file_path: Union[str, Path],
+        store: Optional[SqliteRemnantStore] = None,
+    ):
+        self.store = store or SqliteRemnantStore(file_path)
+        self._by_type: Dict[int, List[RemnantKey]] = {}
+        self._keys: Dict[int, Tuple[int, RemnantKey]] = {}  # ID -> type, key
+        self._lock = threading.RLock()
+        self._checked = time.monotonic()
+        self.version = 0  # Bumped on every change
+        self.stored_version = 0  # Store version the remnants were read at
+        self._load()
+
+    def _load(self) -> None:
+        self.stored_version, remnants = self.store.load_versioned()
+        self._by_type, self._keys = {}, {}
+        for remnant_id, row_id, length in remnants:
+            key = (to_units(length), remnant_id)
+            self._by_type.setdefault(row_id, []).append(key)
+            self._keys[remnant_id] = (row_id, key)
+        for keys in self._by_type.values():
+            keys.sort()
+
+    def refresh(self) -> bool:
+        """Load the changes of other processes, checking at most every
+        ``REFRESH_INTERVAL`` seconds; returns whether there were any"""
+        if time.monotonic() - self._checked < REFRESH_INTERVAL:
+            return False
+        with self._lock:
+            self._checked = time.monotonic()
+            if self.store.version() == self.stored_version:
+                return False
+            self._load()
+            self.version += 1
+            return True
+
+    def __len__(self):
+        return len(self._keys)
+
+    def count(self, row_id: int) -> int:
+        return len(self._by_type.get(row_id, ()))
+
+    def row_ids(self) -> List[int]:
+        """Catalog rows of the wood types that have remnants"""
+        with self._lock:
+            return sorted(row_id for row_id, keys in self._by_type.items() if keys)
+
+    def keys(self, row_id: int) -> Tuple[RemnantKey, ...]:
+        """The remnants of one wood type as ``(length units, ID)``, shortest
+        first, as the optimizer takes them"""
+        with self._lock:
+            return tuple(self._by_type.get(row_id, ()))
+
+    def remnants(self, row_id: int) -> List[Remnant]:
+        """The remnants of one wood type, shortest first"""
+        return [
+            Remnant(remnant_id, row_id, to_meters(units))
+            for units, remnant_id in self.keys(row_id)
+        ]
+
+    def best_fit(self, row_id: int, length: float) -> Optional[Remnant]:
+        """The shortest remnant at least ``length`` metres long, if any"""
+        with self._lock:
+            keys = self._by_type.get(row_id, [])
+            pos = bisect_left(keys, (to_units(length), -1))
+            if pos == len(keys):
+                return None
+            units, remnant_id = keys[pos]
+        return Remnant(remnant_id, row_id, to_meters(units))
+
+    def _update(
+        self, added: Sequence[Tuple[int, float]] = (), removed: Iterable[int] = ()
+    ) -> List[int]:
+        with self._lock:
+            removed = [remnant_id for remnant_id in removed if remnant_id in self._keys]
+            if not added and not removed:
+                return []
+            version, ids = self.store.update(added, removed)
+            if version != self.stored_version + 1:
+                self._load()  # Another process wrote in between
+            else:
+                self.stored_version = version
+                for remnant_id in removed:
+                    row_id, key = self._keys.pop(remnant_id)
+                    keys = self._by_type[row_id]
+                    del keys[bisect_left(keys, key)]
+                for remnant_id, (row_id, length) in zip(ids, added):
+                    key = (to_units(length), remnant_id)
+                    insort(self._by_type.setdefault(row_id, []), key)
+                    self._keys[remnant_id] = (row_id, key)
+            self.version += 1
+            return ids
+
+    def add(self, row_id: int, lengths: Iterable[float]) -> List[int]:
+        """Add remnants of the wood type of catalog row ``row_id``; return
+        their IDs"""
+        return self._update(
+            added=[(row_id, length) for length in lengths if length > 0]
+        )
+
+    def remove(self, remnant_ids: Iterable[int]) -> None:
+        self._update(removed=remnant_ids)
+
+    def record_cuts(
+        self,
+        plans: Iterable[CuttingPlan],
+        catalog,
+        min_length: float = MIN_REMNANT_LENGTH,
+    ) -> Tuple[int, int]:
+        """Take the remnants the plans cut from out of the inventory and add
+        the offcuts of at least ``min_length`` they leave.
+
+        Args:
+            plans: Cutting plans made with ``catalog``
+            catalog: The ``WoodTypeCatalog`` the plans' wood type indices
+                refer to
+
+        Returns:
+            The number of remnants used and of offcuts added
+        """
+        used, offcuts = [], []
+        for plan in plans:
+            row_id = catalog.row_ids[plan.wood_type_index]
+            for board in plan.boards:
+                if board.remnant_id is not None:
+                    used.append(board.remnant_id)
+                if board.offcut >= min_length:
+                    offcuts.append((row_id, board.offcut))
+        with self._lock:
+            used = [remnant_id for remnant_id in used if remnant_id in self._keys]
+            self._update(added=offcuts, removed=used)
+        return len(used), len(offcuts)
+
+
+_shared: Dict[str, RemnantInventory] = {}
+_shared_lock = threading.Lock()
+
+
+def get_shared_inventory(file_path: Union[str, Path]) -> RemnantInventory:
+    """Return the inventory of ``file_path`` shared by all sessions, loading
+    it on first use"""
+    key = os.path.abspath(file_path)
+    with _shared_lock:
+        if key not in _shared:
+            _shared[key] = RemnantInventory(file_path)
+        return _shared[key]
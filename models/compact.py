@@ -0,0 +1,196 @@
+"""Compact, array-backed form of a ``Project``.
+
+Pieces are kept as a struct of typed arrays (``array.array``) instead of one
+Pydantic object each, which takes a fraction of the memory and skips model
+validation. ``CompactProject`` converts losslessly to and from ``Project``
+and exposes the same ``assemblies`` / ``pieces`` attributes through
+lightweight views, so the cut list and stats functions accept it directly.
+"""
+
+from array import array
+from typing import Any, Dict, Iterator, List, NamedTuple
+
+import numpy as np
+
+from core.columnar import ProjectColumns
+from models.wood import Assembly, AssemblyPiece, Project
+
+
+class PieceView(NamedTuple):
+    """Read-only view of one piece of a compact project"""
+
+    wood_type_index: int
+    length: float
+    quantity: int
+
+
+class AssemblyView:
+    """Read-only view of one assembly of a compact project"""
+
+    __slots__ = ("_project", "_position")
+
+    def __init__(self, project: "CompactProject", position: int):
+        self._project = project
+        self._position = position
+
+    @property
+    def name(self) -> str:
+        return self._project.assembly_names[self._position]
+
+    @property
+    def units(self) -> int:
+        return self._project.assembly_units[self._position]
+
+    @property
+    def pieces(self) -> List[PieceView]:
+        project = self._project
+        start = project.assembly_offsets[self._position]
+        end = project.assembly_offsets[self._position + 1]
+        return [
+            PieceView(
+                project.wood_type_index[i], project.length[i], project.quantity[i]
+            )
+            for i in range(start, end)
+        ]
+
+
+class CompactProject:
+    """A project stored as a struct of typed arrays.
+
+    Pieces of assembly ``i`` are at ``assembly_offsets[i]`` up to
+    ``assembly_offsets[i + 1]`` in the piece arrays.
+    """
+
+    __slots__ = (
+        "name",
+        "description",
+        "assembly_names",
+        "assembly_units",
+        "assembly_offsets",
+        "wood_type_index",
+        "length",
+        "quantity",
+    )
+
+    def __init__(self, name: str, description: str = ""):
+        self.name = name
+        self.description = description
+        self.assembly_names: List[str] = []
+        self.assembly_units = array("q")
+        self.assembly_offsets = array("q", [0])
+        self.wood_type_index = array("q")
+        self.length = array("d")
+        self.quantity = array("q")
+
+    def __len__(self):
+        return len(self.length)
+
+    def add_assembly(self, name: str, pieces: List[Any], units: int = 1) -> None:
+        """Append an assembly; pieces need wood_type_index, length, quantity"""
+        self.assembly_names.append(name)
+        self.assembly_units.append(units)
+        for piece in pieces:
+            self.wood_type_index.append(piece.wood_type_index)
+            self.length.append(piece.length)
+            self.quantity.append(piece.quantity)
+        self.assembly_offsets.append(len(self.length))
+
+    @property
+    def assemblies(self) -> List[AssemblyView]:
+        return [AssemblyView(self, i) for i in range(len(self.assembly_names))]
+
+    def iter_pieces(self) -> Iterator[PieceView]:
+        """Iterate over all pieces, in assembly order"""
+        for i in range(len(self.length)):
+            yield PieceView(self.wood_type_index[i], self.length[i], self.quantity[i])
+
+    @classmethod
+    def from_project(cls, project: Project) -> "CompactProject":
+        """Build a compact project from a ``Project``"""
+        compact = cls(project.name, project.description)
+        for assembly in project.assemblies:
+            compact.add_assembly(assembly.name, assembly.pieces, assembly.units)
+        return compact
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "CompactProject":
+        """Build a compact project straight from its JSON data, without
+        creating Pydantic models"""
+        compact = cls(data["name"], data.get("description", ""))
+        for assembly in data.get("assemblies", []):
+            pieces = assembly.get("pieces", [])
+            compact.assembly_names.append(str(assembly["name"]))
+            compact.assembly_units.append(int(assembly.get("units", 1)))
+            compact.wood_type_index.extend(
+                int(piece["wood_type_index"]) for piece in pieces
+            )
+            compact.length.extend(float(piece["length"]) for piece in pieces)
+            compact.quantity.extend(int(piece.get("quantity", 1)) for piece in pieces)
+            compact.assembly_offsets.append(len(compact.length))
+        return compact
+
+    def to_project(self) -> Project:
+        """Convert back to a ``Project``"""
+        return Project(
+            name=self.name,
+            description=self.description,
+            assemblies=[
+                Assembly(
+                    name=view.name,
+                    units=view.units,
+                    pieces=[AssemblyPiece(**piece._asdict()) for piece in view.pieces],
+                )
+                for view in self.assemblies
+            ],
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Same structure as ``Project.model_dump()``"""
+        return {
+            "name": self.name,
+            "assemblies": [
+                {
+                    "name": view.name,
+                    "pieces": [piece._asdict() for piece in view.pieces],
+                    "units": view.units,
+                }
+                for view in self.assemblies
+            ],
+            "description": self.description,
+        }
+
+    def to_columns(self) -> ProjectColumns:
+        """Return the pieces as ``ProjectColumns``.
+
+        The columns are copies: a NumPy view would pin the buffers of the
+        arrays, and ``add_assembly`` could not grow them while it lives.
+        """
+        assembly_units = np.array(self.assembly_units, dtype=np.int64)
+        assembly_id = np.repeat(
+            np.arange(len(self.assembly_names), dtype=np.int64),
+            np.diff(np.frombuffer(self.assembly_offsets, dtype=np.int64)),
+        )
+        return ProjectColumns(
+            wood_type_index=np.array(self.wood_type_index, dtype=np.int64),
+            length=np.array(self.length, dtype=np.float64),
+            quantity=np.array(self.quantity, dtype=np.int64),
+            units=assembly_units[assembly_id],
+            assembly_id=assembly_id,
+            assembly_names=list(self.assembly_names),
+            assembly_units=assembly_units,
+        )
+
+    def content_bytes(self) -> bytes:
+        """Raw content, used to compute a stable digest"""
+        return b"\0".join(
+            [
+                self.name.encode(),
+                self.description.encode(),
+                "\0".join(self.assembly_names).encode(),
+                self.assembly_units.tobytes(),
+                self.assembly_offsets.tobytes(),
+                self.wood_type_index.tobytes(),
+                self.length.tobytes(),
+                self.quantity.tobytes(),
+            ]
+        )
@@ -1,4 +1,4 @@
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 from pydantic import BaseModel
 
@@ -34,12 +34,63 @@ class WoodPiece(WoodType):
     total_price: float
 
 
+class PlacedPiece(BaseModel):
+    """a single piece cut from a board"""
+
+    length: float
+    assembly: str = ""
+
+
+class StockBoard(BaseModel):
+    """a board of stock length and the pieces cut from it"""
+
+    stock_length: float
+    pieces: List[PlacedPiece] = []
+    offcut: float = 0.0  # Usable length left at the end of the board
+    remnant_id: Optional[int] = None  # Set when cut from a stored remnant
+
+
+class CuttingPlan(BaseModel):
+    """the boards to buy for one wood type and how to cut them"""
+
+    wood_type_index: int
+    wood_type: WoodType
+    boards: List[StockBoard] = []
+    unplaced: List[PlacedPiece] = []  # Pieces longer than any stock length
+    stock_counts: Dict[float, int] = {}  # Stock length -> boards to buy
+    total_stock_length: float = 0.0  # Totals are of the new stock only
+    total_piece_length: float = 0.0
+    total_price: float = 0.0
+    remnant_length: float = 0.0  # Remnants from the inventory cut as well
+    method: str = "heuristic"
+    lower_bound: Optional[float] = None  # Proven minimum stock length
+
+    @property
+    def gap(self) -> Optional[float]:
+        """Relative distance of the stock length from the lower bound"""
+        if not self.lower_bound:
+            return None
+        return (self.total_stock_length - self.lower_bound) / self.lower_bound
+
+    @property
+    def waste_length(self) -> float:
+        return self.total_stock_length - self.total_piece_length
+
+    @property
+    def efficiency(self) -> float:
+        if not self.total_stock_length:
+            return 0.0
+        return self.total_piece_length / self.total_stock_length
+
+
 class CutList(BaseModel):
     """a 'pivot' of the wood pieces to the wood type"""
 
     wood_type: WoodType
     total_price: float
     total_length: float
+    wood_type_index: Optional[int] = None
+    cutting_plan: Optional[CuttingPlan] = None
 
 
 class WoodAssembly(BaseModel):
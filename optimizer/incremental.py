@@ -0,0 +1,191 @@
+"""Incremental re-optimization of the cut list.
+
+The demand of every wood type (the multiset of piece lengths times
+quantities times units, plus the catalog entry and the solver settings) is
+fingerprinted. Wood types whose fingerprint did not change reuse their
+previous plan; when only a few pieces moved, the previous boards are kept
+and only the difference is packed; everything else is solved from scratch.
+
+How far the demand moved is measured from the last full solve, not from the
+last repair, so a string of small edits is re-solved once together they
+pass ``WARM_START_RATIO``. Repaired plans keep the method of that solve and
+a lower bound carried over from it.
+"""
+
+import hashlib
+import json
+from collections import Counter
+from typing import Dict, List, NamedTuple, Optional
+
+from models.wood import CuttingPlan, Project
+from optimizer.packing import (
+    Board,
+    build_plan,
+    expand_items,
+    improve_packing,
+    pack_items,
+    to_meters,
+    to_units,
+)
+from optimizer.parallel import Subproblem, solve_subproblems, split_subproblems
+
+WARM_START_RATIO = 0.2  # Largest share of changed pieces worth warm starting
+
+
+class _Entry(NamedTuple):
+    fingerprint: str
+    wood_type_key: str
+    demand: Counter
+    plan: CuttingPlan
+    solved: CuttingPlan  # Of the last full solve
+    solved_demand: Counter
+
+
+def _drift(demand: Counter, other: Counter) -> int:
+    """Number of pieces added or removed between two demands"""
+    return sum(((demand - other) + (other - demand)).values())
+
+
+def demand_counter(subproblem: Subproblem) -> Counter:
+    """Count the pieces of a subproblem by (length units, assembly)"""
+    counter: Counter = Counter()
+    for demand in subproblem.demands:
+        counter[(to_units(demand.length), demand.assembly)] += demand.count
+    return counter
+
+
+def fingerprint_demand(
+    subproblem: Subproblem, kerf: float = 0.0, method: str = "heuristic"
+) -> str:
+    """Stable hash of a wood type's demand, catalog entry, remnants and
+    solver settings"""
+    payload = json.dumps(
+        [
+            subproblem.wood_type.model_dump(),
+            sorted(demand_counter(subproblem).items()),
+            to_units(kerf),
+            method,
+            [remnant_id for _, remnant_id in subproblem.remnants],
+        ],
+        sort_keys=True,
+    )
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+
+def carried_lower_bound(
+    solved: CuttingPlan, solved_demand: Counter, demand: Counter
+) -> Optional[float]:
+    """A lower bound on the stock length for ``demand``, from the one proven
+    for ``solved_demand``. Added pieces never lower the optimum, and each
+    removed piece lowers it by at most one board of the longest stock; the
+    total piece length is a bound as well."""
+    if solved.lower_bound is None:
+        return None
+    removed = sum((solved_demand - demand).values())
+    longest = max(solved.wood_type.available_lengths, default=0.0)
+    material = to_meters(sum(units * count for (units, _), count in demand.items()))
+    return max(solved.lower_bound - removed * longest, material)
+
+
+def warm_start(
+    previous: CuttingPlan, subproblem: Subproblem, kerf: float = 0.0
+) -> CuttingPlan:
+    """Repair a previous plan for a slightly different demand.
+
+    Pieces that are still needed stay on their boards, pieces that are gone
+    are removed, and the new pieces are packed into the freed space first.
+    The plan keeps the method of ``previous``, without a lower bound.
+    """
+    wood_type = subproblem.wood_type
+    stock = sorted({to_units(l) for l in wood_type.available_lengths if l > 0})
+    kerf_units = to_units(kerf)
+    wanted = Counter(expand_items(subproblem.demands))
+
+    boards = []
+    for board in previous.boards:
+        items = []
+        for piece in board.pieces:
+            item = (to_units(piece.length), piece.assembly)
+            if wanted[item] > 0:
+                wanted[item] -= 1
+                items.append(item)
+        if items:
+            boards.append(Board(to_units(board.stock_length), kerf_units, items))
+
+    leftover = sorted(wanted.elements(), key=lambda item: item[0], reverse=True)
+    boards, unplaced = pack_items(leftover, stock, kerf_units, boards=boards)
+    boards = improve_packing(boards, stock, kerf_units)
+    plan = build_plan(
+        subproblem.wood_type_index, wood_type, boards, unplaced, kerf_units
+    )
+    plan.method = previous.method
+    return plan
+
+
+class IncrementalOptimizer:
+    """Keeps the last plan per wood type and re-solves only what changed"""
+
+    def __init__(self, warm_start_ratio: float = WARM_START_RATIO):
+        self.warm_start_ratio = warm_start_ratio
+        self._entries: Dict[int, _Entry] = {}
+        self.reused: List[int] = []
+        self.warm_started: List[int] = []
+        self.resolved: List[int] = []
+
+    def optimize(
+        self,
+        project: Project,
+        catalog,
+        kerf: float = 0.0,
+        method: str = "heuristic",
+        time_limit: float = 3.0,
+        inventory=None,
+    ) -> Dict[int, CuttingPlan]:
+        """Return a cutting plan per wood type, reusing earlier work; the
+        remnants of ``inventory`` (a ``RemnantInventory``) are used first"""
+        self.reused, self.warm_started, self.resolved = [], [], []
+        plans: Dict[int, CuttingPlan] = {}
+        keys = {}
+        to_solve: List[Subproblem] = []
+
+        for sub in split_subproblems(project, catalog, inventory):
+            index = sub.wood_type_index
+            fingerprint = fingerprint_demand(sub, kerf, method)
+            wood_type_key = fingerprint_demand(sub._replace(demands=[]), kerf, method)
+            demand = demand_counter(sub)
+            keys[index] = (fingerprint, wood_type_key, demand)
+            previous = self._entries.get(index)
+
+            if previous and previous.fingerprint == fingerprint:
+                plans[index] = previous.plan
+                self.reused.append(index)
+            elif (
+                previous
+                and not sub.remnants  # Warm starts only buy new stock
+                and previous.wood_type_key == wood_type_key
+                and _drift(demand, previous.solved_demand)
+                <= self.warm_start_ratio * sum(demand.values())
+            ):
+                plan = warm_start(previous.plan, sub, kerf)
+                plan.lower_bound = carried_lower_bound(
+                    previous.solved, previous.solved_demand, demand
+                )
+                plans[index] = plan
+                self.warm_started.append(index)
+            else:
+                to_solve.append(sub)
+                self.resolved.append(index)
+
+        plans.update(solve_subproblems(to_solve, kerf, method, time_limit))
+        entries = {}
+        for index, (fingerprint, wood_type_key, demand) in keys.items():
+            previous = self._entries.get(index)
+            if index in self.resolved:
+                solved, solved_demand = plans[index], demand
+            else:
+                solved, solved_demand = previous.solved, previous.solved_demand
+            entries[index] = _Entry(
+                fingerprint, wood_type_key, demand, plans[index], solved, solved_demand
+            )
+        self._entries = entries
+        return plans
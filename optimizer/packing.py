@@ -0,0 +1,455 @@
+"""1D cutting-stock optimizer for the cut list.
+
+Packs the pieces of every wood type onto the stock lengths listed in the
+catalog (``WoodType.available_lengths``) with a first-fit or best-fit
+decreasing heuristic, followed by an improvement pass that empties lightly
+used boards and shrinks every board to the shortest stock length it fits on.
+
+Lengths are handled internally as integer millimetres so comparisons are
+exact, and reported back in metres like the rest of the app.
+
+Best fit keeps the boards ordered by free space in a ``_SortedKeys``, a
+list of short sorted chunks, so finding, removing and re-inserting a board
+costs two binary searches and a copy within one chunk; first fit uses a
+segment tree over the boards. A pass over n pieces takes O(n log n) time plus
+short chunk copies.
+"""
+
+from bisect import bisect_left, insort
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from models.wood import CuttingPlan, PlacedPiece, Project, StockBoard, WoodType
+
+LENGTH_SCALE = 1000  # Internal length units per metre (millimetres)
+STRATEGIES = ("best_fit", "first_fit")
+
+Item = Tuple[int, str]  # (length in internal units, assembly name)
+RemnantKey = Tuple[int, int]  # (length in internal units, remnant ID)
+
+
+class PieceDemand(NamedTuple):
+    """A piece length needed ``count`` times by one assembly"""
+
+    length: float
+    count: int
+    assembly: str = ""
+
+
+def to_units(length: float) -> int:
+    """Convert a length in metres to internal integer units"""
+    return int(round(length * LENGTH_SCALE))
+
+
+def to_meters(units: int) -> float:
+    """Convert internal integer units back to metres"""
+    return units / LENGTH_SCALE
+
+
+class Board:
+    """A stock board being packed; ``free`` already accounts for the kerf"""
+
+    __slots__ = ("stock", "free", "items", "remnant")
+
+    def __init__(
+        self,
+        stock: int,
+        kerf: int,
+        items: Optional[List[Item]] = None,
+        remnant: Optional[int] = None,  # Remnant ID, if not new stock
+    ):
+        self.stock = stock
+        self.items = items or []
+        self.remnant = remnant
+        self.free = stock + kerf - sum(length + kerf for length, _ in self.items)
+
+    def used(self, kerf: int) -> int:
+        return self.stock + kerf - self.free
+
+
+class _SortedKeys:
+    """A sorted multiset of keys, split into chunks of at most
+    ``2 * CHUNK`` keys so that inserting and removing never shifts more
+    than one chunk (a plain sorted list shifts the whole list)"""
+
+    CHUNK = 256
+
+    def __init__(self, keys: Iterable[Any] = ()):
+        keys = sorted(keys)
+        self._chunks = [
+            keys[i : i + self.CHUNK] for i in range(0, len(keys), self.CHUNK)
+        ]
+        self._maxes = [chunk[-1] for chunk in self._chunks]
+
+    def __len__(self):
+        return sum(len(chunk) for chunk in self._chunks)
+
+    def __iter__(self):
+        for chunk in self._chunks:
+            yield from chunk
+
+    def add(self, key: Any) -> None:
+        if not self._chunks:
+            self._chunks.append([key])
+            self._maxes.append(key)
+            return
+        pos = bisect_left(self._maxes, key)
+        if pos == len(self._maxes):
+            pos -= 1
+            self._chunks[pos].append(key)
+            self._maxes[pos] = key
+        else:
+            insort(self._chunks[pos], key)
+        chunk = self._chunks[pos]
+        if len(chunk) > 2 * self.CHUNK:
+            self._chunks.insert(pos + 1, chunk[self.CHUNK :])
+            del chunk[self.CHUNK :]
+            self._maxes.insert(pos, chunk[-1])
+
+    def _delete(self, pos: int, index: int) -> Any:
+        chunk = self._chunks[pos]
+        key = chunk.pop(index)
+        if not chunk:
+            del self._chunks[pos]
+            del self._maxes[pos]
+        elif index == len(chunk):
+            self._maxes[pos] = chunk[-1]
+        return key
+
+    def pop_at_least(self, key: Any) -> Optional[Any]:
+        """Remove and return the smallest key not below ``key``, if any"""
+        pos = bisect_left(self._maxes, key)
+        if pos == len(self._maxes):
+            return None
+        return self._delete(pos, bisect_left(self._chunks[pos], key))
+
+    def remove(self, key: Any) -> None:
+        pos = bisect_left(self._maxes, key)
+        if pos < len(self._maxes):
+            index = bisect_left(self._chunks[pos], key)
+            if self._chunks[pos][index] == key:
+                self._delete(pos, index)
+                return
+        raise ValueError(f"{key!r} not found")
+
+
+class _MaxTree:
+    """Max segment tree over board free space for O(log n) first-fit lookups"""
+
+    def __init__(self, size: int):
+        self.size = 1
+        while self.size < max(size, 1):
+            self.size *= 2
+        self.tree = [-1] * (2 * self.size)
+
+    def update(self, index: int, value: int) -> None:
+        i = index + self.size
+        self.tree[i] = value
+        i //= 2
+        while i:
+            self.tree[i] = max(self.tree[2 * i], self.tree[2 * i + 1])
+            i //= 2
+
+    def first_at_least(self, value: int) -> int:
+        """Return the lowest index holding at least ``value``, or -1"""
+        if self.tree[1] < value:
+            return -1
+        i = 1
+        while i < self.size:
+            i = 2 * i if self.tree[2 * i] >= value else 2 * i + 1
+        return i - self.size
+
+
+def collect_demands(project: Project, catalog) -> Dict[int, List[PieceDemand]]:
+    """Group the project's pieces by wood type index, accounting for units"""
+    demands: Dict[int, List[PieceDemand]] = {}
+    for assembly in project.assemblies:
+        for piece in assembly.pieces:
+            if catalog.get_wood_type(piece.wood_type_index) is None:
+                continue
+            count = piece.quantity * assembly.units
+            if count <= 0 or piece.length <= 0:
+                continue
+            demands.setdefault(piece.wood_type_index, []).append(
+                PieceDemand(piece.length, count, assembly.name)
+            )
+    return demands
+
+
+def expand_items(demands: Sequence[PieceDemand]) -> List[Item]:
+    """Expand demands into single items, longest first"""
+    items = []
+    for demand in demands:
+        items.extend([(to_units(demand.length), demand.assembly)] * demand.count)
+    items.sort(key=lambda item: item[0], reverse=True)
+    return items
+
+
+def pack_remnants(
+    items: List[Item], remnants: Sequence[RemnantKey], kerf: int = 0
+) -> Tuple[List[Board], List[Item]]:
+    """Pack items (longest first) onto remnants, before any stock is bought.
+
+    An item goes on the opened remnant with the least room that holds it,
+    else on the shortest remnant it fits on; ``remnants`` is sorted by
+    length, so both lookups are binary searches.
+
+    Returns:
+        The remnant boards and the items that did not fit on any remnant
+    """
+    available = _SortedKeys(remnants)
+    boards: List[Board] = []
+    keys = _SortedKeys()  # (free, board index)
+    leftover: List[Item] = []
+    for item in items:
+        need = item[0] + kerf
+        key = keys.pop_at_least((need, -1))
+        if key is not None:
+            _, index = key
+        else:
+            remnant = available.pop_at_least((item[0], -1))
+            if remnant is None:
+                leftover.append(item)
+                continue
+            length, remnant_id = remnant
+            index = len(boards)
+            boards.append(Board(length, kerf, remnant=remnant_id))
+        board = boards[index]
+        board.free -= need
+        board.items.append(item)
+        keys.add((board.free, index))
+    return boards, leftover
+
+
+def pack_items(
+    items: List[Item],
+    stock_lengths: Sequence[int],
+    kerf: int = 0,
+    strategy: str = "best_fit",
+    boards: Optional[List[Board]] = None,
+) -> Tuple[List[Board], List[Item]]:
+    """Pack items (longest first) onto boards.
+
+    New boards are opened at the longest stock length; ``improve_packing``
+    shrinks them afterwards. Boards passed in ``boards`` are filled first.
+
+    Returns:
+        The packed boards and the items that fit on no stock length
+    """
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown packing strategy: {strategy}")
+
+    boards = list(boards or [])
+    unplaced: List[Item] = []
+    longest = max(stock_lengths) if stock_lengths else 0
+
+    if strategy == "best_fit":
+        keys = _SortedKeys((board.free, i) for i, board in enumerate(boards))
+        for item in items:
+            need = item[0] + kerf
+            key = keys.pop_at_least((need, -1))
+            if key is not None:
+                _, index = key
+            elif need <= longest + kerf:
+                index = len(boards)
+                boards.append(Board(longest, kerf))
+            else:
+                unplaced.append(item)
+                continue
+            board = boards[index]
+            board.free -= need
+            board.items.append(item)
+            keys.add((board.free, index))
+    else:
+        tree = _MaxTree(len(boards) + len(items))
+        for i, board in enumerate(boards):
+            tree.update(i, board.free)
+        for item in items:
+            need = item[0] + kerf
+            index = tree.first_at_least(need)
+            if index < 0:
+                if need > longest + kerf:
+                    unplaced.append(item)
+                    continue
+                index = len(boards)
+                boards.append(Board(longest, kerf))
+            board = boards[index]
+            board.free -= need
+            board.items.append(item)
+            tree.update(index, board.free)
+
+    return boards, unplaced
+
+
+def improve_packing(
+    boards: List[Board],
+    stock_lengths: Sequence[int],
+    kerf: int = 0,
+    fixed: int = 0,
+) -> List[Board]:
+    """Empty lightly used boards into the slack of the others, then shrink
+    every board to the shortest stock length that still holds its pieces.
+
+    The first ``fixed`` boards keep their length (e.g. existing remnants).
+    """
+    keys = _SortedKeys((board.free, i) for i, board in enumerate(boards))
+    total_free = sum(board.free for board in boards)
+    removed = set()
+
+    candidates = sorted(range(fixed, len(boards)), key=lambda i: boards[i].used(kerf))
+    for index in candidates:
+        board = boards[index]
+        used = board.used(kerf)
+        if used > total_free:
+            break
+        if used > total_free - board.free:
+            continue
+        keys.remove((board.free, index))
+
+        moves = []
+        for item in sorted(board.items, reverse=True):
+            need = item[0] + kerf
+            key = keys.pop_at_least((need, -1))
+            if key is None:
+                break
+            _, target = key
+            boards[target].free -= need
+            boards[target].items.append(item)
+            keys.add((boards[target].free, target))
+            moves.append((target, need))
+
+        if len(moves) == len(board.items):
+            removed.add(index)
+            total_free -= board.free + sum(need for _, need in moves)
+            continue
+
+        # Roll back a partial move
+        for target, need in reversed(moves):
+            keys.remove((boards[target].free, target))
+            boards[target].free += need
+            boards[target].items.pop()
+            keys.add((boards[target].free, target))
+        keys.add((board.free, index))
+
+    stock = sorted(stock_lengths)
+    result = []
+    for index, board in enumerate(boards):
+        if index in removed or not board.items:
+            continue
+        if index >= fixed and stock:
+            used = board.used(kerf) - kerf
+            shortest = stock[min(bisect_left(stock, used), len(stock) - 1)]
+            if shortest >= used:
+                board.free -= board.stock - shortest
+                board.stock = shortest
+        result.append(board)
+    return result
+
+
+def build_plan(
+    wood_type_index: int,
+    wood_type: WoodType,
+    boards: List[Board],
+    unplaced: List[Item],
+    kerf: int = 0,
+) -> CuttingPlan:
+    """Convert packed boards into a ``CuttingPlan``; the totals count the
+    new stock, remnant boards are listed after it"""
+    boards = sorted(
+        boards,
+        key=lambda board: (board.remnant is not None, -board.stock, board.free),
+    )
+    stock_counts: Dict[float, int] = {}
+    stock_boards = []
+    total_stock = 0
+    total_pieces = 0
+    remnant_length = 0
+    for board in boards:
+        length = to_meters(board.stock)
+        stock_boards.append(
+            StockBoard(
+                stock_length=length,
+                pieces=[
+                    PlacedPiece(length=to_meters(units), assembly=assembly)
+                    for units, assembly in board.items
+                ],
+                offcut=to_meters(max(board.free - kerf, 0)),
+                remnant_id=board.remnant,
+            )
+        )
+        if board.remnant is not None:
+            remnant_length += board.stock
+            continue
+        stock_counts[length] = stock_counts.get(length, 0) + 1
+        total_stock += board.stock
+        total_pieces += sum(units for units, _ in board.items)
+
+    return CuttingPlan(
+        wood_type_index=wood_type_index,
+        wood_type=wood_type,
+        boards=stock_boards,
+        unplaced=[
+            PlacedPiece(length=to_meters(units), assembly=assembly)
+            for units, assembly in unplaced
+        ],
+        stock_counts=stock_counts,
+        total_stock_length=to_meters(total_stock),
+        total_piece_length=to_meters(total_pieces),
+        total_price=to_meters(total_stock) * wood_type.price_per_meter,
+        remnant_length=to_meters(remnant_length),
+    )
+
+
+def optimize_wood_type(
+    wood_type_index: int,
+    wood_type: WoodType,
+    demands: Sequence[PieceDemand],
+    kerf: float = 0.0,
+    strategy: str = "best_fit",
+    improve: bool = True,
+    remnants: Sequence[RemnantKey] = (),
+) -> CuttingPlan:
+    """Work out which stock boards to buy for one wood type, after using
+    the ``remnants`` (sorted ``(length units, ID)``) the pieces fit on"""
+    stock = sorted({to_units(l) for l in wood_type.available_lengths if l > 0})
+    kerf_units = to_units(kerf)
+    remnant_boards, items = pack_remnants(expand_items(demands), remnants, kerf_units)
+    boards, unplaced = pack_items(items, stock, kerf_units, strategy)
+    boards = remnant_boards + boards
+    if improve:
+        boards = improve_packing(boards, stock, kerf_units, fixed=len(remnant_boards))
+    return build_plan(wood_type_index, wood_type, boards, unplaced, kerf_units)
+
+
+def optimize_cut_list(
+    project: Project,
+    catalog,
+    kerf: float = 0.0,
+    strategy: str = "best_fit",
+    improve: bool = True,
+    inventory=None,
+) -> Dict[int, CuttingPlan]:
+    """Optimize the boards to buy for every wood type in the project.
+
+    Args:
+        project: The project to plan
+        catalog: The ``WoodTypeCatalog`` the pieces refer to
+        kerf: Saw blade width in metres, lost at every cut
+        strategy: ``"best_fit"`` or ``"first_fit"`` decreasing
+        improve: Run the improvement pass after the initial packing
+        inventory: ``RemnantInventory`` whose remnants are used first
+
+    Returns:
+        A cutting plan per wood type index
+    """
+    return {
+        index: optimize_wood_type(
+            index,
+            catalog.get_wood_type(index),
+            demands,
+            kerf,
+            strategy,
+            improve,
+            inventory.keys(catalog.row_ids[index]) if inventory is not None else (),
+        )
+        for index, demands in collect_demands(project, catalog).items()
+    }
@@ -0,0 +1,208 @@
+"""Solve the cutting problem of every wood type in a process pool.
+
+Each wood type is an independent packing problem, so the subproblems are
+sent to a shared ``ProcessPoolExecutor``, largest first so that the pool
+stays busy, and the plans are merged back into the ``CutList`` rows.
+Small jobs are solved inline, where the pool round trip would cost more
+than it saves.
+
+Workers are started with the forkserver (or spawn) method: forking the
+multi-threaded server process could copy locks held by other threads. Each
+task carries an absolute deadline rather than a duration, so time spent
+waiting in the queue, behind other tasks or other sessions, counts against
+its budget.
+"""
+
+import atexit
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from models.wood import CutList, CuttingPlan, Project, WoodType
+from optimizer.packing import (
+    PieceDemand,
+    RemnantKey,
+    collect_demands,
+    optimize_wood_type,
+)
+from optimizer.patterns import solve_wood_type
+
+METHODS = ("heuristic", "patterns")
+PARALLEL_MIN_PIECES = 2000  # Below this the heuristic is faster inline
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+class Subproblem(NamedTuple):
+    """The pieces of one wood type, ready to be sent to a worker"""
+
+    wood_type_index: int
+    wood_type: WoodType
+    demands: List[PieceDemand]
+    remnants: Tuple[RemnantKey, ...] = ()  # Sorted, used before new stock
+
+    @property
+    def piece_count(self) -> int:
+        return sum(demand.count for demand in self.demands)
+
+
+def get_executor() -> ProcessPoolExecutor:
+    """Return the process pool shared by all sessions, creating it if needed"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context(
+                "forkserver" if "forkserver" in methods else "spawn"
+            )
+            _executor = ProcessPoolExecutor(
+                max_workers=os.cpu_count(), mp_context=context
+            )
+        return _executor
+
+
+def shutdown_executor() -> None:
+    """Shut down the shared process pool"""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(cancel_futures=True)
+            _executor = None
+
+
+atexit.register(shutdown_executor)
+
+
+def split_subproblems(project: Project, catalog, inventory=None) -> List[Subproblem]:
+    """Split a project into one subproblem per wood type, with the remnants
+    of that wood type in ``inventory`` (a ``RemnantInventory``) if given"""
+    return [
+        Subproblem(
+            index,
+            catalog.get_wood_type(index),
+            demands,
+            inventory.keys(catalog.row_ids[index]) if inventory is not None else (),
+        )
+        for index, demands in collect_demands(project, catalog).items()
+    ]
+
+
+def solve_subproblem(
+    subproblem: Subproblem,
+    kerf: float = 0.0,
+    method: str = "heuristic",
+    time_limit: float = 3.0,
+) -> CuttingPlan:
+    """Solve one wood type with the given method"""
+    index, wood_type, demands, remnants = subproblem
+    if method == "patterns":
+        return solve_wood_type(
+            index, wood_type, demands, kerf, time_limit, remnants=remnants
+        )
+    return optimize_wood_type(index, wood_type, demands, kerf, remnants=remnants)
+
+
+def solve_subproblem_until(
+    subproblem: Subproblem, kerf: float, method: str, deadline: float
+) -> CuttingPlan:
+    """Solve one wood type by ``deadline``, a ``time.time()`` timestamp, so
+    that the time a task waited for a worker is taken from its budget"""
+    return solve_subproblem(subproblem, kerf, method, max(deadline - time.time(), 0.0))
+
+
+def solve_subproblems(
+    subproblems: Sequence[Subproblem],
+    kerf: float = 0.0,
+    method: str = "heuristic",
+    time_limit: float = 3.0,
+    parallel: Optional[bool] = None,
+) -> Dict[int, CuttingPlan]:
+    """Solve the subproblems, in the process pool when it pays off.
+
+    Args:
+        subproblems: The wood types to solve
+        kerf: Saw blade width in metres
+        method: ``"heuristic"`` or ``"patterns"``
+        time_limit: Wall-clock budget for the pattern solver, in seconds
+        parallel: Force (or prevent) the use of the pool; by default the
+            pool is used for the pattern solver and for large jobs
+
+    Returns:
+        A cutting plan per wood type index
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown optimization method: {method}")
+    if parallel is None:
+        parallel = (
+            len(subproblems) > 1
+            and (os.cpu_count() or 1) > 1
+            and (
+                method == "patterns"
+                or sum(sub.piece_count for sub in subproblems) >= PARALLEL_MIN_PIECES
+            )
+        )
+
+    if not parallel:
+        # Solved one after another, each wood type gets an even share of
+        # what the previous ones left over
+        deadline = time.perf_counter() + time_limit
+        plans = {}
+        for n, sub in enumerate(subproblems):
+            budget = max(deadline - time.perf_counter(), 0.0) / (len(subproblems) - n)
+            plans[sub.wood_type_index] = solve_subproblem(sub, kerf, method, budget)
+        return plans
+
+    # Largest problems first; the n-th round of tasks on the workers must
+    # be done by the n-th share of the wall clock
+    workers = os.cpu_count() or 1
+    rounds = -(-len(subproblems) // workers)
+    start = time.time()
+    executor = get_executor()
+    futures = {
+        sub.wood_type_index: executor.submit(
+            solve_subproblem_until,
+            sub,
+            kerf,
+            method,
+            start + time_limit * (n // workers + 1) / rounds,
+        )
+        for n, sub in enumerate(sorted(subproblems, key=lambda sub: -sub.piece_count))
+    }
+    return {
+        sub.wood_type_index: futures[sub.wood_type_index].result()
+        for sub in subproblems
+    }
+
+
+def optimize_cut_list_parallel(
+    project: Project,
+    catalog,
+    kerf: float = 0.0,
+    method: str = "heuristic",
+    time_limit: float = 3.0,
+    parallel: Optional[bool] = None,
+    inventory=None,
+) -> Dict[int, CuttingPlan]:
+    """Optimize every wood type of the project, in parallel when it pays off,
+    using the remnants of ``inventory`` first if given"""
+    return solve_subproblems(
+        split_subproblems(project, catalog, inventory),
+        kerf,
+        method,
+        time_limit,
+        parallel,
+    )
+
+
+def merge_cutting_plans(
+    cut_list: List[CutList], plans: Dict[int, CuttingPlan]
+) -> List[CutList]:
+    """Attach the cutting plan of each wood type to its cut list row"""
+    return [
+        item.model_copy(update={"cutting_plan": plans.get(item.wood_type_index)})
+        for item in cut_list
+    ]
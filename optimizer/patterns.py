@@ -0,0 +1,319 @@
+"""Near-optimal cutting-pattern solver.
+
+Solves the LP relaxation of the cutting-stock problem by column generation:
+a revised simplex on the restricted master problem, priced with a bounded
+knapsack over all stock lengths at once. Every pricing round also yields a
+valid lower bound (Farley's bound), so the answer can report how far it is
+from optimal even when the time budget runs out before the LP converges.
+
+The fractional patterns are rounded down and the leftover pieces are packed
+with the heuristic from ``optimizer.packing``; the better of that and the
+plain heuristic is returned.
+"""
+
+import time
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from models.wood import CuttingPlan, Project, WoodType
+from optimizer.packing import (
+    Board,
+    PieceDemand,
+    RemnantKey,
+    build_plan,
+    collect_demands,
+    expand_items,
+    improve_packing,
+    pack_items,
+    pack_remnants,
+    to_meters,
+    to_units,
+)
+
+EPSILON = 1e-9
+
+Pattern = Tuple[int, Tuple[int, ...]]  # (stock length, count per piece length)
+
+
+class _Pricer:
+    """Bounded knapsack over all stock lengths, solved with a vectorized DP"""
+
+    def __init__(
+        self,
+        weights: Sequence[int],
+        bounds: Sequence[int],
+        capacities: Sequence[int],
+    ):
+        self.capacities = list(capacities)
+        self.size = max(self.capacities) + 1
+        # Binary splitting turns the bounded knapsack into a 0/1 knapsack
+        self.splits: List[Tuple[int, int]] = []  # (piece index, multiplicity)
+        for i, bound in enumerate(bounds):
+            k = 1
+            while bound > 0:
+                take = min(k, bound)
+                self.splits.append((i, take))
+                bound -= take
+                k *= 2
+        self.weights = list(weights)
+
+    def solve(self, values: np.ndarray) -> List[Tuple[float, List[int]]]:
+        """Return the best (value, counts) pattern for every capacity"""
+        dp = np.zeros(self.size)
+        take = np.zeros((len(self.splits), self.size), dtype=bool)
+        for k, (i, mult) in enumerate(self.splits):
+            if values[i] <= EPSILON:
+                continue
+            weight = self.weights[i] * mult
+            if weight >= self.size:
+                continue
+            candidate = dp[:-weight] + values[i] * mult
+            better = candidate > dp[weight:] + EPSILON
+            take[k, weight:] = better
+            dp[weight:] = np.where(better, candidate, dp[weight:])
+
+        results = []
+        for capacity in self.capacities:
+            counts = [0] * len(self.weights)
+            w = capacity
+            for k in range(len(self.splits) - 1, -1, -1):
+                if take[k, w]:
+                    i, mult = self.splits[k]
+                    counts[i] += mult
+                    w -= self.weights[i] * mult
+            results.append((float(dp[capacity]), counts))
+        return results
+
+
+def _solve_master(
+    costs: List[float],
+    columns: List[np.ndarray],
+    demand: np.ndarray,
+    basis: List[int],
+    deadline: float,
+) -> Tuple[np.ndarray, np.ndarray, List[int]]:
+    """Revised simplex for ``min c x`` s.t. ``A x - s = d``, ``x, s >= 0``.
+
+    Surplus columns are implicit: index ``-(i + 1)`` stands for ``-e_i``.
+
+    Returns:
+        The basic solution, the duals and the final basis
+    """
+    m = len(demand)
+
+    def column(j: int) -> np.ndarray:
+        if j >= 0:
+            return columns[j]
+        col = np.zeros(m)
+        col[-j - 1] = -1.0
+        return col
+
+    def cost(j: int) -> float:
+        return costs[j] if j >= 0 else 0.0
+
+    matrix = np.column_stack([column(j) for j in basis])
+    x_basis = np.linalg.solve(matrix, demand)
+    all_columns = np.column_stack(columns)
+    cost_vector = np.asarray(costs)
+    max_iterations = 50 * (m + len(columns))
+
+    for iteration in range(max_iterations):
+        duals = np.linalg.solve(matrix.T, np.array([cost(j) for j in basis]))
+        reduced = cost_vector - duals @ all_columns
+        reduced = np.concatenate([reduced, duals])  # Surplus columns last
+        reduced[[j if j >= 0 else len(columns) - j - 1 for j in basis]] = 0.0
+        candidates = np.flatnonzero(reduced < -1e-7)
+        entering = None
+        if len(candidates):
+            # Bland's rule after many iterations guards against cycling
+            if iteration > 10 * m:
+                k = int(candidates[0])
+            else:
+                k = int(candidates[np.argmin(reduced[candidates])])
+            entering = k if k < len(columns) else len(columns) - k - 1
+        if entering is None or time.perf_counter() > deadline:
+            return x_basis, duals, basis
+
+        direction = np.linalg.solve(matrix, column(entering))
+        positive = direction > EPSILON
+        if not positive.any():
+            return x_basis, duals, basis  # Cannot happen for covering problems
+        ratios = np.full(m, np.inf)
+        ratios[positive] = x_basis[positive] / direction[positive]
+        leaving = int(np.argmin(ratios))
+        step = ratios[leaving]
+
+        x_basis = x_basis - step * direction
+        x_basis[leaving] = step
+        basis[leaving] = entering
+        matrix[:, leaving] = column(entering)
+
+    duals = np.linalg.solve(matrix.T, np.array([cost(j) for j in basis]))
+    return x_basis, duals, basis
+
+
+def _round_solution(
+    patterns: List[Pattern],
+    x: Dict[int, float],
+    lengths: List[int],
+    demand: List[int],
+    labels: Dict[int, List[str]],
+    stock: List[int],
+    kerf: int,
+) -> List[Board]:
+    """Round the LP solution down and pack what is left heuristically"""
+    remaining = list(demand)
+    pools = {length: list(names) for length, names in labels.items()}
+    boards = []
+    for j, value in x.items():
+        stock_length, counts = patterns[j]
+        for _ in range(int(value + EPSILON)):
+            items = []
+            for i, count in enumerate(counts):
+                take = min(count, remaining[i])
+                remaining[i] -= take
+                items.extend((lengths[i], pools[lengths[i]].pop()) for _ in range(take))
+            if items:
+                boards.append(Board(stock_length, kerf, items))
+
+    leftover = [
+        (lengths[i], pools[lengths[i]].pop())
+        for i, count in enumerate(remaining)
+        for _ in range(count)
+    ]
+    boards, _ = pack_items(leftover, stock, kerf, boards=boards)
+    return improve_packing(boards, stock, kerf)
+
+
+def solve_wood_type(
+    wood_type_index: int,
+    wood_type: WoodType,
+    demands: Sequence[PieceDemand],
+    kerf: float = 0.0,
+    time_limit: float = 2.0,
+    remnants: Sequence[RemnantKey] = (),
+) -> CuttingPlan:
+    """Find a near-optimal cutting plan for one wood type within ``time_limit``
+    seconds, with a proven lower bound on the stock length needed.
+
+    Pieces that fit on the ``remnants`` are cut from them first; the
+    patterns and the bound cover the new stock for the rest.
+    """
+    deadline = time.perf_counter() + time_limit
+    stock = sorted({to_units(l) for l in wood_type.available_lengths if l > 0})
+    kerf_units = to_units(kerf)
+
+    remnant_boards, items = pack_remnants(expand_items(demands), remnants, kerf_units)
+    longest = stock[-1] if stock else 0
+    fits = [item for item in items if item[0] <= longest]
+    unplaced = [item for item in items if item[0] > longest]
+
+    # Heuristic incumbent, also used when the LP does not pay off
+    boards, _ = pack_items(fits, stock, kerf_units)
+    best = improve_packing(boards, stock, kerf_units)
+    best_length = sum(board.stock for board in best)
+    piece_length = sum(length for length, _ in fits)
+    lower_bound = float(piece_length)
+
+    labels: Dict[int, List[str]] = {}
+    for length, assembly in fits:
+        labels.setdefault(length, []).append(assembly)
+    lengths = sorted(labels, reverse=True)
+    demand = [len(labels[length]) for length in lengths]
+
+    if lengths and best_length > lower_bound and time.perf_counter() < deadline:
+        m = len(lengths)
+        weights = [length + kerf_units for length in lengths]
+        capacities = [s + kerf_units for s in stock]
+        pricer = _Pricer(
+            weights,
+            [min(d, capacities[-1] // w) for d, w in zip(demand, weights)],
+            capacities,
+        )
+
+        # Homogeneous patterns on the longest stock form a feasible basis
+        patterns: List[Pattern] = []
+        for i in range(m):
+            counts = [0] * m
+            counts[i] = min(demand[i], capacities[-1] // weights[i])
+            patterns.append((longest, tuple(counts)))
+        basis = list(range(m))
+        known = set(patterns)
+        position = {length: i for i, length in enumerate(lengths)}
+        for board in best:
+            counts = [0] * m
+            for length, _ in board.items:
+                counts[position[length]] += 1
+            if (board.stock, tuple(counts)) not in known:
+                known.add((board.stock, tuple(counts)))
+                patterns.append((board.stock, tuple(counts)))
+
+        d = np.asarray(demand, dtype=float)
+        x_basis = np.zeros(m)
+        while True:
+            x_basis, duals, basis = _solve_master(
+                [float(s) for s, _ in patterns],
+                [np.asarray(c, dtype=float) for _, c in patterns],
+                d,
+                basis,
+                deadline,
+            )
+            duals = np.maximum(duals, 0.0)
+            priced = pricer.solve(duals)
+            theta = max(value / s for (value, _), s in zip(priced, stock))
+            lower_bound = max(lower_bound, float(d @ duals) / max(theta, 1.0))
+
+            new = [
+                (s, tuple(counts))
+                for (value, counts), s in zip(priced, stock)
+                if value > s + 1e-6 and (s, tuple(counts)) not in known
+            ]
+            if not new or time.perf_counter() > deadline:
+                break
+            for pattern in new:
+                known.add(pattern)
+                patterns.append(pattern)
+
+        x = {j: float(v) for j, v in zip(basis, x_basis) if j >= 0 and v > EPSILON}
+        rounded = _round_solution(
+            patterns, x, lengths, demand, labels, stock, kerf_units
+        )
+        if sum(board.stock for board in rounded) < best_length:
+            best = rounded
+
+    plan = build_plan(
+        wood_type_index, wood_type, remnant_boards + best, unplaced, kerf_units
+    )
+    plan.lower_bound = to_meters(lower_bound)
+    plan.method = "patterns"
+    return plan
+
+
+def solve_cut_list(
+    project: Project,
+    catalog,
+    kerf: float = 0.0,
+    time_limit: float = 3.0,
+    inventory=None,
+) -> Dict[int, CuttingPlan]:
+    """Run the pattern solver for every wood type in the project, using the
+    remnants of ``inventory`` (a ``RemnantInventory``) first if given.
+
+    The time budget is shared: each wood type gets an even share of what
+    the previous ones left over.
+    """
+    deadline = time.perf_counter() + time_limit
+    demands = collect_demands(project, catalog)
+    plans = {}
+    for n, (index, wood_demands) in enumerate(demands.items()):
+        budget = max(deadline - time.perf_counter(), 0.0) / (len(demands) - n)
+        plans[index] = solve_wood_type(
+            index,
+            catalog.get_wood_type(index),
+            wood_demands,
+            kerf,
+            budget,
+            inventory.keys(catalog.row_ids[index]) if inventory is not None else (),
+        )
+    return plans
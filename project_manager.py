@@ -1,39 +1,247 @@
-import json
+import contextvars
 import os
-from pathlib import Path
+import threading
+from typing import TYPE_CHECKING, Dict, Hashable, List, NamedTuple, Optional
 
+from cache import LRUCache, project_digest
 from models.wood import Assembly, Project
+from storage.project_index import ProjectIndex, ProjectSummary
+from storage.project_store import AssemblyProjectStore, ProjectStore
+from storage.versioning import MISSING, merge_projects
+from storage.writer import BackgroundWriter
+from tracing import traced
+
+if TYPE_CHECKING:
+    from models.compact import CompactProject
+
+PROJECT_CACHE_SIZE = 8  # Parsed projects kept per manager
+
+
+class _Base(NamedTuple):
+    """What a session's copy of a project is based on"""
+
+    # Stored version the project was loaded at or saved as, or for a save
+    # merged with changes of other sessions, the version it was merged with
+    version: int
+    project: Project  # As loaded or saved by the session
 
 
 class ProjectManager:
-    def __init__(self, projects_dir: str = "projects"):
+    def __init__(
+        self,
+        projects_dir: str = "projects",
+        store: Optional[ProjectStore] = None,
+        cache_size: int = PROJECT_CACHE_SIZE,
+        codec: Optional[str] = None,
+        writer: Optional[BackgroundWriter] = None,
+        read_only: bool = False,
+    ):
+        """Initialize the project manager.
+
+        Args:
+            projects_dir: Directory holding the projects
+            store: Storage backend; by default every assembly is stored in
+                its own file, so saving after one assembly changed only
+                writes that assembly
+            cache_size: Number of parsed projects to keep
+            codec: Codec new files are written with, "json" (default),
+                "orjson" or "msgpack"; files in any codec are read
+            writer: Background writer that saves run on, coalescing quick
+                successive saves of a project; saves are synchronous
+                without one
+            read_only: Only load projects, writing nothing to
+                ``projects_dir`` (not even the index)
+        """
         self.projects_dir = projects_dir
-        # Create projects directory if it doesn't exist
-        os.makedirs(projects_dir, exist_ok=True)
-
-    def save_project(self, project: Project) -> None:
-        """Save a project to a JSON file"""
-        file_path = Path(self.projects_dir) / f"{project.name}.json"
-        with open(file_path, "w") as f:
-            json.dump(project.model_dump(), f, indent=2)
-
-    def load_project(self, project_name: str) -> Project:
-        """Load a project from a JSON file"""
-        file_path = Path(self.projects_dir) / f"{project_name}.json"
-        with open(file_path, "r") as f:
-            data = json.load(f)
-            return Project.model_validate(data)
+        # Creates the projects directory if it doesn't exist
+        self.store = store or AssemblyProjectStore(projects_dir, codec, read_only)
+        self.index = ProjectIndex(self.store)
+        # (path, mtime, size) -> (project, digest of its content when
+        # cached, stored version)
+        self._cache = LRUCache(max_entries=cache_size)
+        self.writer = writer
+        # Writes of one project are coalesced per manager (per session), so
+        # each session's save is merged with the others' rather than
+        # replacing it in the writer
+        self._writer_token = object()
+        self._bases: Dict[str, _Base] = {}
+        # The index and bases are also updated by the writer thread
+        self._index_lock = threading.Lock()
+
+    def _cache_key(self, project_name: str) -> Optional[Hashable]:
+        path = self.store.path(project_name)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return (str(path), stat.st_mtime_ns, stat.st_size)
+
+    def _remember(
+        self, project: Project, version: int, key: Optional[Hashable] = None
+    ) -> None:
+        key = key or self._cache_key(project.name)
+        if key is not None:
+            self._cache.put(key, (project, project_digest(project), version))
+        with self._index_lock:
+            self._bases[project.name] = _Base(version, self._snapshot(project))
+
+    def _write_key(self, project_name: str) -> Hashable:
+        return (os.path.abspath(self.projects_dir), project_name, self._writer_token)
+
+    @staticmethod
+    def _snapshot(project: Project) -> Project:
+        """A copy that later edits do not change. The UI replaces piece lists
+        and mutates the project and its assemblies, never the pieces."""
+        return project.model_copy(
+            update={
+                "assemblies": [assembly.model_copy() for assembly in project.assemblies]
+            }
+        )
+
+    @traced("project.write")
+    def _write(self, project: Project) -> None:
+        """Save a snapshot, merging in what other sessions saved since the
+        version it is based on"""
+        with self._index_lock:
+            base = self._bases.get(project.name)
+        if base is None:
+            # A new project, which must not overwrite one of the same name
+            self._remember(project, self.store.save(project, MISSING))
+            with self._index_lock:
+                self.index.update(project)
+            return
+
+        merged, merged_version = project, base.version
+
+        def merge(version: int, theirs: Project) -> Project:
+            nonlocal merged, merged_version
+            merged = merge_projects(base.project, project, theirs)
+            merged_version = version
+            return merged
+
+        version = self.store.save(project, base.version, merge)
+        with self._index_lock:
+            self.index.update(merged)
+        if merged is project:
+            # What was just written needs no reading back or validation
+            self._remember(project, version)
+        else:
+            # The session's copy lacks what was merged in; further saves of
+            # it merge again, and ``is_outdated`` tells to reload it
+            with self._index_lock:
+                self._bases[project.name] = _Base(merged_version, project)
+
+    @traced("project.save")
+    def save_project(self, project: Project, wait: bool = False) -> None:
+        """Save a project.
+
+        Saves are based on the version the project was loaded or last saved
+        at; if another session saved it since, the changes of both are
+        merged assembly by assembly. A project never loaded or saved by
+        this manager is new and must not exist yet. Failed saves raise
+        ``ConflictError`` (or report it through ``save_error``) when both
+        changed the same assembly, or the new project exists.
+
+        With a background writer, the project is copied and saved on the
+        writer's thread, unless ``wait`` is set or the project is new (so
+        that it is listed right away).
+        """
+        snapshot = self._snapshot(project)
+        if self.writer is None:
+            self._write(snapshot)
+            return
+        key = self._write_key(project.name)
+        # Run in the caller's context, so that the write joins its trace
+        context = contextvars.copy_context()
+        self.writer.submit(key, lambda: context.run(self._write, snapshot))
+        with self._index_lock:
+            is_new = self.index.get(project.name) is None
+        if wait or is_new:
+            self.writer.flush(key)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait for the pending background saves; False on timeout"""
+        if self.writer is None:
+            return True
+        return self.writer.flush(timeout=timeout)
+
+    def save_error(self, project_name: str) -> Optional[Exception]:
+        """The error of this manager's last background save of a project, if
+        it failed; other sessions' saves neither set nor clear it"""
+        if self.writer is None:
+            return None
+        return self.writer.failures.get(self._write_key(project_name))
+
+    def is_outdated(self, project_name: str) -> bool:
+        """Whether another session saved a project since this manager loaded
+        or saved it, so that it should be loaded again"""
+        with self._index_lock:
+            base = self._bases.get(project_name)
+        if base is None:
+            return False
+        return self.store.version(project_name) != base.version
+
+    @traced("project.load")
+    def load_project(self, project_name: str, verify: bool = False) -> Project:
+        """Load a project.
+
+        Projects are cached by file path, mtime and size, and a cached
+        project is returned as long as neither the file nor the project
+        object changed since. That includes projects saved by this manager,
+        which are never read back.
+
+        Args:
+            project_name: Name of the project
+            verify: Always read and fully validate the stored project
+        """
+        if self.writer is not None:
+            self.writer.flush(self._write_key(project_name))
+        key = self._cache_key(project_name)
+        if not verify and key is not None:
+            cached = self._cache.get(key)
+            # Unsaved in-place edits make the cached object differ from
+            # the file, in which case it is read again
+            if cached is not None and project_digest(cached[0]) == cached[1]:
+                project, _, version = cached
+                with self._index_lock:
+                    self._bases[project_name] = _Base(version, self._snapshot(project))
+                return project
+        version, data = self.store.load_versioned(project_name)
+        project = Project.model_validate(data)
+        # Keyed by the file as it was before reading, should it change since
+        self._remember(project, version, key)
+        return project
+
+    def load_compact_project(self, project_name: str) -> "CompactProject":
+        """Load a project into the compact array form"""
+        from models.compact import CompactProject
+
+        if self.writer is not None:
+            self.writer.flush(self._write_key(project_name))
+        return CompactProject.from_dict(self.store.load_data(project_name))
 
     def get_available_projects(self) -> list[str]:
         """Get a list of available project names"""
-        projects = []
-        for file in os.listdir(self.projects_dir):
-            if file.endswith(".json"):
-                projects.append(file[:-5])  # Remove .json extension
-        return sorted(projects)
+        with self._index_lock:
+            return self.index.names()
+
+    def get_project_summaries(self) -> List[ProjectSummary]:
+        """Get the summary of every project, without loading the projects"""
+        with self._index_lock:
+            return self.index.summaries()
+
+    def get_project_summary(self, project_name: str) -> Optional[ProjectSummary]:
+        """Get the summary of one project, without loading it"""
+        with self._index_lock:
+            self.index.refresh()
+            return self.index.get(project_name)
 
     def delete_project(self, project_name: str) -> None:
-        """Delete a project file"""
-        file_path = Path(self.projects_dir) / f"{project_name}.json"
-        if file_path.exists():
-            os.remove(file_path)
+        """Delete a project"""
+        if self.writer is not None:
+            # A save still waiting would bring the project back
+            self.writer.cancel(self._write_key(project_name))
+        self.store.delete(project_name)
+        with self._index_lock:
+            self.index.remove(project_name)
+            self._bases.pop(project_name, None)
@@ -0,0 +1,29 @@
+import os
+import tempfile
+from pathlib import Path
+from typing import Union
+
+
+def atomic_write(path: Union[str, Path], data: Union[str, bytes]) -> None:
+    """Write a file atomically: write a temp file next to it, flush it to
+    disk, then rename it over the target. A crash mid-write leaves either
+    the old or the new file, never a truncated one."""
+    path = Path(path)
+    mode = "wb" if isinstance(data, bytes) else "w"
+    fd, tmp_path = tempfile.mkstemp(
+        dir=path.parent, prefix=f".{path.name}.", suffix=".tmp"
+    )
+    try:
+        with os.fdopen(
+            fd, mode, **({} if mode == "wb" else {"encoding": "utf-8"})
+        ) as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
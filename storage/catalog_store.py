@@ -0,0 +1,349 @@
+"""Storage backends for ``WoodTypeCatalog``.
+
+``FileCatalogStore`` keeps the original ``{"wood_types": [...]}`` document
+in one file, encoded with a codec from ``storage.codecs`` (indented JSON by
+default), and writes it atomically. ``SqliteCatalogStore`` keeps one record
+per catalog row and only writes the rows that changed, inside a
+transaction, so large catalogs are not rewritten on every edit. JSON stays
+the import/export format for both.
+
+Both keep a catalog version, bumped on every write. Writes state the version
+they are based on and raise ``VersionConflict`` when another session wrote
+since: any write does for the file store, only a write of the same rows
+does for the SQLite store, which stamps every row (and every deleted row)
+with the version that last wrote it.
+"""
+
+import json
+import sqlite3
+from abc import ABC, abstractmethod
+from contextlib import closing
+from pathlib import Path
+from typing import Iterable, List, Optional, Sequence, Tuple, Union
+
+from models.wood import WoodType
+from storage.codecs import Codec, JsonCodec, codec_for_path, read_file, write_file
+from storage.versioning import VersionConflict, file_lock, lock_path
+
+Row = Tuple[int, WoodType]  # (stable row ID, wood type)
+
+SQLITE_SUFFIXES = (".db", ".sqlite", ".sqlite3")
+
+
+def wood_type_to_dict(wt: WoodType) -> dict:
+    return {
+        "width": wt.width,
+        "height": wt.height,
+        "price_per_meter": wt.price_per_meter,
+        "available_lengths": wt.available_lengths,
+        "description": wt.description,
+    }
+
+
+def wood_type_from_dict(item: dict) -> WoodType:
+    return WoodType(
+        width=item["width"],
+        height=item["height"],
+        price_per_meter=item["price_per_meter"],
+        available_lengths=item.get("available_lengths", []),
+        description=item.get("description", ""),
+    )
+
+
+def read_catalog_file(path: Union[str, Path]) -> List[WoodType]:
+    """Read wood types from a catalog file, in any codec"""
+    return [wood_type_from_dict(item) for item in read_file(path).get("wood_types", [])]
+
+
+def write_catalog_file(
+    path: Union[str, Path],
+    wood_types: Iterable[WoodType],
+    codec: Optional[Codec] = None,
+    version: Optional[int] = None,
+) -> None:
+    """Write wood types to a catalog file, atomically; the codec defaults to
+    indented JSON"""
+    data = {"wood_types": [wood_type_to_dict(wt) for wt in wood_types]}
+    if version is not None:
+        data["version"] = version
+    write_file(path, data, codec or JsonCodec())
+
+
+class CatalogStore(ABC):
+    """Interface of a catalog storage backend"""
+
+    @abstractmethod
+    def exists(self) -> bool:
+        """Whether the catalog was stored yet"""
+
+    def load(self) -> List[Row]:
+        """Load all rows, in catalog order"""
+        return self.load_versioned()[1]
+
+    @abstractmethod
+    def load_versioned(self) -> Tuple[int, List[Row]]:
+        """Load the catalog version and all rows, in catalog order"""
+
+    @abstractmethod
+    def version(self) -> int:
+        """The stored catalog version, 0 if never written"""
+
+    @abstractmethod
+    def write(
+        self,
+        rows: Sequence[Row],
+        changed: Optional[Iterable[int]] = None,
+        deleted: Iterable[int] = (),
+        expected_version: Optional[int] = None,
+    ) -> int:
+        """Persist the catalog and return its new version.
+
+        Args:
+            rows: The whole catalog, in order
+            changed: IDs of rows added or updated since the last write, or
+                None when everything may have changed
+            deleted: IDs of rows deleted since the last write
+            expected_version: Version the rows are based on; None writes
+                regardless of other sessions
+
+        Raises:
+            VersionConflict: Another session wrote since
+                ``expected_version``; its ``row_ids`` are the rows written
+                by both, if the store tells them apart
+        """
+
+
+class FileCatalogStore(CatalogStore):
+    """The catalog as a single file, rewritten atomically"""
+
+    def __init__(self, path: Union[str, Path], codec: Optional[Codec] = None):
+        self.path = Path(path)
+        self.codec = codec or codec_for_path(path)
+
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    def _lock(self):
+        return file_lock(lock_path(self.path.parent, self.path.name))
+
+    def load_versioned(self) -> Tuple[int, List[Row]]:
+        data = read_file(self.path)
+        wood_types = map(wood_type_from_dict, data.get("wood_types", []))
+        return data.get("version", 0), list(enumerate(wood_types))
+
+    def version(self) -> int:
+        if not self.path.exists():
+            return 0
+        return read_file(self.path).get("version", 0)
+
+    def write(self, rows, changed=None, deleted=(), expected_version=None) -> int:
+        with self._lock():
+            current = self.version()
+            if expected_version is not None and current != expected_version:
+                raise VersionConflict(self.path.name, expected_version, current)
+            write_catalog_file(
+                self.path, (wt for _, wt in rows), self.codec, current + 1
+            )
+        return current + 1
+
+
+class SqliteCatalogStore(CatalogStore):
+    """The catalog as one SQLite record per row.
+
+    Rows are ordered by a ``position`` column that is only assigned on
+    insert, so deleting a row does not touch the rows after it. Each row,
+    and each deleted row in ``deleted_wood_types``, records the catalog
+    version that last wrote it; a write based on an older version conflicts
+    only if it touches such a row.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS wood_types (
+            row_id INTEGER PRIMARY KEY,
+            position INTEGER NOT NULL,
+            width REAL NOT NULL,
+            height REAL NOT NULL,
+            price_per_meter REAL NOT NULL,
+            available_lengths TEXT NOT NULL DEFAULT '[]',
+            description TEXT NOT NULL DEFAULT '',
+            version INTEGER NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS deleted_wood_types (
+            row_id INTEGER PRIMARY KEY,
+            version INTEGER NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS catalog_meta (
+            key TEXT PRIMARY KEY,
+            value INTEGER NOT NULL
+        );
+    """
+    UPSERT = """
+        INSERT INTO wood_types (
+            row_id, position, width, height, price_per_meter,
+            available_lengths, description, version
+        )
+        VALUES (
+            ?, (SELECT COALESCE(MAX(position), -1) + 1 FROM wood_types),
+            ?, ?, ?, ?, ?, ?
+        )
+        ON CONFLICT(row_id) DO UPDATE SET
+            width = excluded.width,
+            height = excluded.height,
+            price_per_meter = excluded.price_per_meter,
+            available_lengths = excluded.available_lengths,
+            description = excluded.description,
+            version = excluded.version
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self._created = False
+
+    def _connect(self) -> sqlite3.Connection:
+        # Transactions are begun explicitly, see ``write``
+        conn = sqlite3.connect(self.path, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        if not self._created:
+            conn.executescript(self.SCHEMA)
+            self._created = True
+        return conn
+
+    @staticmethod
+    def _values(row_id: int, wt: WoodType) -> tuple:
+        return (
+            row_id,
+            wt.width,
+            wt.height,
+            wt.price_per_meter,
+            json.dumps(wt.available_lengths),
+            wt.description,
+        )
+
+    @staticmethod
+    def _version(conn: sqlite3.Connection) -> int:
+        row = conn.execute(
+            "SELECT value FROM catalog_meta WHERE key = 'version'"
+        ).fetchone()
+        return row[0] if row else 0
+
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    def version(self) -> int:
+        with closing(self._connect()) as conn:
+            return self._version(conn)
+
+    def load_versioned(self) -> Tuple[int, List[Row]]:
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN")  # Read the version and rows consistently
+            try:
+                return self._version(conn), self._load(conn)
+            finally:
+                conn.execute("COMMIT")
+
+    def _load(self, conn: sqlite3.Connection) -> List[Row]:
+        cursor = conn.execute(
+            "SELECT row_id, width, height, price_per_meter, available_lengths, "
+            "description FROM wood_types ORDER BY position"
+        )
+        return [
+            (
+                row_id,
+                WoodType(
+                    width=width,
+                    height=height,
+                    price_per_meter=price,
+                    available_lengths=json.loads(lengths),
+                    description=description,
+                ),
+            )
+            for row_id, width, height, price, lengths, description in cursor
+        ]
+
+    def write(self, rows, changed=None, deleted=(), expected_version=None) -> int:
+        with closing(self._connect()) as conn:
+            # Take the write lock before reading the version, so that no
+            # other write comes between the check and this one
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                version = self._write(conn, rows, changed, deleted, expected_version)
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+            return version
+
+    def _write(self, conn, rows, changed, deleted, expected_version) -> int:
+        current = self._version(conn)
+        version = current + 1
+        deleted = list(deleted)
+        if expected_version is not None and current != expected_version:
+            if changed is None:
+                raise VersionConflict(self.path.name, expected_version, current)
+            changed = list(changed)
+            # Rows written or deleted since, usually few
+            since = {
+                row_id
+                for table in ("wood_types", "deleted_wood_types")
+                for (row_id,) in conn.execute(
+                    f"SELECT row_id FROM {table} WHERE version > ?",
+                    (expected_version,),
+                )
+            }
+            conflicts = since.intersection([*changed, *deleted])
+            if conflicts:
+                raise VersionConflict(
+                    self.path.name, expected_version, current, sorted(conflicts)
+                )
+
+        if changed is None:
+            conn.execute("DELETE FROM wood_types")
+            conn.execute("DELETE FROM deleted_wood_types")
+            conn.executemany(
+                "INSERT INTO wood_types (row_id, position, width, height, "
+                "price_per_meter, available_lengths, description, version) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (row_id, position, *self._values(row_id, wt)[1:], version)
+                    for position, (row_id, wt) in enumerate(rows)
+                ],
+            )
+        else:
+            conn.executemany(
+                "DELETE FROM wood_types WHERE row_id = ?",
+                [(row_id,) for row_id in deleted],
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO deleted_wood_types (row_id, version) "
+                "VALUES (?, ?)",
+                [(row_id, version) for row_id in deleted],
+            )
+            by_id = dict(rows)
+            conn.executemany(
+                self.UPSERT,
+                [
+                    (*self._values(row_id, by_id[row_id]), version)
+                    for row_id in changed
+                    if row_id in by_id
+                ],
+            )
+        conn.execute(
+            "INSERT OR REPLACE INTO catalog_meta (key, value) VALUES ('version', ?)",
+            (version,),
+        )
+        return version
+
+
+def open_catalog_store(
+    path: Union[str, Path], codec: Optional[Codec] = None
+) -> CatalogStore:
+    """Pick the storage backend from the file extension.
+
+    Args:
+        path: The catalog file
+        codec: Codec of a file catalog; by default picked from the extension
+    """
+    if Path(path).suffix.lower() in SQLITE_SUFFIXES:
+        return SqliteCatalogStore(path)
+    return FileCatalogStore(path, codec)
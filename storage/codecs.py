@@ -0,0 +1,139 @@
+"""Serialization codecs for the project and catalog files.
+
+``json`` writes the indented JSON the app has always written. ``orjson``
+writes compact JSON with the ``orjson`` package, falling back to the
+standard library when it is not installed. ``msgpack`` writes MessagePack,
+a compact binary format, and needs the optional ``msgpack`` package.
+
+Files are decoded by looking at their first byte, so a store reads any of
+these formats whatever codec it writes with. JSON is always decoded with
+``orjson`` when it is available.
+"""
+
+import json
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+from storage.atomic import atomic_write
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _require_msgpack():
+    try:
+        import msgpack
+    except ImportError as e:
+        raise ImportError("The msgpack codec needs msgpack: pip install msgpack") from e
+    return msgpack
+
+
+def _loads_json(raw: bytes) -> Any:
+    return orjson.loads(raw) if orjson is not None else json.loads(raw)
+
+
+class Codec:
+    """Turns JSON-compatible data into bytes and back"""
+
+    name = ""
+    extension = ""
+
+    def dumps(self, data: Any) -> bytes:
+        raise NotImplementedError
+
+    def loads(self, raw: bytes) -> Any:
+        raise NotImplementedError
+
+
+class JsonCodec(Codec):
+    """Indented JSON, written with the standard library"""
+
+    name = "json"
+    extension = ".json"
+
+    def __init__(self, indent: Optional[int] = 2):
+        self.indent = indent
+
+    def dumps(self, data: Any) -> bytes:
+        return json.dumps(data, indent=self.indent).encode()
+
+    def loads(self, raw: bytes) -> Any:
+        return _loads_json(raw)
+
+
+class FastJsonCodec(JsonCodec):
+    """Compact JSON, written with orjson when it is installed"""
+
+    name = "orjson"
+
+    def __init__(self):
+        super().__init__(indent=None)
+
+    def dumps(self, data: Any) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(data)
+        return json.dumps(data, separators=(",", ":")).encode()
+
+
+class MsgpackCodec(Codec):
+    """MessagePack, a compact binary encoding of the same data"""
+
+    name = "msgpack"
+    extension = ".msgpack"
+
+    def dumps(self, data: Any) -> bytes:
+        return _require_msgpack().packb(data, use_bin_type=True)
+
+    def loads(self, raw: bytes) -> Any:
+        return _require_msgpack().unpackb(raw, raw=False)
+
+
+CODECS: Dict[str, Codec] = {
+    codec.name: codec for codec in (JsonCodec(), FastJsonCodec(), MsgpackCodec())
+}
+EXTENSIONS = (JsonCodec.extension, MsgpackCodec.extension)
+
+
+def get_codec(codec: Union[str, Codec, None] = None) -> Codec:
+    """Look up a codec by name; None gives the default JSON codec"""
+    if isinstance(codec, Codec):
+        return codec
+    if codec is None:
+        return CODECS["json"]
+    if codec not in CODECS:
+        raise ValueError(f"Unknown codec: {codec}")
+    return CODECS[codec]
+
+
+def codec_for_path(path: Union[str, Path]) -> Codec:
+    """Pick the codec from a file extension"""
+    if Path(path).suffix.lower() == MsgpackCodec.extension:
+        return CODECS["msgpack"]
+    return CODECS["json"]
+
+
+def detect_codec(raw: bytes, path: Union[str, Path, None] = None) -> Codec:
+    """Tell JSON from MessagePack by the first byte, else by the extension.
+
+    A JSON document starts with whitespace, ``{`` or ``[``; a MessagePack
+    map or array starts with a byte of 0x80 and above.
+    """
+    head = raw[:1]
+    if head in (b"{", b"[", b" ", b"\n", b"\r", b"\t"):
+        return CODECS["json"]
+    if head and head[0] >= 0x80:
+        return CODECS["msgpack"]
+    return codec_for_path(path) if path is not None else CODECS["json"]
+
+
+def read_file(path: Union[str, Path]) -> Any:
+    """Read and decode a file, whatever codec wrote it"""
+    raw = Path(path).read_bytes()
+    return detect_codec(raw, path).loads(raw)
+
+
+def write_file(path: Union[str, Path], data: Any, codec: Codec) -> None:
+    """Encode data and write it atomically"""
+    atomic_write(path, codec.dumps(data))
@@ -0,0 +1,174 @@
+"""Index of the stored projects with their summary figures.
+
+The index is kept in ``.index.json`` in the projects directory and updated
+on every save and delete. Each entry records the modification time and
+size of the project's file; an entry is only rebuilt when these change,
+e.g. because the project was edited by another session. Listing projects
+therefore stats their files instead of opening them.
+
+Piece lengths are kept per wood type, so the estimated cost follows catalog
+price changes without reopening any project.
+"""
+
+import json
+import os
+from bisect import insort
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional
+
+from storage.atomic import atomic_write
+from storage.project_store import ProjectStore
+
+INDEX_FILE = ".index.json"
+
+
+class ProjectSummary(NamedTuple):
+    """What the project lists show about a project"""
+
+    name: str
+    description: str
+    assembly_count: int
+    piece_count: int
+    lengths: Dict[int, float]  # Wood type index -> total length in metres
+
+    def estimated_cost(self, catalog) -> float:
+        """Cost of the wood at the catalog's current prices"""
+        total = 0.0
+        for index, length in self.lengths.items():
+            wood_type = catalog.get_wood_type(index)
+            if wood_type is not None:
+                total += length * wood_type.price_per_meter
+        return total
+
+
+def summarize_project(project) -> ProjectSummary:
+    """Summarize a ``Project`` or ``CompactProject``"""
+    import numpy as np
+
+    from core.columnar import as_columns
+
+    columns = as_columns(project)
+    lengths = columns.length * columns.quantity * columns.units
+    valid = columns.wood_type_index >= 0
+    by_type = np.bincount(columns.wood_type_index[valid], weights=lengths[valid])
+    return ProjectSummary(
+        name=project.name,
+        description=project.description,
+        assembly_count=len(columns.assembly_names),
+        piece_count=len(columns),
+        lengths={
+            int(index): float(by_type[index]) for index in np.flatnonzero(by_type)
+        },
+    )
+
+
+def _compact(data: dict):
+    from models.compact import CompactProject
+
+    return CompactProject.from_dict(data)
+
+
+class ProjectIndex:
+    """Summaries of every project in a store, validated by file mtime"""
+
+    def __init__(self, store: ProjectStore):
+        self.store = store
+        self.path = Path(store.projects_dir) / INDEX_FILE
+        self._entries: Dict[str, dict] = {}
+        self._dir_mtime: Optional[int] = None
+        self._names: List[str] = []
+        self._read()
+
+    def _read(self) -> None:
+        try:
+            with open(self.path, "r") as f:
+                self._entries = json.load(f).get("projects", {})
+        except (OSError, ValueError):
+            self._entries = {}
+
+    def _write(self) -> None:
+        if self.store.read_only:
+            return  # Kept in memory only
+        atomic_write(self.path, json.dumps({"projects": self._entries}))
+
+    def _stamp(self, name: str) -> Optional[List[int]]:
+        try:
+            stat = os.stat(self.store.path(name))
+        except OSError:
+            return None
+        return [stat.st_mtime_ns, stat.st_size]
+
+    def _entry(self, name: str, summary: ProjectSummary, stamp: List[int]) -> dict:
+        data = summary._asdict()
+        data["lengths"] = {
+            str(index): length for index, length in summary.lengths.items()
+        }
+        data["stamp"] = stamp
+        return data
+
+    def refresh(self) -> None:
+        """Bring the index up to date with the files on disk"""
+        changed = False
+        dir_mtime = os.stat(self.store.projects_dir).st_mtime_ns
+        if dir_mtime != self._dir_mtime:
+            self._names = self.store.names()
+            self._dir_mtime = dir_mtime
+            for name in set(self._entries) - set(self._names):
+                del self._entries[name]
+                changed = True
+
+        for name in self._names:
+            stamp = self._stamp(name)
+            entry = self._entries.get(name)
+            if stamp is None or (entry and entry["stamp"] == stamp):
+                continue
+            try:
+                project = _compact(self.store.load_data(name))
+            except (OSError, ValueError, KeyError):
+                continue  # Unreadable, e.g. being replaced right now
+            self._entries[name] = self._entry(name, summarize_project(project), stamp)
+            changed = True
+
+        if changed:
+            self._write()
+
+    def names(self) -> List[str]:
+        """Names of the indexed projects, sorted"""
+        self.refresh()
+        return [name for name in self._names if name in self._entries]
+
+    def summaries(self) -> List[ProjectSummary]:
+        """Summaries of all projects, sorted by name"""
+        return [self.get(name) for name in self.names()]
+
+    def get(self, name: str) -> Optional[ProjectSummary]:
+        """Summary of one project, as of the last refresh"""
+        entry = self._entries.get(name)
+        if entry is None:
+            return None
+        return ProjectSummary(
+            name=entry["name"],
+            description=entry["description"],
+            assembly_count=entry["assembly_count"],
+            piece_count=entry["piece_count"],
+            lengths={int(index): length for index, length in entry["lengths"].items()},
+        )
+
+    def update(self, project) -> None:
+        """Record a project that was just saved"""
+        stamp = self._stamp(project.name)
+        if stamp is None:
+            return
+        self._entries[project.name] = self._entry(
+            project.name, summarize_project(project), stamp
+        )
+        if project.name not in self._names:
+            insort(self._names, project.name)
+        self._write()
+
+    def remove(self, name: str) -> None:
+        """Forget a project that was just deleted"""
+        if name in self._names:
+            self._names.remove(name)
+        if self._entries.pop(name, None) is not None:
+            self._write()
@@ -0,0 +1,317 @@
+"""Storage backends for ``ProjectManager``.
+
+``FileProjectStore`` keeps every project in one ``<name>.json`` file.
+``AssemblyProjectStore`` keeps a project as a directory::
+
+    <name>/project.json            name, description, assembly files in order
+    <name>/assemblies/<key>.json   one file per assembly
+
+Assembly files are named by a digest of their content, so saving a project
+after one assembly changed writes that assembly and the small manifest,
+and leaves every other file alone. Projects saved by the single-file store
+are still read, and are moved to the directory layout on their next save.
+
+Both stores encode files with a codec from ``storage.codecs``, indented
+JSON by default, and read files written with any codec.
+
+Stored projects carry a version number. Saves take the version they are
+based on; if another session saved the project since, they either merge
+with what it saved or raise ``VersionConflict``. The check, the merge and
+the write happen under the project's own lock file, which is deleted with
+the project. Loads take no lock: assembly files never change once written,
+so a load that races a save either reads a complete older version or finds
+a file gone and starts over.
+"""
+
+import os
+import shutil
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from cache import digest
+from models.wood import Project
+from storage.atomic import atomic_write
+from storage.codecs import EXTENSIONS, Codec, get_codec, read_file, write_file
+from storage.versioning import (
+    MISSING,
+    VersionConflict,
+    file_lock,
+    lock_path,
+    remove_lock,
+)
+
+MANIFEST = "project"
+ASSEMBLIES = "assemblies"
+LOAD_ATTEMPTS = 5  # Loads tried while saves keep replacing the project
+
+# Combines a project being saved with the stored one at the given version
+Merge = Callable[[int, Project], Project]
+
+
+class ProjectStore(ABC):
+    """Interface of a project storage backend"""
+
+    def __init__(
+        self,
+        projects_dir: Union[str, Path],
+        codec: Union[str, Codec, None] = None,
+        read_only: bool = False,
+    ):
+        """Open the projects in a directory.
+
+        Args:
+            projects_dir: Directory of the projects, created unless
+                ``read_only``
+            codec: Codec new files are written with
+            read_only: Only read the projects; saves and deletes fail and
+                nothing is written to the directory
+        """
+        self.projects_dir = Path(projects_dir)
+        self.codec = get_codec(codec)
+        self.read_only = read_only
+        if not read_only:
+            os.makedirs(self.projects_dir, exist_ok=True)
+
+    def _check_writable(self) -> None:
+        if self.read_only:
+            raise PermissionError(f"{self.projects_dir} is opened read-only")
+
+    @abstractmethod
+    def names(self) -> List[str]:
+        """Names of the stored projects"""
+
+    @abstractmethod
+    def path(self, name: str) -> Path:
+        """The file that identifies a stored project"""
+
+    def load_data(self, name: str) -> Dict[str, Any]:
+        """Load a project as ``Project.model_dump()`` data"""
+        return self.load_versioned(name)[1]
+
+    def load_versioned(self, name: str) -> Tuple[int, Dict[str, Any]]:
+        """Load a project's version and ``Project.model_dump()`` data"""
+        for attempt in range(LOAD_ATTEMPTS):
+            try:
+                return self._load_versioned(name)
+            except FileNotFoundError:
+                # A save removed a file midway, or there is no such project
+                if attempt == LOAD_ATTEMPTS - 1 or self.version(name) is None:
+                    raise
+
+    @abstractmethod
+    def _load_versioned(self, name: str) -> Tuple[int, Dict[str, Any]]:
+        """``load_versioned`` without the retries"""
+
+    @abstractmethod
+    def version(self, name: str) -> Optional[int]:
+        """Version of a stored project, None if there is no such project"""
+
+    @abstractmethod
+    def save(
+        self,
+        project: Project,
+        expected_version: Optional[int] = None,
+        merge: Optional[Merge] = None,
+    ) -> int:
+        """Save a project and return its new version.
+
+        Args:
+            project: The project
+            expected_version: Version the project is based on, ``MISSING``
+                for a project that must not exist yet, or None to save over
+                whatever is stored
+            merge: Called with the stored version and project if that is not
+                ``expected_version``; what it returns is saved instead
+
+        Raises:
+            VersionConflict: The stored version is not ``expected_version``
+                and there is no ``merge``, or the project was deleted
+        """
+
+    def _resolve(
+        self, project: Project, expected: Optional[int], merge: Optional[Merge]
+    ) -> Tuple[Project, int]:
+        """The project to save and its new version; call under the lock"""
+        current = self.version(project.name)
+        if expected is None or (MISSING if current is None else current) == expected:
+            return project, (current or 0) + 1
+        if merge is None or current is None or expected == MISSING:
+            raise VersionConflict(project.name, expected, current)
+        version, data = self._load_versioned(project.name)
+        return merge(version, Project.model_validate(data)), version + 1
+
+    @abstractmethod
+    def delete(self, name: str) -> None:
+        """Remove a stored project, with its lock file"""
+
+
+def _existing(base: Path, preferred: str) -> Optional[Path]:
+    """The file ``base`` + a known extension that exists, if any"""
+    for extension in (preferred, *EXTENSIONS):
+        path = base.with_name(base.name + extension)
+        if path.exists():
+            return path
+    return None
+
+
+class FileProjectStore(ProjectStore):
+    """One file per project"""
+
+    def names(self) -> List[str]:
+        return sorted(
+            {
+                stem
+                for stem, extension in map(
+                    os.path.splitext, os.listdir(self.projects_dir)
+                )
+                if extension in EXTENSIONS and not stem.startswith(".")
+            }
+        )
+
+    def _file(self, name: str) -> Path:
+        base = self.projects_dir / name
+        return _existing(base, self.codec.extension) or base.with_name(
+            name + self.codec.extension
+        )
+
+    def path(self, name: str) -> Path:
+        return self._file(name)
+
+    def _load_versioned(self, name: str) -> Tuple[int, Dict[str, Any]]:
+        data = read_file(self._file(name))
+        return data.pop("version", 0), data
+
+    def version(self, name: str) -> Optional[int]:
+        path = _existing(self.projects_dir / name, self.codec.extension)
+        if path is None:
+            return None
+        return read_file(path).get("version", 0)
+
+    def save(
+        self,
+        project: Project,
+        expected_version: Optional[int] = None,
+        merge: Optional[Merge] = None,
+    ) -> int:
+        self._check_writable()
+        with file_lock(lock_path(self.projects_dir, project.name)):
+            project, version = self._resolve(project, expected_version, merge)
+            path = self.projects_dir / (project.name + self.codec.extension)
+            write_file(path, {**project.model_dump(), "version": version}, self.codec)
+            self._delete_files(project.name, keep=path)
+        return version
+
+    def _delete_files(self, name: str, keep: Optional[Path] = None) -> None:
+        for extension in EXTENSIONS:
+            path = self.projects_dir / (name + extension)
+            if path != keep and path.exists():
+                os.remove(path)
+
+    def delete(self, name: str) -> None:
+        self._check_writable()
+        lock = lock_path(self.projects_dir, name)
+        with file_lock(lock):
+            self._delete_files(name)
+            remove_lock(lock)
+
+
+class AssemblyProjectStore(FileProjectStore):
+    """One directory per project, with one file per assembly"""
+
+    def _manifest(self, name: str) -> Optional[Path]:
+        return _existing(self.projects_dir / name / MANIFEST, self.codec.extension)
+
+    def names(self) -> List[str]:
+        names = set(super().names())
+        for entry in os.scandir(self.projects_dir):
+            if (
+                entry.is_dir()
+                and not entry.name.startswith(".")
+                and self._manifest(entry.name) is not None
+            ):
+                names.add(entry.name)
+        return sorted(names)
+
+    def path(self, name: str) -> Path:
+        manifest = self._manifest(name)
+        if manifest is None and self._file(name).exists():
+            return self._file(name)
+        return manifest or self.projects_dir / name / (MANIFEST + self.codec.extension)
+
+    def _load_versioned(self, name: str) -> Tuple[int, Dict[str, Any]]:
+        manifest_path = self._manifest(name)
+        if manifest_path is None:
+            return super()._load_versioned(name)
+        manifest = read_file(manifest_path)
+        assembly_dir = manifest_path.parent / ASSEMBLIES
+        return manifest.get("version", 0), {
+            "name": manifest["name"],
+            "assemblies": [
+                read_file(assembly_dir / file)
+                for file in manifest.get("assemblies", [])
+            ],
+            "description": manifest.get("description", ""),
+        }
+
+    def version(self, name: str) -> Optional[int]:
+        manifest_path = self._manifest(name)
+        if manifest_path is None:
+            return super().version(name)
+        return read_file(manifest_path).get("version", 0)
+
+    def save(
+        self,
+        project: Project,
+        expected_version: Optional[int] = None,
+        merge: Optional[Merge] = None,
+    ) -> int:
+        self._check_writable()
+        with file_lock(lock_path(self.projects_dir, project.name)):
+            project, version = self._resolve(project, expected_version, merge)
+            self._save(project, version)
+        return version
+
+    def _save(self, project: Project, version: int) -> None:
+        project_dir = self.projects_dir / project.name
+        assembly_dir = project_dir / ASSEMBLIES
+        os.makedirs(assembly_dir, exist_ok=True)
+
+        files = []
+        for assembly in project.assemblies:
+            raw = self.codec.dumps(assembly.model_dump())
+            file = digest(raw) + self.codec.extension
+            if not (assembly_dir / file).exists():
+                atomic_write(assembly_dir / file, raw)
+            files.append(file)
+
+        # The manifest is the commit point: assemblies it does not list are
+        # only removed once it has been replaced
+        manifest = self.codec.dumps(
+            {
+                "name": project.name,
+                "description": project.description,
+                "assemblies": files,
+                "version": version,
+            }
+        )
+        manifest_path = project_dir / (MANIFEST + self.codec.extension)
+        atomic_write(manifest_path, manifest)
+        for extension in EXTENSIONS:
+            stale = project_dir / (MANIFEST + extension)
+            if stale != manifest_path and stale.exists():
+                os.remove(stale)
+
+        referenced = set(files)
+        for file in os.listdir(assembly_dir):
+            if file.endswith(EXTENSIONS) and file not in referenced:
+                os.remove(assembly_dir / file)
+        self._delete_files(project.name)  # Drop the single-file copy, if any
+
+    def delete(self, name: str) -> None:
+        self._check_writable()
+        lock = lock_path(self.projects_dir, name)
+        with file_lock(lock):
+            shutil.rmtree(self.projects_dir / name, ignore_errors=True)
+            self._delete_files(name)
+            remove_lock(lock)
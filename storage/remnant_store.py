@@ -0,0 +1,99 @@
+"""SQLite storage for the remnant inventory.
+
+One record per remnant, keyed by an autoincrement ID and holding the stable
+row ID of its wood type in the catalog, so that remnants keep their wood
+type when catalog rows are added, moved or deleted. The table can live in
+the catalog database next to ``wood_types``; additions and removals are
+written together in one transaction, which bumps the stored version.
+"""
+
+import sqlite3
+from contextlib import closing
+from pathlib import Path
+from typing import Iterable, List, Sequence, Tuple, Union
+
+StoredRemnant = Tuple[int, int, float]  # (ID, catalog row ID, length in metres)
+
+
+class SqliteRemnantStore:
+    """Remnants as SQLite records"""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS remnants (
+            remnant_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            row_id INTEGER NOT NULL,
+            length REAL NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS remnant_meta (
+            key TEXT PRIMARY KEY,
+            value INTEGER NOT NULL
+        );
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self._created = False
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        if not self._created:
+            conn.executescript(self.SCHEMA)
+            self._created = True
+        return conn
+
+    @staticmethod
+    def _version(conn: sqlite3.Connection) -> int:
+        row = conn.execute(
+            "SELECT value FROM remnant_meta WHERE key = 'version'"
+        ).fetchone()
+        return row[0] if row else 0
+
+    def version(self) -> int:
+        """The stored inventory version, 0 if never written"""
+        with closing(self._connect()) as conn:
+            return self._version(conn)
+
+    def load_versioned(self) -> Tuple[int, List[StoredRemnant]]:
+        """Load the inventory version and all remnants"""
+        with closing(self._connect()) as conn, conn:
+            return (
+                self._version(conn),
+                conn.execute(
+                    "SELECT remnant_id, row_id, length FROM remnants"
+                ).fetchall(),
+            )
+
+    def load(self) -> List[StoredRemnant]:
+        return self.load_versioned()[1]
+
+    def update(
+        self,
+        added: Sequence[Tuple[int, float]] = (),
+        removed: Iterable[int] = (),
+    ) -> Tuple[int, List[int]]:
+        """Remove and add remnants in one transaction.
+
+        Returns:
+            The new inventory version and the IDs of the added remnants
+        """
+        with closing(self._connect()) as conn, conn:
+            conn.executemany(
+                "DELETE FROM remnants WHERE remnant_id = ?",
+                [(remnant_id,) for remnant_id in removed],
+            )
+            ids = [
+                conn.execute(
+                    "INSERT INTO remnants (row_id, length) VALUES (?, ?)",
+                    (row_id, length),
+                ).lastrowid
+                for row_id, length in added
+            ]
+            version = self._version(conn) + 1
+            conn.execute(
+                "INSERT OR REPLACE INTO remnant_meta (key, value) "
+                "VALUES ('version', ?)",
+                (version,),
+            )
+            return version, ids
@@ -0,0 +1,184 @@
+"""Version checks for stores shared by concurrent sessions.
+
+Every stored project and catalog carries a version number, bumped on each
+save. A save states the version its data is based on, and when the stored
+version moved on in the meantime it is merged with what was stored or fails
+with ``VersionConflict`` (compare-and-swap). The check and the write happen
+under an advisory lock held for that one project, or in one SQLite
+transaction for the catalog, so saves of different projects never wait for
+each other.
+
+``merge_projects`` combines the edits of two sessions to one project when
+they changed different assemblies.
+"""
+
+import os
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Hashable, Iterable, Iterator, List, Optional, Tuple, Union
+
+from models.wood import Assembly, Project
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+MISSING = -1  # Expected version of an item that must not be stored yet
+
+
+class ConflictError(Exception):
+    """Another session changed the same data"""
+
+
+class VersionConflict(ConflictError):
+    """The stored version is not the one the save was based on"""
+
+    def __init__(
+        self,
+        name: str,
+        expected: Optional[int],
+        current: Optional[int],  # None if it was deleted
+        row_ids: Iterable[int] = (),
+    ):
+        self.name = name
+        self.expected = expected
+        self.current = current
+        self.row_ids = list(row_ids)  # Catalog rows changed by both sides
+        if expected == MISSING:
+            message = f"{name} already exists"
+        elif current is None:
+            message = f"{name} was deleted in another session"
+        else:
+            message = (
+                f"{name} is at version {current}, the save was based on {expected}"
+            )
+        super().__init__(message)
+
+
+class MergeConflict(ConflictError):
+    """Both sessions changed the same assemblies (or the description)"""
+
+    def __init__(self, name: str, assemblies: List[str]):
+        self.name = name
+        self.assemblies = assemblies
+        super().__init__(
+            f"{name} was changed in another session: " + ", ".join(assemblies)
+        )
+
+
+def _lock(f, shared: bool) -> None:
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+    else:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+
+
+def _unlock(f) -> None:
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+    else:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _is_current(f, path: Union[str, Path]) -> bool:
+    """Whether ``path`` still names the open file ``f``"""
+    try:
+        return os.stat(path).st_ino == os.fstat(f.fileno()).st_ino
+    except FileNotFoundError:
+        return False
+
+
+@contextmanager
+def file_lock(path: Union[str, Path], shared: bool = False) -> Iterator[None]:
+    """Hold an advisory lock on ``path``, created if needed. Shared locks
+    only exclude exclusive ones; Windows has exclusive locks only.
+
+    The holder of an exclusive lock may delete the file with
+    ``remove_lock``; whoever was waiting on it then locks a new one.
+    """
+    while True:
+        f = open(path, "a+b")
+        try:
+            _lock(f, shared)
+        except BaseException:
+            f.close()
+            raise
+        if fcntl is None or _is_current(f, path):
+            break
+        _unlock(f)  # Removed while waiting
+        f.close()
+    try:
+        yield
+    finally:
+        _unlock(f)
+        f.close()
+
+
+def remove_lock(path: Union[str, Path]) -> None:
+    """Delete a lock file while holding its exclusive lock"""
+    if fcntl is None:
+        return  # Open files cannot be deleted on Windows
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _by_name(project: Project) -> Dict[Hashable, Assembly]:
+    """Assemblies keyed by name, and by occurrence for repeated names"""
+    seen: Dict[str, int] = {}
+    keyed = {}
+    for assembly in project.assemblies:
+        n = seen.get(assembly.name, 0)
+        seen[assembly.name] = n + 1
+        keyed[(assembly.name, n)] = assembly
+    return keyed
+
+
+def _pick(base, ours, theirs) -> Tuple[bool, object]:
+    """Three-way pick of one value; None stands for absent. Returns whether
+    the sides agree or only one changed, and the value to keep."""
+    if ours == theirs or theirs == base:
+        return True, ours
+    if ours == base:
+        return True, theirs
+    return False, ours
+
+
+def merge_projects(base: Project, ours: Project, theirs: Project) -> Project:
+    """Merge two edits of the project ``base``, assembly by assembly.
+
+    An assembly changed, added or deleted on one side only takes that
+    side's version; deleting an assembly the other side changed conflicts.
+    Assemblies keep the order of ``theirs``, followed by the ones only
+    ``ours`` added.
+
+    Raises:
+        MergeConflict: Both sides changed the same assembly (or the
+            description) differently
+    """
+    b, o, t = _by_name(base), _by_name(ours), _by_name(theirs)
+    conflicts = []
+    assemblies = []
+    for key in [*t, *(key for key in o if key not in t)]:
+        ok, assembly = _pick(b.get(key), o.get(key), t.get(key))
+        if not ok:
+            conflicts.append(key[0])
+        elif assembly is not None:
+            assemblies.append(assembly)
+
+    ok, description = _pick(base.description, ours.description, theirs.description)
+    if not ok:
+        conflicts.append("description")
+    if conflicts:
+        raise MergeConflict(ours.name, conflicts)
+    return Project(name=ours.name, description=description, assemblies=assemblies)
+
+
+def lock_path(directory: Union[str, Path], name: str) -> Path:
+    """The lock file of a stored item; dotfiles are not listed as projects"""
+    return Path(directory) / f".{name}.lock"
@@ -0,0 +1,151 @@
+"""Debounced background writes.
+
+``BackgroundWriter`` runs writes on a worker thread, so saving does not
+block the Streamlit script. Writes are keyed, e.g. by project file: a write
+submitted while an earlier one with the same key is still waiting replaces
+it, so a burst of saves of one project writes it once. A write runs once
+its key has been quiet for ``delay`` seconds, and at the latest
+``max_delay`` seconds after the first write it replaced.
+
+Pending writes are flushed when the process exits. ``flush`` writes them
+right away and waits, for callers that need the data on disk.
+"""
+
+import atexit
+import threading
+import time
+from typing import Callable, Dict, Hashable, Optional
+
+DEBOUNCE_DELAY = 0.5  # Seconds without new writes before a key is written
+MAX_DELAY = 5.0  # Seconds a write may be postponed by newer ones
+
+Write = Callable[[], None]
+
+
+class _Pending:
+    __slots__ = ("first", "due", "write")
+
+    def __init__(self, first: float, due: float, write: Write):
+        self.first = first
+        self.due = due
+        self.write = write
+
+
+class BackgroundWriter:
+    """Runs keyed writes on a worker thread, coalescing writes of one key"""
+
+    def __init__(self, delay: float = DEBOUNCE_DELAY, max_delay: float = MAX_DELAY):
+        self.delay = delay
+        self.max_delay = max_delay
+        # Key -> error of its last write; submitters use keys of their own
+        # to see only their errors
+        self.failures: Dict[Hashable, Exception] = {}
+        self._pending: Dict[Hashable, _Pending] = {}
+        self._running: Optional[Hashable] = None
+        self._closed = False
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    def submit(self, key: Hashable, write: Write) -> None:
+        """Schedule a write, replacing a waiting write with the same key"""
+        with self._cond:
+            closed = self._closed
+            if not closed:
+                self._schedule(key, write)
+        if closed:
+            self._run(key, write)
+
+    def _schedule(self, key: Hashable, write: Write) -> None:
+        now = time.monotonic()
+        previous = self._pending.get(key)
+        first = previous.first if previous else now
+        due = min(now + self.delay, first + self.max_delay)
+        self._pending[key] = _Pending(first, due, write)
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._work, name="background-writer", daemon=True
+            )
+            self._thread.start()
+        self._cond.notify_all()
+
+    def is_pending(self, key: Hashable) -> bool:
+        """Whether a write of ``key`` is waiting or running"""
+        with self._cond:
+            return key in self._pending or self._running == key
+
+    def cancel(self, key: Hashable) -> None:
+        """Drop the waiting write of ``key`` and wait for a running one"""
+        with self._cond:
+            self._pending.pop(key, None)
+            self._cond.wait_for(lambda: self._running != key)
+
+    def flush(self, key: Optional[Hashable] = None, timeout: Optional[float] = None):
+        """Write the waiting writes (of ``key`` only, if given) now and wait
+        for them; returns False if ``timeout`` ran out first"""
+        with self._cond:
+            for pending_key, pending in self._pending.items():
+                if key is None or pending_key == key:
+                    pending.due = 0.0
+            self._cond.notify_all()
+            if key is None:
+                done = lambda: not self._pending and self._running is None
+            else:
+                done = lambda: key not in self._pending and self._running != key
+            if self._thread is None:
+                # Only reached after close(), which leaves nothing pending
+                return done()
+            return self._cond.wait_for(done, timeout)
+
+    def close(self) -> None:
+        """Flush, then stop the worker; later writes run synchronously"""
+        self.flush()
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self, key: Hashable, write: Write) -> None:
+        try:
+            write()
+        except Exception as e:  # Kept for the caller, the worker carries on
+            self.failures[key] = e
+        else:
+            self.failures.pop(key, None)
+
+    def _work(self) -> None:
+        while True:
+            with self._cond:
+                while True:
+                    if not self._pending:
+                        if self._closed:
+                            return
+                        self._cond.wait()
+                        continue
+                    key = min(self._pending, key=lambda k: self._pending[k].due)
+                    wait = self._pending[key].due - time.monotonic()
+                    if wait <= 0:
+                        break
+                    self._cond.wait(wait)
+                write = self._pending.pop(key).write
+                self._running = key
+            try:
+                self._run(key, write)
+            finally:
+                with self._cond:
+                    self._running = None
+                    self._cond.notify_all()
+
+
+_writer: Optional[BackgroundWriter] = None
+_writer_lock = threading.Lock()
+
+
+def get_writer() -> BackgroundWriter:
+    """Return the writer shared by all sessions, creating it if needed"""
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = BackgroundWriter()
+            atexit.register(_writer.close)
+        return _writer
@@ -0,0 +1,51 @@
+import csv
+import os
+
+import batch
+from benchmarks.workload import generate_project, generate_wood_types
+from project_manager import ProjectManager
+from storage.catalog_store import write_catalog_file
+
+
+def listing(directory):
+    """Every file and directory below ``directory`` with its mtime"""
+    return sorted(
+        (os.path.relpath(path, directory), os.stat(path).st_mtime_ns)
+        for root, dirs, files in os.walk(directory)
+        for path in (os.path.join(root, name) for name in dirs + files)
+    )
+
+
+def test_same_project_name_from_two_sources(tmp_path):
+    catalog = tmp_path / "catalog.json"
+    write_catalog_file(catalog, generate_wood_types(5))
+    sources = [tmp_path / "first", tmp_path / "second"]
+    for seed, source in enumerate(sources):
+        ProjectManager(source).save_project(
+            generate_project("Table", 2, 3, wood_types=5, seed=seed)
+        )
+    before = [listing(source) for source in sources]
+    output = tmp_path / "out"
+
+    status = batch.main(
+        [*map(str, sources), "--catalog", str(catalog), "--output", str(output)]
+        + ["--workers", "1"]
+    )
+
+    assert status == 0
+    assert (output / "Table" / "summary.csv").exists()
+    assert (output / "Table (2)" / "summary.csv").exists()
+    with open(output / "report.csv") as f:
+        assert [row["Project"] for row in csv.DictReader(f)] == ["Table", "Table (2)"]
+    # Sources are only read
+    assert [listing(source) for source in sources] == before
+
+
+def test_a_source_given_twice_is_processed_once(tmp_path):
+    ProjectManager(tmp_path / "projects").save_project(
+        generate_project("Table", 1, 1, wood_types=5)
+    )
+    jobs = batch.find_projects(
+        [str(tmp_path / "projects"), str(tmp_path / "projects") + "/"]
+    )
+    assert [job.output_name for job in jobs] == ["Table"]
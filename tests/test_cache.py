@@ -0,0 +1,103 @@
+import pytest
+
+from benchmarks.workload import generate_project, generate_wood_types
+from cache import LRUCache, project_digest
+from catalog import WoodTypeCatalog
+from models.compact import CompactProject
+from storage.catalog_store import write_catalog_file
+
+
+def test_lru_eviction_order():
+    cache = LRUCache(max_entries=3)
+    for key in "abc":
+        cache.put(key, key.upper())
+    assert cache.get("a") == "A"  # "b" is now the least recently used
+    cache.put("d", "D")
+    assert "b" not in cache
+    assert len(cache) == 3
+
+    cache.put("c", "C2")  # Storing also counts as a use
+    cache.put("e", "E")
+    assert "a" not in cache
+    assert [key for key in "abcde" if key in cache] == ["c", "d", "e"]
+    assert cache.get("c") == "C2"
+
+
+def test_lru_hits_and_misses():
+    cache = LRUCache(max_entries=1)
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return len(calls)
+
+    assert cache.get_or_compute("a", compute) == 1
+    assert cache.get_or_compute("a", compute) == 1
+    assert cache.get_or_compute("b", compute) == 2
+    assert cache.get_or_compute("a", compute) == 3  # Evicted by "b"
+    assert (cache.hits, cache.misses) == (1, 3)
+    assert cache.get("missing", "default") == "default"
+
+    cache.put("none", None)  # None is a value, not a miss
+    assert cache.get_or_compute("none", compute) is None
+    cache.invalidate("none")
+    assert "none" not in cache
+    cache.put("a", 1)
+    cache.clear()
+    assert len(cache) == 0
+
+
+def test_project_digest():
+    project = generate_project("P", 5, 5)
+    same = generate_project("P", 5, 5)
+    assert project_digest(project) == project_digest(same)
+    assert project_digest(project) == project_digest(project.model_copy(deep=True))
+
+    compact = CompactProject.from_project(project)
+    assert project_digest(compact) == project_digest(CompactProject.from_project(same))
+
+    changes = [
+        lambda p: setattr(p, "description", "Changed"),
+        lambda p: setattr(p.assemblies[0], "units", p.assemblies[0].units + 1),
+        lambda p: setattr(p.assemblies[2].pieces[1], "length", 0.123),
+        lambda p: setattr(p.assemblies[4].pieces[0], "wood_type_index", 39),
+        lambda p: p.assemblies.pop(),
+    ]
+    digests = {project_digest(project)}
+    for change in changes:
+        changed = project.model_copy(deep=True)
+        change(changed)
+        digests.add(project_digest(changed))
+        assert project_digest(CompactProject.from_project(changed)) != (
+            project_digest(compact)
+        )
+    assert len(digests) == len(changes) + 1
+
+
+def test_cut_list_view_cache(tmp_path, monkeypatch):
+    pytest.importorskip("streamlit")
+    pytest.importorskip("plotly")
+    from components import cutlist_viewer
+
+    views = LRUCache(max_entries=16)
+    monkeypatch.setattr(cutlist_viewer, "_cut_list_views", views)
+    path = tmp_path / "catalog.json"
+    write_catalog_file(path, generate_wood_types(40))
+    catalog = WoodTypeCatalog(str(path))
+    project = generate_project("P", 5, 5)
+
+    view = cutlist_viewer.get_cut_list_view(project, catalog)
+    assert (views.hits, views.misses) == (0, 1)
+    assert cutlist_viewer.get_cut_list_view(project.model_copy(deep=True), catalog) is (
+        view
+    )
+    assert (views.hits, views.misses) == (1, 1)
+
+    project.assemblies[0].units += 1
+    changed = cutlist_viewer.get_cut_list_view(project, catalog)
+    assert changed is not view
+    assert (views.hits, views.misses) == (1, 2)
+
+    catalog.delete_rows([0])
+    assert cutlist_viewer.get_cut_list_view(project, catalog) is not changed
+    assert (views.hits, views.misses) == (1, 3)
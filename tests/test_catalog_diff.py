@@ -0,0 +1,88 @@
+from catalog import WoodTypeCatalog
+from catalog_diff import ROW_ID, CatalogDelta, diff_rows
+from models.wood import WoodType
+from storage.catalog_store import write_catalog_file
+
+
+def rows(*descriptions):
+    return [
+        {ROW_ID: row_id, "Description": description}
+        for row_id, description in descriptions
+    ]
+
+
+def test_diff_by_row_id():
+    old = rows((0, "Pine"), (1, "Oak"), (2, "Birch"))
+    new = rows((2, "Birch"), (0, "Spruce")) + [{"Description": "Ash"}]
+    delta = diff_rows(old, new)
+    assert delta.updates == {0: {"Description": "Spruce"}}
+    assert delta.deletes == [1]
+    assert delta.inserts == [{"Description": "Ash"}]
+
+
+def test_unknown_duplicate_and_nan_ids_are_inserts():
+    old = rows((0, "Pine"))
+    new = rows((0, "Pine"), (0, "Copy"), (7, "Oak")) + [
+        {ROW_ID: float("nan"), "Description": "Ash"}
+    ]
+    delta = diff_rows(old, new)
+    assert not delta.updates and not delta.deletes
+    assert [row["Description"] for row in delta.inserts] == ["Copy", "Oak", "Ash"]
+
+
+def test_no_changes_is_an_empty_delta():
+    old = rows((0, "Pine"), (1, "Oak"))
+    assert not diff_rows(old, list(old))
+
+
+def test_deltas_do_not_share_containers():
+    first, second = CatalogDelta.create(), CatalogDelta.create(deletes=[1])
+    assert not first and second
+    first.inserts.append({"Description": "Ash"})
+    first.updates[0] = {"Description": "Spruce"}
+    assert CatalogDelta.create() == ([], {}, [])
+    assert second.inserts == [] and second.updates == {}
+
+
+def test_delta_from_editor_state():
+    state = {
+        "edited_rows": {"0": {"Description": "Spruce", ROW_ID: 5}, 1: {"x": 1}},
+        "added_rows": [{"Description": "Ash", ROW_ID: None}],
+        "deleted_rows": [1, 9],  # Out of range positions are ignored
+    }
+    delta = CatalogDelta.from_editor_state(state, [5, 8])
+    assert delta.updates == {5: {"Description": "Spruce"}}  # 8 is deleted
+    assert delta.deletes == [8]
+    assert delta.inserts == [{"Description": "Ash"}]
+
+
+def test_apply_delta_by_row_id(tmp_path):
+    path = tmp_path / "catalog.json"
+    write_catalog_file(
+        path,
+        [
+            WoodType(width=w, height=w, price_per_meter=1, description=d)
+            for w, d in [(20, "Pine"), (30, "Oak"), (40, "Birch")]
+        ],
+    )
+    catalog = WoodTypeCatalog(str(path))
+    birch = catalog.row_ids[2]
+
+    catalog.apply_delta(
+        CatalogDelta(
+            inserts=[{"Width (mm)": 50, "Description": "Ash"}],
+            updates={birch: {"Description": "Silver birch"}},
+            deletes=[catalog.row_ids[0]],
+        )
+    )
+    assert [wt.description for wt in catalog.wood_types] == [
+        "Oak",
+        "Silver birch",
+        "Ash",
+    ]
+    assert catalog.index_of_row(birch) == 1
+    assert [wt.description for wt in WoodTypeCatalog(str(path)).wood_types] == [
+        "Oak",
+        "Silver birch",
+        "Ash",
+    ]
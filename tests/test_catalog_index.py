@@ -0,0 +1,108 @@
+import pytest
+
+from benchmarks.workload import generate_wood_types
+from catalog import WoodTypeCatalog, wood_type_label
+from catalog_diff import CatalogDelta
+from storage.catalog_store import write_catalog_file
+
+FIELDS = ("width", "height", "price_per_meter")
+
+
+@pytest.fixture(params=["catalog.json", "catalog.db"])
+def catalog(request, tmp_path):
+    source = tmp_path / "source.json"
+    write_catalog_file(source, generate_wood_types(30))
+    catalog = WoodTypeCatalog(str(tmp_path / request.param))
+    catalog.import_json(str(source))
+    return catalog
+
+
+def check_index(catalog):
+    """Every lookup agrees with a scan of the rows"""
+    wood_types = catalog.wood_types
+    for wood_type in wood_types:
+        width, height = wood_type.width, wood_type.height
+        assert catalog.find_indices(width, height) == [
+            i
+            for i, wt in enumerate(wood_types)
+            if (wt.width, wt.height) == (width, height)
+        ]
+        assert catalog.find_indices(width=width) == [
+            i for i, wt in enumerate(wood_types) if wt.width == width
+        ]
+        assert catalog.find_indices(height=height) == [
+            i for i, wt in enumerate(wood_types) if wt.height == height
+        ]
+        label = wood_type_label(wood_type)
+        assert catalog.index_of_label(label) == [
+            wood_type_label(wt) for wt in wood_types
+        ].index(label)
+    assert catalog.find_indices() == list(range(len(wood_types)))
+    for field in FIELDS:
+        values = sorted({getattr(wt, field) for wt in wood_types})
+        for low, high in zip(values, values[len(values) // 2 :]):
+            assert catalog.find_in_range(**{field: (low, high)}) == [
+                i
+                for i, wt in enumerate(wood_types)
+                if low <= getattr(wt, field) <= high
+            ]
+
+
+def test_index_after_load(catalog):
+    check_index(catalog)
+    check_index(WoodTypeCatalog(str(catalog.file_path)))
+
+
+def test_index_follows_edits(catalog):
+    catalog.add_empty_row()
+    check_index(catalog)
+
+    catalog.update_from_editor({3: {"Width (mm)": 12.34, "Description": "Moved"}})
+    check_index(catalog)
+    assert catalog.find_indices(12.3, catalog.wood_types[3].height)[0] == 3
+
+    catalog.delete_rows([0, 7, len(catalog) - 1])
+    check_index(catalog)
+    catalog.delete_rows([len(catalog) - 1])  # Last row, removed in place
+    check_index(catalog)
+
+    row_ids = list(catalog.row_ids)
+    catalog.apply_delta(
+        CatalogDelta(
+            inserts=[{"Width (mm)": 99.0, "Height (mm)": 9.0, "Price/m": "₪5.00"}],
+            updates={row_ids[2]: {"Price/m": "₪1000.00"}},
+            deletes=[row_ids[4]],
+        )
+    )
+    check_index(catalog)
+    assert catalog.find_in_range(price_per_meter=(1000, None)) == [
+        catalog.index_of_row(row_ids[2])
+    ]
+    assert catalog.find_indices(99.0, 9.0) == [len(catalog) - 1]
+
+    check_index(WoodTypeCatalog(str(catalog.file_path)))
+
+
+def test_range_bounds(catalog):
+    prices = sorted(wt.price_per_meter for wt in catalog.wood_types)
+    everything = list(range(len(catalog)))
+    assert catalog.find_in_range() == everything
+    assert catalog.find_in_range(price_per_meter=(prices[0], prices[-1])) == everything
+    assert catalog.find_in_range(price_per_meter=(None, prices[-1])) == everything
+    assert catalog.find_in_range(price_per_meter=(prices[0], None)) == everything
+
+    # Bounds are inclusive at both ends
+    cheapest = catalog.find_in_range(price_per_meter=(None, prices[0]))
+    assert [catalog.wood_types[i].price_per_meter for i in cheapest] == [prices[0]]
+    dearest = catalog.find_in_range(price_per_meter=(prices[-1], prices[-1]))
+    assert [catalog.wood_types[i].price_per_meter for i in dearest] == [prices[-1]]
+
+    assert catalog.find_in_range(price_per_meter=(None, prices[0] - 0.01)) == []
+    assert catalog.find_in_range(price_per_meter=(prices[-1] + 0.01, None)) == []
+    assert catalog.find_in_range(price_per_meter=(prices[-1], prices[0])) == []
+
+    # Ranges over several fields intersect
+    width = catalog.wood_types[0].width
+    assert catalog.find_in_range(
+        width=(width, width), price_per_meter=(prices[0], prices[-1])
+    ) == catalog.find_indices(width=width)
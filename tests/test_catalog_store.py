@@ -0,0 +1,79 @@
+import pytest
+
+from benchmarks.workload import generate_wood_types
+from storage.catalog_store import (
+    CatalogStore,
+    FileCatalogStore,
+    SqliteCatalogStore,
+    open_catalog_store,
+)
+from storage.versioning import VersionConflict
+
+WOOD_TYPES = generate_wood_types(4)
+
+
+@pytest.fixture(params=["catalog.json", "catalog.msgpack", "catalog.db"])
+def store(request, tmp_path):
+    return open_catalog_store(tmp_path / request.param)
+
+
+def test_backends_need_every_method():
+    with pytest.raises(TypeError):
+        CatalogStore()
+
+    class Partial(CatalogStore):
+        def exists(self):
+            return False
+
+    with pytest.raises(TypeError):
+        Partial()
+
+
+def test_round_trip_and_versions(store):
+    assert not store.exists()
+    assert store.version() == 0
+    rows = list(enumerate(WOOD_TYPES))
+    assert store.write(rows, expected_version=0) == 1
+    assert store.exists()
+    assert store.load_versioned() == (1, rows)
+    assert store.write(rows[1:]) == 2  # No expected version, always written
+    # File stores number the rows by position
+    assert [wt for _, wt in store.load()] == WOOD_TYPES[1:]
+
+
+def test_stale_full_writes_conflict(store):
+    rows = list(enumerate(WOOD_TYPES))
+    store.write(rows, expected_version=0)
+    store.write(rows[:2], expected_version=1)
+    with pytest.raises(VersionConflict) as e:
+        store.write(rows, expected_version=1)
+    assert (e.value.expected, e.value.current) == (1, 2)
+    assert store.load() == rows[:2]
+
+
+def test_file_store_conflicts_on_any_write(tmp_path):
+    store = FileCatalogStore(tmp_path / "catalog.json")
+    rows = list(enumerate(WOOD_TYPES))
+    store.write(rows, expected_version=0)
+    store.write(rows, changed=[0], expected_version=1)
+    with pytest.raises(VersionConflict):
+        store.write(rows, changed=[3], expected_version=1)
+
+
+def test_sqlite_store_conflicts_on_the_same_rows_only(tmp_path):
+    store = SqliteCatalogStore(tmp_path / "catalog.db")
+    rows = list(enumerate(WOOD_TYPES))
+    store.write(rows, expected_version=0)
+
+    # Another session changed row 0 and deleted row 1 at version 2
+    store.write(
+        [(0, WOOD_TYPES[3])] + rows[2:], changed=[0], deleted=[1], expected_version=1
+    )
+
+    # Rows it did not touch are written, rebased on version 2
+    assert store.write(rows, changed=[2], expected_version=1) == 3
+    for changed, deleted in (([0], []), ([1], []), ([], [1])):
+        with pytest.raises(VersionConflict) as e:
+            store.write(rows, changed=changed, deleted=deleted, expected_version=1)
+        assert e.value.row_ids == changed + deleted
+    assert store.load() == [(0, WOOD_TYPES[3])] + rows[2:]
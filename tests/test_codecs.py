@@ -0,0 +1,80 @@
+import pytest
+
+from benchmarks.workload import generate_project
+from storage import codecs
+from storage.codecs import (
+    CODECS,
+    JsonCodec,
+    codec_for_path,
+    detect_codec,
+    get_codec,
+    read_file,
+    write_file,
+)
+
+DATA = {
+    **generate_project("Table", 3, 4).model_dump(),
+    "description": "Oak ₪ 12.5×3",
+    "version": 7,
+    "empty": [],
+    "nothing": None,
+}
+# The modules each codec needs beyond the standard library
+MODULES = {"json": None, "orjson": "orjson", "msgpack": "msgpack"}
+
+
+@pytest.fixture(params=sorted(MODULES))
+def codec(request):
+    if MODULES[request.param]:
+        pytest.importorskip(MODULES[request.param])
+    return get_codec(request.param)
+
+
+def test_round_trip(codec):
+    raw = codec.dumps(DATA)
+    assert codec.loads(raw) == DATA
+    assert detect_codec(raw) is CODECS["msgpack" if codec.name == "msgpack" else "json"]
+
+
+def test_files_are_read_whatever_codec_wrote_them(tmp_path, codec):
+    # The extension does not have to match the content
+    for name in ("project.json", "project.msgpack", "project"):
+        path = tmp_path / name
+        write_file(path, DATA, codec)
+        assert read_file(path) == DATA
+
+
+def test_detect_codec():
+    for raw in (b"{}", b"[]", b'\n  {"a": 1}', b"\t[1]", b"\r\n{}"):
+        assert detect_codec(raw, "catalog.msgpack") is CODECS["json"]
+    for raw in (b"\x80", b"\x81\xa1a\x01", b"\x90", b"\xde\x00\x10"):
+        assert detect_codec(raw, "catalog.json") is CODECS["msgpack"]
+
+    # Otherwise the extension decides
+    assert detect_codec(b"", "catalog.msgpack") is CODECS["msgpack"]
+    assert detect_codec(b"", "catalog.MSGPACK") is CODECS["msgpack"]
+    assert detect_codec(b"", "catalog.json") is CODECS["json"]
+    assert detect_codec(b"") is CODECS["json"]
+
+
+def test_codec_lookup():
+    assert get_codec() is CODECS["json"]
+    assert get_codec("orjson").name == "orjson"
+    custom = JsonCodec(indent=None)
+    assert get_codec(custom) is custom
+    with pytest.raises(ValueError):
+        get_codec("yaml")
+
+    assert codec_for_path("a/b.msgpack") is CODECS["msgpack"]
+    assert codec_for_path("a/b.json") is CODECS["json"]
+    assert codec_for_path("a/b") is CODECS["json"]
+    assert get_codec("orjson").extension == ".json"
+
+
+def test_orjson_codec_without_orjson(monkeypatch):
+    monkeypatch.setattr(codecs, "orjson", None)
+    codec = get_codec("orjson")
+    raw = codec.dumps(DATA)
+    assert b"\n" not in raw and b", " not in raw
+    assert codec.loads(raw) == DATA
+    assert CODECS["json"].loads(CODECS["json"].dumps(DATA)) == DATA
@@ -0,0 +1,83 @@
+import pytest
+
+from benchmarks.workload import generate_project, generate_wood_types
+from catalog import WoodTypeCatalog
+from core.columnar import (
+    aggregate_cut_list,
+    detailed_cut_list_columns,
+    get_detailed_cut_list_columnar,
+)
+from core.cutlist import calculate_cut_list, get_detailed_cut_list
+from models.compact import CompactProject
+from models.wood import Assembly, Project
+from storage.catalog_store import write_catalog_file
+
+
+@pytest.fixture
+def catalog(tmp_path):
+    path = tmp_path / "catalog.json"
+    write_catalog_file(path, generate_wood_types(10))
+    return WoodTypeCatalog(str(path))
+
+
+@pytest.fixture
+def project():
+    # Indices up to 12 refer to wood types missing from the catalog
+    project = generate_project("P", 30, 8, wood_types=13)
+    project.assemblies[3].units = 0
+    project.assemblies[5].units = 0
+    return project
+
+
+def assert_cut_lists_equal(columnar, reference):
+    assert [item.wood_type_index for item in columnar] == [
+        item.wood_type_index for item in reference
+    ]
+    for ours, theirs in zip(columnar, reference):
+        assert ours.wood_type == theirs.wood_type
+        assert ours.total_length == pytest.approx(theirs.total_length)
+        assert ours.total_price == pytest.approx(theirs.total_price)
+
+
+def test_aggregate_matches_the_loop(catalog, project):
+    reference = calculate_cut_list(project, catalog)
+    assert {item.wood_type_index for item in reference} <= set(range(10))
+    assert_cut_lists_equal(aggregate_cut_list(project, catalog), reference)
+    assert_cut_lists_equal(
+        aggregate_cut_list(CompactProject.from_project(project), catalog), reference
+    )
+
+
+def test_detailed_matches_the_loop(catalog, project):
+    reference = get_detailed_cut_list(project, catalog)
+    rows = get_detailed_cut_list_columnar(project, catalog)
+    assert len(rows) == len(reference)
+    assert any(row["Total Quantity"] == 0 for row in reference)  # Zero units
+    for ours, theirs in zip(rows, reference):
+        assert ours.keys() == theirs.keys()
+        for name, value in theirs.items():
+            if isinstance(value, float):
+                assert ours[name] == pytest.approx(value)
+            else:
+                assert ours[name] == value
+
+
+def test_empty_project(catalog):
+    for project in (
+        Project(name="Empty"),
+        Project(name="No pieces", assemblies=[Assembly(name="Frame")]),
+    ):
+        assert aggregate_cut_list(project, catalog) == []
+        detailed = detailed_cut_list_columns(project, catalog)
+        assert all(len(column) == 0 for column in detailed.values())
+        assert get_detailed_cut_list_columnar(project, catalog) == []
+
+
+def test_only_missing_wood_types(catalog):
+    project = generate_project("P", 3, 3, wood_types=1)
+    for assembly in project.assemblies:
+        for piece in assembly.pieces:
+            piece.wood_type_index = 42
+    assert calculate_cut_list(project, catalog) == []
+    assert aggregate_cut_list(project, catalog) == []
+    assert get_detailed_cut_list_columnar(project, catalog) == []
@@ -0,0 +1,24 @@
+from benchmarks.workload import generate_project
+from models.compact import CompactProject, PieceView
+
+
+def test_columns_do_not_pin_the_arrays():
+    compact = CompactProject.from_project(generate_project("P", 3, 4))
+    columns = compact.to_columns()
+
+    compact.add_assembly("Extra", [PieceView(0, 1.5, 2)], units=3)
+    assert len(compact) == 13
+    assert len(columns.length) == 12
+
+    columns.length[0] = -1.0
+    assert compact.length[0] > 0
+    assert compact.to_columns().units[-1] == 3
+
+
+def test_round_trip():
+    project = generate_project("P", 5, 4)
+    compact = CompactProject.from_project(project)
+    assert compact.to_project() == project
+    assert CompactProject.from_dict(project.model_dump()).to_dict() == (
+        project.model_dump()
+    )
@@ -0,0 +1,102 @@
+import csv
+import io
+
+import pytest
+
+from benchmarks.workload import generate_project, generate_wood_types
+from catalog import WoodTypeCatalog
+from core.columnar import detailed_cut_list_columns
+from core.cutlist import calculate_cut_list, get_detailed_cut_list
+from core.export import (
+    DETAILED_COLUMNS,
+    SUMMARY_COLUMNS,
+    export_detailed_csv,
+    export_detailed_parquet,
+    export_summary_csv,
+    iter_detailed_rows,
+    iter_summary_rows,
+    stream_csv,
+    stream_detailed_csv,
+    stream_purchase_list_csv,
+    write_chunks,
+)
+from storage.catalog_store import write_catalog_file
+
+
+@pytest.fixture
+def catalog(tmp_path):
+    path = tmp_path / "catalog.json"
+    write_catalog_file(path, generate_wood_types(10))
+    return WoodTypeCatalog(str(path))
+
+
+@pytest.fixture
+def project():
+    # 2400 rows, more than two chunks
+    return generate_project("P", 60, 40, wood_types=10)
+
+
+def whole_csv(rows, columns):
+    """The CSV written in one go, without streaming"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(columns)
+    writer.writerows(rows)
+    return buffer.getvalue()
+
+
+@pytest.mark.parametrize("chunk_rows", [1, 7, 1000, 5000])
+def test_stream_csv_matches_the_whole_file(chunk_rows, catalog, project):
+    rows = list(iter_detailed_rows(get_detailed_cut_list(project, catalog)))
+    expected = whole_csv(rows, DETAILED_COLUMNS)
+    chunks = list(stream_csv(rows, DETAILED_COLUMNS, chunk_rows=chunk_rows))
+    assert "".join(chunks) == expected
+    assert len(chunks) == max(1, -(-len(rows) // chunk_rows))
+    assert all(chunk.count("\n") <= chunk_rows + 1 for chunk in chunks)
+
+    assert "".join(stream_csv([], SUMMARY_COLUMNS)) == whole_csv([], SUMMARY_COLUMNS)
+
+
+def test_exports_match_the_whole_file(tmp_path, catalog, project):
+    cut_list = calculate_cut_list(project, catalog)
+    assert export_summary_csv(cut_list) == whole_csv(
+        iter_summary_rows(cut_list), SUMMARY_COLUMNS
+    )
+
+    detailed = get_detailed_cut_list(project, catalog)
+    expected = whole_csv(iter_detailed_rows(detailed), DETAILED_COLUMNS)
+    assert export_detailed_csv(detailed) == expected
+    # Columns give the same file as row dicts
+    assert export_detailed_csv(detailed_cut_list_columns(project, catalog)) == (
+        expected
+    )
+
+    path = tmp_path / "detailed.csv"
+    write_chunks(stream_detailed_csv(detailed), path)
+    assert path.read_bytes() == expected.encode("utf-8")
+
+    purchase = "".join(stream_purchase_list_csv([("A", detailed), ("B", detailed)]))
+    lines = purchase.splitlines()
+    assert lines[0] == "Project," + ",".join(DETAILED_COLUMNS)
+    assert len(lines) == 2 * len(detailed) + 1
+    assert lines[1:] == [
+        f"{name},{line}" for name in "AB" for line in expected.splitlines()[1:]
+    ]
+
+
+def test_parquet_round_trip(catalog, project):
+    pytest.importorskip("pyarrow")
+    import pyarrow.parquet as pq
+
+    detailed = get_detailed_cut_list(project, catalog)
+    for source in (detailed, detailed_cut_list_columns(project, catalog)):
+        table = pq.read_table(io.BytesIO(export_detailed_parquet(source)))
+        assert table.column_names == DETAILED_COLUMNS
+        rows = table.to_pylist()
+        assert len(rows) == len(detailed)
+        for ours, theirs in zip(rows, detailed):
+            for name in DETAILED_COLUMNS:
+                if isinstance(theirs[name], float):
+                    assert ours[name] == pytest.approx(theirs[name])
+                else:
+                    assert ours[name] == theirs[name]
@@ -0,0 +1,85 @@
+import random
+
+import pytest
+
+from benchmarks.workload import generate_project
+from catalog import WoodTypeCatalog
+from models.wood import WoodType
+from optimizer.incremental import IncrementalOptimizer
+from optimizer.parallel import solve_subproblems, split_subproblems
+from storage.catalog_store import write_catalog_file
+
+
+@pytest.fixture
+def catalog(tmp_path):
+    path = tmp_path / "catalog.json"
+    write_catalog_file(
+        path,
+        [
+            WoodType(
+                width=45,
+                height=45,
+                price_per_meter=10,
+                available_lengths=[2.4, 3.6],
+                description="Pine",
+            )
+        ],
+    )
+    return WoodTypeCatalog(str(path))
+
+
+def single_pieces(seed=0):
+    """A project where every piece is needed exactly once"""
+    project = generate_project("P", 10, 5, wood_types=1, seed=seed, max_length=1.5)
+    for assembly in project.assemblies:
+        assembly.units = 1
+        for piece in assembly.pieces:
+            piece.quantity = 1
+    return project
+
+
+def edit_one_piece(project, rng):
+    assembly = rng.choice(project.assemblies)
+    piece = rng.choice(assembly.pieces)
+    piece.length = round(rng.uniform(0.2, 1.5), 3)
+
+
+def test_small_edits_are_repaired_until_they_add_up(catalog):
+    project = single_pieces()
+    optimizer = IncrementalOptimizer(warm_start_ratio=0.2)
+    optimizer.optimize(project, catalog)
+    assert optimizer.resolved == [0]
+
+    rng = random.Random(1)
+    repairs = 0
+    while True:
+        edit_one_piece(project, rng)
+        optimizer.optimize(project, catalog)
+        if optimizer.resolved:
+            break
+        repairs += 1
+    # Each edit moves 2 of the 50 pieces: 5 edits stay within 20%
+    assert repairs == 5
+
+    # The drift counts from the new full solve again
+    edit_one_piece(project, rng)
+    optimizer.optimize(project, catalog)
+    assert optimizer.warm_started == [0]
+
+
+def test_repairs_keep_the_method_and_a_valid_lower_bound(catalog):
+    project = single_pieces()
+    optimizer = IncrementalOptimizer(warm_start_ratio=0.5)
+    solved = optimizer.optimize(project, catalog, method="patterns", time_limit=2)[0]
+    assert solved.lower_bound is not None
+
+    edit_one_piece(project, random.Random(2))
+    repaired = optimizer.optimize(project, catalog, method="patterns", time_limit=2)[0]
+    assert optimizer.warm_started == [0]
+    assert repaired.method == "patterns"
+    assert repaired.lower_bound is not None
+
+    # No plan for the new demand beats the carried bound
+    (sub,) = split_subproblems(project, catalog)
+    fresh = solve_subproblems([sub], method="patterns", time_limit=2)[0]
+    assert repaired.lower_bound <= fresh.total_stock_length + 1e-9
@@ -0,0 +1,76 @@
+from benchmarks.workload import generate_project, generate_wood_types
+from catalog import WoodTypeCatalog
+from inventory import RemnantInventory
+from optimizer.packing import optimize_cut_list
+from optimizer.parallel import split_subproblems
+from optimizer.patterns import solve_cut_list
+from storage.catalog_store import write_catalog_file
+
+
+def sqlite_catalog(tmp_path, count):
+    source = tmp_path / "catalog.json"
+    write_catalog_file(source, generate_wood_types(count))
+    catalog = WoodTypeCatalog(str(tmp_path / "catalog.db"))
+    catalog.import_json(str(source))
+    return catalog
+
+
+def test_remnants_keep_their_wood_type_when_rows_are_deleted(tmp_path):
+    catalog = sqlite_catalog(tmp_path, 3)
+    db = catalog.file_path
+    inventory = RemnantInventory(db)
+    third = catalog.row_ids[2]
+    inventory.add(third, [1.2, 0.8])
+
+    catalog.delete_rows([0])
+    assert catalog.index_of_row(third) == 1
+    assert [r.length for r in inventory.remnants(third)] == [0.8, 1.2]
+    assert inventory.count(catalog.row_ids[0]) == 0
+
+    # Reopened, the remnants still belong to the same row
+    inventory = RemnantInventory(db)
+    assert inventory.row_ids() == [third]
+    assert inventory.best_fit(third, 1.0).length == 1.2
+
+
+def test_subproblems_look_remnants_up_by_row(tmp_path):
+    catalog = sqlite_catalog(tmp_path, 2)
+    inventory = RemnantInventory(catalog.file_path)
+    ids = inventory.add(catalog.row_ids[1], [2.0])
+    catalog.delete_rows([0])
+
+    project = generate_project("P", 2, 2, wood_types=1)
+    (sub,) = split_subproblems(project, catalog, inventory)
+    assert [remnant_id for _, remnant_id in sub.remnants] == ids
+
+
+def test_refresh_loads_changes_of_other_processes(tmp_path, monkeypatch):
+    monkeypatch.setattr("inventory.REFRESH_INTERVAL", 0.0)
+    db = tmp_path / "catalog.db"
+    ours, theirs = RemnantInventory(db), RemnantInventory(db)
+    assert not ours.refresh()
+
+    (remnant_id,) = theirs.add(7, [1.5])
+    assert ours.refresh()
+    assert ours.keys(7) == theirs.keys(7)
+
+    # Writing after another process did loads its changes as well
+    theirs.remove([remnant_id])
+    ours.add(7, [0.9])
+    assert [r.length for r in ours.remnants(7)] == [0.9]
+    assert theirs.refresh() and theirs.keys(7) == ours.keys(7)
+
+
+def test_every_solver_looks_remnants_up_by_row(tmp_path):
+    catalog = sqlite_catalog(tmp_path, 2)
+    inventory = RemnantInventory(catalog.file_path)
+    ids = inventory.add(catalog.row_ids[1], [3.0] * 50)
+    catalog.delete_rows([0])
+
+    project = generate_project("P", 2, 2, wood_types=1, max_length=1.0)
+    for plans in (
+        optimize_cut_list(project, catalog, inventory=inventory),
+        solve_cut_list(project, catalog, time_limit=1, inventory=inventory),
+    ):
+        used = {board.remnant_id for board in plans[0].boards}
+        assert used and used <= set(ids)
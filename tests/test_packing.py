@@ -0,0 +1,115 @@
+import random
+from bisect import bisect_left, insort
+from collections import Counter
+
+import pytest
+
+from optimizer.packing import (
+    STRATEGIES,
+    Board,
+    PieceDemand,
+    _SortedKeys,
+    expand_items,
+    improve_packing,
+    pack_items,
+)
+
+STOCK = [2400, 3000, 3600]
+
+
+def random_items(seed, count=300):
+    rng = random.Random(seed)
+    demands = [
+        PieceDemand(round(rng.uniform(0.05, 3.9), 3), rng.randint(1, 3), f"A{n % 7}")
+        for n in range(count)
+    ]
+    return expand_items(demands)
+
+
+def check_boards(boards, kerf):
+    for board in boards:
+        used = sum(length for length, _ in board.items)
+        used += kerf * (len(board.items) - 1)
+        assert used <= board.stock
+        assert board.free == board.stock + kerf - sum(
+            length + kerf for length, _ in board.items
+        )
+
+
+@pytest.mark.parametrize("strategy", STRATEGIES)
+@pytest.mark.parametrize("kerf", [0, 3])
+@pytest.mark.parametrize("seed", range(3))
+def test_packing_is_feasible(strategy, kerf, seed):
+    items = random_items(seed)
+    boards, unplaced = pack_items(items, STOCK, kerf, strategy)
+
+    check_boards(boards, kerf)
+    assert all(length > max(STOCK) for length, _ in unplaced)
+    placed = [item for board in boards for item in board.items]
+    assert Counter(placed + unplaced) == Counter(items)
+
+    improved = improve_packing(boards, STOCK, kerf)
+    check_boards(improved, kerf)
+    assert Counter(item for board in improved for item in board.items) == Counter(
+        placed
+    )
+    assert all(board.stock in STOCK for board in improved)
+
+
+def test_unknown_strategy():
+    with pytest.raises(ValueError):
+        pack_items([], STOCK, strategy="worst_fit")
+
+
+def test_improve_empties_a_lightly_used_board():
+    boards = [
+        Board(3600, 0, [(1000, "A"), (1000, "A")]),
+        Board(3600, 0, [(1000, "A"), (1000, "A")]),
+        Board(3600, 0, [(500, "B")]),
+    ]
+    improved = improve_packing(boards, [3600], 0)
+    assert len(improved) == 2
+    assert sorted(len(board.items) for board in improved) == [2, 3]
+
+
+def test_improve_keeps_boards_whose_pieces_do_not_all_move():
+    boards = [
+        Board(3600, 0, [(3000, "A")]),
+        Board(3600, 0, [(500, "B"), (500, "B")]),
+    ]
+    improved = improve_packing(boards, [3600], 0)
+    assert sorted(len(board.items) for board in improved) == [1, 2]
+    check_boards(improved, 0)
+
+
+def test_improve_shrinks_boards_to_the_shortest_stock():
+    boards = [Board(3600, 3, [(1200, "A"), (1190, "A")]), Board(3600, 3, [(3500, "B")])]
+    improved = improve_packing(boards, STOCK, 3, fixed=0)
+    assert sorted(board.stock for board in improved) == [2400, 3600]
+    check_boards(improved, 3)
+
+    # Fixed boards (remnants) keep their length
+    boards = [Board(3600, 0, [(1000, "A")]), Board(3600, 0, [(900, "B")])]
+    improved = improve_packing(boards, STOCK, 0, fixed=1)
+    assert improved[0].stock == 3600
+
+
+def test_sorted_keys_match_a_sorted_list():
+    rng = random.Random(0)
+    keys, reference = _SortedKeys(), []
+    for _ in range(5000):
+        key = (rng.randrange(100), rng.randrange(1000))
+        if reference and rng.random() < 0.4:
+            found = keys.pop_at_least(key)
+            pos = bisect_left(reference, key)
+            assert found == (reference.pop(pos) if pos < len(reference) else None)
+        elif reference and rng.random() < 0.3:
+            key = rng.choice(reference)
+            keys.remove(key)
+            reference.remove(key)
+        else:
+            keys.add(key)
+            insort(reference, key)
+    assert list(keys) == reference
+    with pytest.raises(ValueError):
+        keys.remove((1000, 0))
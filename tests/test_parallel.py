@@ -0,0 +1,53 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from benchmarks.workload import generate_project, generate_wood_types
+from catalog import WoodTypeCatalog
+from optimizer import parallel
+from storage.catalog_store import write_catalog_file
+
+
+@pytest.fixture
+def executor():
+    yield parallel.get_executor()
+    parallel.shutdown_executor()
+
+
+def test_one_pool_without_fork(executor):
+    with ThreadPoolExecutor(8) as threads:
+        pools = set(threads.map(lambda _: parallel.get_executor(), range(8)))
+    assert pools == {executor}
+    assert executor._mp_context.get_start_method() in ("forkserver", "spawn")
+
+
+def test_parallel_plans_match_inline_ones(tmp_path, executor):
+    path = tmp_path / "catalog.json"
+    write_catalog_file(path, generate_wood_types(6))
+    catalog = WoodTypeCatalog(str(path))
+    project = generate_project("P", 10, 6, wood_types=6)
+    subproblems = parallel.split_subproblems(project, catalog)
+
+    inline = parallel.solve_subproblems(subproblems, parallel=False)
+    pooled = parallel.solve_subproblems(subproblems, parallel=True)
+    assert {i: p.total_stock_length for i, p in pooled.items()} == {
+        i: p.total_stock_length for i, p in inline.items()
+    }
+
+
+def test_deadlines_include_the_wait_for_a_worker(tmp_path, executor):
+    path = tmp_path / "catalog.json"
+    write_catalog_file(path, generate_wood_types(1))
+    catalog = WoodTypeCatalog(str(path))
+    (sub,) = parallel.split_subproblems(
+        generate_project("P", 20, 10, wood_types=1), catalog
+    )
+
+    # A task that starts after its deadline gets no time for the solver
+    started = time.perf_counter()
+    plan = executor.submit(
+        parallel.solve_subproblem_until, sub, 0.0, "patterns", time.time() - 1
+    ).result()
+    assert plan.boards
+    assert time.perf_counter() - started < 2
@@ -0,0 +1,81 @@
+import random
+from collections import Counter
+
+import pytest
+
+from models.wood import WoodType
+from optimizer.packing import PieceDemand, optimize_wood_type
+from optimizer.patterns import solve_wood_type
+
+PINE = WoodType(
+    width=45, height=45, price_per_meter=10, available_lengths=[2.4, 3.0, 3.6]
+)
+
+
+def random_demands(seed, count=12):
+    rng = random.Random(seed)
+    return [
+        PieceDemand(round(rng.uniform(0.2, 1.8), 3), rng.randint(1, 6), f"A{n}")
+        for n in range(count)
+    ]
+
+
+def cut_pieces(plan):
+    return Counter(
+        (piece.length, piece.assembly)
+        for board in plan.boards
+        for piece in board.pieces
+    )
+
+
+def test_proves_a_known_optimum():
+    # 1.2 + 1.2 + 1.2 fills a 3.6 board exactly
+    plan = solve_wood_type(0, PINE, [PieceDemand(1.2, 9, "A")], time_limit=2)
+    assert plan.method == "patterns"
+    assert plan.total_stock_length == pytest.approx(10.8)
+    assert plan.lower_bound == pytest.approx(10.8)
+    assert plan.gap == pytest.approx(0.0)
+
+
+@pytest.mark.parametrize("kerf", [0.0, 0.003])
+@pytest.mark.parametrize("seed", range(4))
+def test_plans_are_feasible_and_bounded(seed, kerf):
+    demands = random_demands(seed)
+    plan = solve_wood_type(0, PINE, demands, kerf, time_limit=2)
+
+    assert cut_pieces(plan) == Counter(
+        {(d.length, d.assembly): d.count for d in demands}
+    )
+    for board in plan.boards:
+        used = sum(piece.length for piece in board.pieces)
+        used += kerf * (len(board.pieces) - 1)
+        assert used <= board.stock_length + 1e-9
+    assert plan.lower_bound <= plan.total_stock_length + 1e-9
+    assert plan.lower_bound >= plan.total_piece_length - 1e-9
+
+    heuristic = optimize_wood_type(0, PINE, demands, kerf)
+    assert plan.total_stock_length <= heuristic.total_stock_length + 1e-9
+
+
+def test_without_time_falls_back_to_the_heuristic():
+    demands = random_demands(0)
+    plan = solve_wood_type(0, PINE, demands, time_limit=0)
+    heuristic = optimize_wood_type(0, PINE, demands)
+    assert plan.total_stock_length <= heuristic.total_stock_length + 1e-9
+    assert plan.lower_bound == pytest.approx(plan.total_piece_length)
+
+
+def test_pieces_longer_than_the_stock_are_unplaced():
+    plan = solve_wood_type(
+        0, PINE, [PieceDemand(4.0, 2, "A"), PieceDemand(1.0, 3, "B")]
+    )
+    assert [piece.length for piece in plan.unplaced] == [4.0, 4.0]
+    assert sum(len(board.pieces) for board in plan.boards) == 3
+
+
+def test_bound_is_tighter_than_the_piece_length():
+    # No board holds two pieces, which the total length alone cannot tell
+    plan = solve_wood_type(0, PINE, [PieceDemand(1.9, 3, "A")], time_limit=2)
+    assert plan.total_piece_length == pytest.approx(5.7)
+    assert plan.lower_bound == pytest.approx(7.2)
+    assert plan.total_stock_length == pytest.approx(7.2)
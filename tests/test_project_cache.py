@@ -0,0 +1,90 @@
+import os
+
+import pytest
+
+from benchmarks.workload import generate_project
+from project_manager import ProjectManager
+
+
+@pytest.fixture
+def manager(tmp_path):
+    return ProjectManager(str(tmp_path))
+
+
+@pytest.fixture
+def loads(manager, monkeypatch):
+    """Names of the projects read from the store"""
+    loads = []
+    load_versioned = manager.store.load_versioned
+
+    def counted(name):
+        loads.append(name)
+        return load_versioned(name)
+
+    monkeypatch.setattr(manager.store, "load_versioned", counted)
+    return loads
+
+
+def saved(manager, name="Table"):
+    project = generate_project(name, 4, 3)
+    project.description = "Oak"
+    manager.save_project(project)
+    return project
+
+
+def test_cache_hit(manager, loads):
+    project = saved(manager)
+    # What was saved is never read back
+    loaded = manager.load_project("Table")
+    assert loaded == project
+    assert manager.load_project("Table") is loaded
+    assert loads == []
+
+
+def test_external_rewrite_with_the_same_size(manager, loads):
+    project = saved(manager)
+    path = manager.store.path("Table")
+    stat = os.stat(path)
+
+    other = ProjectManager(manager.projects_dir)
+    changed = other.load_project("Table")
+    changed.description = "Ash"
+    other.save_project(changed)
+    # Make sure the mtime moves even on coarse clocks
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert os.stat(path).st_size == stat.st_size
+
+    loaded = manager.load_project("Table")
+    assert loaded is not project
+    assert loaded.description == "Ash"
+    assert manager.load_project("Table") is loaded
+    assert loads == ["Table"]
+
+
+def test_edited_projects_are_read_again(manager, loads):
+    project = saved(manager)
+
+    # In-place edits that were not saved make the cached entry stale
+    cached = manager.load_project("Table")
+    cached.description = "Ash"
+    loaded = manager.load_project("Table")
+    assert loaded is not cached
+    assert loaded == project
+    assert loads == ["Table"]
+
+    loaded.assemblies[1].pieces[0].length += 1
+    again = manager.load_project("Table")
+    assert again is not loaded
+    assert again == project
+    assert loads == ["Table", "Table"]
+
+    # Unchanged, the fresh copy is cached again
+    assert manager.load_project("Table") is again
+    assert loads == ["Table", "Table"]
+
+
+def test_verify_always_reads(manager, loads):
+    project = saved(manager)
+    assert manager.load_project("Table", verify=True) == project
+    assert manager.load_project("Table", verify=True) == project
+    assert loads == ["Table", "Table"]
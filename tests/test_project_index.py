@@ -0,0 +1,116 @@
+import os
+
+import pytest
+
+from benchmarks.workload import generate_project, generate_wood_types
+from catalog import WoodTypeCatalog
+from core.cutlist import calculate_cut_list
+from storage.catalog_store import write_catalog_file
+from storage.project_index import INDEX_FILE, ProjectIndex, summarize_project
+from storage.project_store import AssemblyProjectStore, FileProjectStore
+
+
+@pytest.fixture(params=[FileProjectStore, AssemblyProjectStore])
+def store(request, tmp_path):
+    return request.param(tmp_path / "projects")
+
+
+def count_loads(store, monkeypatch):
+    loads = []
+    load_data = store.load_data
+
+    def counted(name):
+        loads.append(name)
+        return load_data(name)
+
+    monkeypatch.setattr(store, "load_data", counted)
+    return loads
+
+
+def bump_mtime(path):
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+
+def test_summaries_are_kept_in_the_index_file(store, monkeypatch):
+    projects = [generate_project(name, 4, 3) for name in ("Chair", "Table")]
+    for project in projects:
+        store.save(project)
+    index = ProjectIndex(store)
+    assert index.summaries() == [summarize_project(p) for p in projects]
+    assert (store.projects_dir / INDEX_FILE).exists()
+
+    # Another index reads the summaries without opening the projects
+    loads = count_loads(store, monkeypatch)
+    assert ProjectIndex(store).summaries() == index.summaries()
+    assert loads == []
+
+
+def test_stamps_are_invalidated_by_mtime(store, monkeypatch):
+    project = generate_project("Table", 4, 3)
+    project.description = "Oak"
+    store.save(project)
+    index = ProjectIndex(store)
+    index.refresh()
+    loads = count_loads(store, monkeypatch)
+    index.refresh()
+    assert loads == []
+
+    # Same size, new content and mtime
+    path = store.path("Table")
+    size = os.stat(path).st_size
+    project.description = "Ash"
+    store.save(project)
+    bump_mtime(store.path("Table"))
+    assert os.stat(store.path("Table")).st_size == size
+    index.refresh()
+    assert loads == ["Table"]
+    assert index.get("Table").description == "Ash"
+
+    # A new mtime alone is enough to reload
+    bump_mtime(store.path("Table"))
+    index.refresh()
+    assert loads == ["Table", "Table"]
+
+
+def test_refresh_picks_up_other_sessions(store):
+    store.save(generate_project("Table", 4, 3))
+    index = ProjectIndex(store)
+    assert index.names() == ["Table"]
+
+    other = type(store)(store.projects_dir)
+    other.save(generate_project("Chair", 2, 2))
+    changed = generate_project("Table", 6, 3)
+    other.save(changed)
+    bump_mtime(other.path("Table"))
+    assert index.names() == ["Chair", "Table"]
+    assert index.get("Table") == summarize_project(changed)
+
+    other.delete("Table")
+    assert index.names() == ["Chair"]
+    assert index.get("Table") is None
+    assert ProjectIndex(store).names() == ["Chair"]
+
+
+def test_estimated_cost(tmp_path, store):
+    path = tmp_path / "catalog.json"
+    write_catalog_file(path, generate_wood_types(8))
+    catalog = WoodTypeCatalog(str(path))
+    # Indices 8 and 9 are missing from the catalog and cost nothing
+    project = generate_project("Table", 10, 6, wood_types=10)
+    project.assemblies[1].units = 0
+    store.save(project)
+
+    index = ProjectIndex(store)
+    index.refresh()
+    summary = index.get("Table")
+    assert summary.lengths.keys() <= set(range(10))
+    expected = sum(item.total_price for item in calculate_cut_list(project, catalog))
+    assert summary.estimated_cost(catalog) == pytest.approx(expected)
+
+    # Prices come from the catalog, not the index
+    assert 0 in summary.lengths
+    catalog.update_from_editor({0: {"Price/m": 1000.0}})
+    assert summary.estimated_cost(catalog) > expected
+    expected = sum(item.total_price for item in calculate_cut_list(project, catalog))
+    assert summary.estimated_cost(catalog) == pytest.approx(expected)
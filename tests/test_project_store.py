@@ -0,0 +1,75 @@
+import os
+
+import pytest
+
+from benchmarks.workload import generate_project
+from storage.project_store import AssemblyProjectStore, FileProjectStore, ProjectStore
+from storage.versioning import MISSING, VersionConflict
+
+
+@pytest.fixture(params=[FileProjectStore, AssemblyProjectStore])
+def store(request, tmp_path):
+    return request.param(tmp_path)
+
+
+def test_backends_need_every_method(tmp_path):
+    with pytest.raises(TypeError):
+        ProjectStore(tmp_path)
+
+
+def test_round_trip_and_versions(store):
+    project = generate_project("Table", 3, 4)
+    assert store.version("Table") is None
+    assert store.save(project, MISSING) == 1
+    assert store.names() == ["Table"]
+    assert store.load_versioned("Table") == (1, project.model_dump())
+    assert store.save(project) == 2  # No expected version, always saved
+    assert store.version("Table") == 2
+
+
+def test_compare_and_swap(store):
+    project = generate_project("Table", 3, 4)
+    store.save(project, MISSING)
+    with pytest.raises(VersionConflict):
+        store.save(project, MISSING)
+
+    changed = project.model_copy(update={"description": "Changed"})
+    assert store.save(changed, 1) == 2
+    with pytest.raises(VersionConflict) as e:
+        store.save(project, 1)
+    assert (e.value.expected, e.value.current) == (1, 2)
+    assert store.load_data("Table")["description"] == "Changed"
+
+    store.delete("Table")
+    with pytest.raises(VersionConflict) as e:
+        store.save(project, 2)
+    assert e.value.current is None
+    assert store.names() == []
+
+
+def test_assembly_store_writes_only_changed_assemblies(tmp_path):
+    store = AssemblyProjectStore(tmp_path)
+    project = generate_project("Table", 5, 4)
+    store.save(project, MISSING)
+    files = tmp_path / "Table" / "assemblies"
+    before = {name: os.stat(files / name).st_mtime_ns for name in os.listdir(files)}
+
+    project.assemblies[2].units += 1
+    store.save(project, 1)
+    after = {name: os.stat(files / name).st_mtime_ns for name in os.listdir(files)}
+    assert len(set(after) - set(before)) == 1
+    assert len(set(before) - set(after)) == 1
+    assert all(after[name] == before[name] for name in set(before) & set(after))
+    assert store.load_versioned("Table") == (2, project.model_dump())
+
+
+def test_single_file_projects_move_to_directories(tmp_path):
+    project = generate_project("Table", 2, 2)
+    FileProjectStore(tmp_path).save(project, MISSING)
+    store = AssemblyProjectStore(tmp_path)
+    assert store.load_versioned("Table") == (1, project.model_dump())
+
+    store.save(project, 1)
+    assert (tmp_path / "Table").is_dir()
+    assert not FileProjectStore(tmp_path).names()
+    assert store.load_versioned("Table") == (2, project.model_dump())
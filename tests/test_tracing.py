@@ -0,0 +1,83 @@
+import json
+import threading
+import time
+
+from models.wood import Project
+from project_manager import ProjectManager
+from storage.writer import BackgroundWriter
+from tracing import record_trace, span, traced
+
+
+@traced()
+def traced_function():
+    with span("inner", size=3):
+        time.sleep(0.001)
+
+
+def test_spans_are_only_recorded_in_a_trace():
+    with span("outside"):
+        pass
+    with record_trace() as trace:
+        with span("inside"):
+            pass
+    with span("after"):
+        pass
+    assert [s.name for s in trace.spans] == ["inside"]
+
+    with record_trace(enabled=False) as disabled:
+        traced_function()
+    assert disabled is None
+
+
+def test_span_tree():
+    with record_trace() as trace:
+        with span("outer"):
+            traced_function()
+            traced_function()
+    inner, function, _, _, outer = trace.spans
+    assert function.name == "test_tracing.traced_function"
+    assert inner.args == {"size": 3}
+    # Children lie within their parents
+    for child, parent in ((inner, function), (function, outer)):
+        assert parent.start_ns <= child.start_ns
+        assert child.start_ns + child.duration_ns <= parent.start_ns + (
+            parent.duration_ns
+        )
+
+
+def test_summary():
+    with record_trace() as trace:
+        with span("outer"):
+            for _ in range(3):
+                traced_function()
+    rows = {row["Span"]: row for row in trace.summary()}
+    assert rows["inner"]["Calls"] == 3
+    assert rows["outer"]["Calls"] == 1
+    assert rows["inner"]["Max (ms)"] <= rows["inner"]["Total (ms)"]
+    assert trace.summary()[0]["Span"] == "outer"  # Slowest first
+
+
+def test_chrome_trace_export():
+    with record_trace() as trace:
+        traced_function()
+    events = json.loads(trace.chrome_trace_json())["traceEvents"]
+    assert [e["name"] for e in events] == ["inner", "test_tracing.traced_function"]
+    for event, record in zip(events, trace.spans):
+        assert event["ph"] == "X"
+        assert event["ts"] == record.start_ns / 1000
+        assert event["dur"] == record.duration_ns / 1000
+        assert event["tid"] == threading.get_ident()
+    assert events[0]["args"] == {"size": "3"}
+
+
+def test_background_saves_join_the_trace(tmp_path):
+    writer = BackgroundWriter(delay=10, max_delay=10)
+    manager = ProjectManager(tmp_path, writer=writer)
+    manager.save_project(Project(name="Table"))
+    with record_trace() as trace:
+        manager.save_project(Project(name="Table", description="Oak"), wait=True)
+    writer.close()
+
+    spans = {s.name: s for s in trace.spans}
+    assert {"project.save", "project.write"} <= set(spans)
+    assert spans["project.write"].thread_id != threading.get_ident()
@@ -0,0 +1,306 @@
+import os
+import threading
+import time
+
+import pytest
+
+from catalog import WoodTypeCatalog
+from catalog_diff import CatalogDelta
+from models.wood import Assembly, AssemblyPiece, Project
+from project_manager import ProjectManager
+from storage.project_store import AssemblyProjectStore
+from storage.versioning import (
+    MISSING,
+    ConflictError,
+    MergeConflict,
+    VersionConflict,
+    file_lock,
+    lock_path,
+    merge_projects,
+    remove_lock,
+)
+from storage.writer import BackgroundWriter
+
+
+def assembly(name, units=1, length=1.0):
+    return Assembly(
+        name=name,
+        units=units,
+        pieces=[AssemblyPiece(wood_type_index=0, length=length, quantity=1)],
+    )
+
+
+def project(*assemblies, description=""):
+    return Project(name="P", description=description, assemblies=list(assemblies))
+
+
+def names(project):
+    return [(a.name, a.units) for a in project.assemblies]
+
+
+class TestMergeProjects:
+    def test_edits_to_different_assemblies_are_both_kept(self):
+        base = project(assembly("A"), assembly("B"))
+        ours = project(assembly("A", units=2), assembly("B"))
+        theirs = project(assembly("A"), assembly("B", units=3))
+        assert names(merge_projects(base, ours, theirs)) == [("A", 2), ("B", 3)]
+
+    def test_additions_on_both_sides_keep_their_order_then_ours(self):
+        base = project(assembly("A"))
+        ours = project(assembly("A"), assembly("Ours"))
+        theirs = project(assembly("Theirs"), assembly("A"))
+        merged = merge_projects(base, ours, theirs)
+        assert names(merged) == [("Theirs", 1), ("A", 1), ("Ours", 1)]
+
+    def test_deletion_of_an_unchanged_assembly(self):
+        base = project(assembly("A"), assembly("B"))
+        ours = project(assembly("B"))
+        theirs = project(assembly("A"), assembly("B", units=5))
+        assert names(merge_projects(base, ours, theirs)) == [("B", 5)]
+
+    def test_deleting_an_assembly_the_other_side_changed_conflicts(self):
+        base = project(assembly("A"))
+        with pytest.raises(MergeConflict) as info:
+            merge_projects(base, project(), project(assembly("A", units=2)))
+        assert info.value.assemblies == ["A"]
+
+    def test_rename_is_a_delete_and_an_add(self):
+        base = project(assembly("A"), assembly("B"))
+        ours = project(assembly("Renamed"), assembly("B"))
+        theirs = project(assembly("A"), assembly("B", units=4))
+        assert names(merge_projects(base, ours, theirs)) == [
+            ("B", 4),
+            ("Renamed", 1),
+        ]
+
+    def test_rename_of_an_assembly_changed_elsewhere_conflicts(self):
+        base = project(assembly("A"))
+        with pytest.raises(MergeConflict):
+            merge_projects(
+                base, project(assembly("Renamed")), project(assembly("A", units=2))
+            )
+
+    def test_duplicate_names_are_matched_by_occurrence(self):
+        base = project(assembly("Leg"), assembly("Leg"))
+        ours = project(assembly("Leg", units=2), assembly("Leg"))
+        theirs = project(assembly("Leg"), assembly("Leg", units=3))
+        assert names(merge_projects(base, ours, theirs)) == [("Leg", 2), ("Leg", 3)]
+
+    def test_same_change_on_both_sides_does_not_conflict(self):
+        base = project(assembly("A"))
+        same = project(assembly("A", units=9))
+        assert names(merge_projects(base, same, same)) == [("A", 9)]
+
+    def test_conflicting_descriptions(self):
+        base = project(description="base")
+        with pytest.raises(MergeConflict) as info:
+            merge_projects(
+                base, project(description="ours"), project(description="theirs")
+            )
+        assert info.value.assemblies == ["description"]
+
+
+class TestFileLock:
+    def test_exclusive_lock_waits_for_the_holder(self, tmp_path):
+        path = tmp_path / ".lock"
+        events = []
+
+        def wait():
+            with file_lock(path):
+                events.append("got")
+
+        with file_lock(path):
+            thread = threading.Thread(target=wait)
+            thread.start()
+            time.sleep(0.1)
+            assert events == []
+        thread.join(5)
+        assert events == ["got"]
+
+    def test_shared_locks_do_not_wait_for_each_other(self, tmp_path):
+        path = tmp_path / ".lock"
+        with file_lock(path, shared=True), file_lock(path, shared=True):
+            pass
+
+    def test_waiter_relocks_a_removed_lock_file(self, tmp_path):
+        path = tmp_path / ".lock"
+        holders = []
+        with file_lock(path):
+
+            def wait():
+                with file_lock(path):
+                    holders.append(os.path.exists(path))
+
+            thread = threading.Thread(target=wait)
+            thread.start()
+            time.sleep(0.1)
+            remove_lock(path)
+        thread.join(5)
+        # The waiter holds a lock on a file that exists, not on the removed one
+        assert holders == [True]
+
+
+class TestProjectStore:
+    def test_saves_check_the_version(self, tmp_path):
+        store = AssemblyProjectStore(tmp_path)
+        assert store.save(project(assembly("A")), MISSING) == 1
+        with pytest.raises(VersionConflict, match="already exists"):
+            store.save(project(), MISSING)
+        assert store.save(project(assembly("A", units=2)), 1) == 2
+        with pytest.raises(VersionConflict):
+            store.save(project(), 1)
+        assert store.load_versioned("P")[0] == 2
+
+    def test_merge_is_called_on_a_stale_save(self, tmp_path):
+        store = AssemblyProjectStore(tmp_path)
+        store.save(project(assembly("A")))
+        store.save(project(assembly("A", units=2)))
+        calls = []
+
+        def merge(version, theirs):
+            calls.append((version, names(theirs)))
+            return theirs
+
+        assert store.save(project(), 1, merge) == 3
+        assert calls == [(2, [("A", 2)])]
+
+    def test_loads_leave_no_lock_files_and_delete_removes_them(self, tmp_path):
+        store = AssemblyProjectStore(tmp_path)
+        store.save(project(assembly("A")))
+        os.remove(lock_path(tmp_path, "P"))
+        store.load_versioned("P")
+        assert not lock_path(tmp_path, "P").exists()
+        store.save(project(assembly("A")))
+        store.delete("P")
+        assert not lock_path(tmp_path, "P").exists()
+        assert store.names() == []
+
+
+class TestProjectManager:
+    def test_new_project_does_not_overwrite_an_existing_one(self, tmp_path):
+        ProjectManager(tmp_path).save_project(project(assembly("A")))
+        with pytest.raises(VersionConflict, match="already exists"):
+            ProjectManager(tmp_path).save_project(project(assembly("B")))
+        assert names(ProjectManager(tmp_path).load_project("P")) == [("A", 1)]
+
+    def test_concurrent_edits_of_different_assemblies_merge(self, tmp_path):
+        first, second = ProjectManager(tmp_path), ProjectManager(tmp_path)
+        first.save_project(project(assembly("A"), assembly("B")))
+        ours, theirs = first.load_project("P"), second.load_project("P")
+        ours.assemblies[0].units = 2
+        first.save_project(ours)
+        assert second.is_outdated("P")
+        theirs.assemblies[1].units = 3
+        second.save_project(theirs)
+        assert names(ProjectManager(tmp_path).load_project("P")) == [
+            ("A", 2),
+            ("B", 3),
+        ]
+
+    def test_concurrent_edits_of_one_assembly_conflict(self, tmp_path):
+        first, second = ProjectManager(tmp_path), ProjectManager(tmp_path)
+        first.save_project(project(assembly("A")))
+        ours, theirs = first.load_project("P"), second.load_project("P")
+        ours.assemblies[0].units = 2
+        first.save_project(ours)
+        theirs.assemblies[0].units = 3
+        with pytest.raises(MergeConflict):
+            second.save_project(theirs)
+
+    def test_sessions_sharing_a_writer_both_save(self, tmp_path):
+        writer = BackgroundWriter(delay=10, max_delay=10)
+        first = ProjectManager(tmp_path, writer=writer)
+        second = ProjectManager(tmp_path, writer=writer)
+        first.save_project(project(assembly("X"), assembly("Y")))
+        ours, theirs = first.load_project("P"), second.load_project("P")
+        ours.assemblies[0].units = 5
+        first.save_project(ours)
+        theirs.assemblies[1].units = 7
+        second.save_project(theirs)
+        writer.close()
+
+        assert writer.failures == {}
+        assert names(ProjectManager(tmp_path).load_project("P")) == [
+            ("X", 5),
+            ("Y", 7),
+        ]
+
+
+def catalog_with_rows(path, count=3):
+    catalog = WoodTypeCatalog(str(path))
+    catalog.apply_delta(
+        CatalogDelta.create(
+            inserts=[
+                {
+                    "Width (mm)": 20,
+                    "Height (mm)": 20,
+                    "Price/m": 1,
+                    "Description": str(i),
+                }
+                for i in range(count)
+            ]
+        )
+    )
+    return catalog
+
+
+def descriptions(catalog):
+    return [wood_type.description for wood_type in catalog.wood_types]
+
+
+class TestSqliteCatalogVersions:
+    def test_edits_of_different_rows_are_combined(self, tmp_path):
+        path = tmp_path / "catalog.db"
+        first = catalog_with_rows(path)
+        second = WoodTypeCatalog(str(path))
+        first.apply_delta(CatalogDelta.create(updates={0: {"Description": "first"}}))
+        second.apply_delta(CatalogDelta.create(updates={1: {"Description": "second"}}))
+        assert descriptions(second) == ["first", "second", "2"]
+        assert first.refresh()
+        assert descriptions(first) == ["first", "second", "2"]
+
+    def test_rows_added_in_both_sessions_get_their_own_ids(self, tmp_path):
+        path = tmp_path / "catalog.db"
+        first = catalog_with_rows(path, count=1)
+        second = WoodTypeCatalog(str(path))
+        first.apply_delta(CatalogDelta.create(inserts=[{"Description": "first"}]))
+        second.apply_delta(CatalogDelta.create(inserts=[{"Description": "second"}]))
+        stored = WoodTypeCatalog(str(path))
+        assert descriptions(stored) == ["0", "first", "second"]
+        assert len(set(stored.row_ids)) == 3
+
+    def test_edit_of_a_row_changed_elsewhere_is_dropped(self, tmp_path):
+        path = tmp_path / "catalog.db"
+        first = catalog_with_rows(path)
+        second = WoodTypeCatalog(str(path))
+        first.apply_delta(CatalogDelta.create(updates={0: {"Description": "first"}}))
+        with pytest.raises(ConflictError):
+            second.apply_delta(
+                CatalogDelta.create(
+                    updates={0: {"Description": "lost"}, 2: {"Description": "kept"}}
+                )
+            )
+        assert descriptions(second) == ["first", "1", "kept"]
+        assert descriptions(WoodTypeCatalog(str(path))) == ["first", "1", "kept"]
+
+    def test_update_of_a_row_deleted_elsewhere_is_dropped(self, tmp_path):
+        path = tmp_path / "catalog.db"
+        first = catalog_with_rows(path)
+        second = WoodTypeCatalog(str(path))
+        first.apply_delta(CatalogDelta.create(deletes=[1]))
+        with pytest.raises(ConflictError):
+            second.apply_delta(
+                CatalogDelta.create(updates={1: {"Description": "gone"}})
+            )
+        assert descriptions(WoodTypeCatalog(str(path))) == ["0", "2"]
+
+    def test_file_catalog_conflicts_on_any_concurrent_save(self, tmp_path):
+        path = tmp_path / "catalog.json"
+        first = catalog_with_rows(path)
+        second = WoodTypeCatalog(str(path))
+        first.apply_delta(CatalogDelta.create(updates={0: {"Description": "first"}}))
+        with pytest.raises(ConflictError):
+            second.apply_delta(
+                CatalogDelta.create(updates={1: {"Description": "second"}})
+            )
+        assert descriptions(second) == ["first", "1", "2"]
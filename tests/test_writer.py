@@ -0,0 +1,148 @@
+import threading
+import time
+
+import pytest
+
+from models.wood import Assembly, Project
+from project_manager import ProjectManager
+from storage.versioning import ConflictError
+from storage.writer import BackgroundWriter
+
+
+@pytest.fixture
+def writer():
+    writer = BackgroundWriter(delay=0.05, max_delay=0.3)
+    yield writer
+    writer.close()
+
+
+def test_a_burst_of_writes_is_written_once(writer):
+    written = []
+    for n in range(10):
+        writer.submit("a", lambda n=n: written.append(n))
+    assert writer.is_pending("a")
+    assert writer.flush(timeout=5)
+    assert written == [9]
+    assert not writer.is_pending("a")
+
+
+def test_writes_wait_for_a_quiet_key(writer):
+    written = threading.Event()
+    writer.submit("a", written.set)
+    assert not written.wait(0.02)
+    assert written.wait(1)
+
+
+def test_max_delay_caps_the_postponing(writer):
+    written = []
+    started = time.monotonic()
+    while time.monotonic() - started < 0.8:  # Always within the delay
+        writer.submit("a", lambda: written.append(time.monotonic() - started))
+        time.sleep(0.01)
+    writer.flush(timeout=5)
+    # Written every max_delay, not only once at the end
+    assert len(written) >= 2
+    assert written[0] < 0.3 + 0.3
+
+
+def test_flush_of_one_key_leaves_the_others_waiting():
+    writer = BackgroundWriter(delay=10, max_delay=10)
+    written = []
+    writer.submit("a", lambda: written.append("a"))
+    writer.submit("b", lambda: written.append("b"))
+    assert writer.flush("a", timeout=5)
+    assert written == ["a"]
+    assert writer.is_pending("b")
+    writer.close()
+    assert written == ["a", "b"]
+
+
+def test_cancel_drops_the_waiting_write():
+    writer = BackgroundWriter(delay=10, max_delay=10)
+    written = []
+    writer.submit("a", lambda: written.append("a"))
+    writer.cancel("a")
+    assert not writer.is_pending("a")
+    writer.close()
+    assert written == []
+
+
+def test_cancel_waits_for_a_running_write(writer):
+    running, release = threading.Event(), threading.Event()
+    written = []
+
+    def write():
+        running.set()
+        release.wait(5)
+        written.append("a")
+
+    writer.submit("a", write)
+    writer.flush("a", timeout=0)
+    assert running.wait(5)
+    threading.Timer(0.05, release.set).start()
+    writer.cancel("a")
+    assert written == ["a"]
+
+
+def test_failures_are_kept_until_the_key_is_written(writer):
+    def fail():
+        raise OSError("disk full")
+
+    writer.submit("a", fail)
+    writer.flush("a", timeout=5)
+    assert isinstance(writer.failures["a"], OSError)
+
+    # The worker carries on, and a later write clears the failure
+    writer.submit("a", lambda: None)
+    writer.flush("a", timeout=5)
+    assert "a" not in writer.failures
+
+
+def test_writes_after_close_run_synchronously(writer):
+    writer.close()
+    written = []
+    writer.submit("a", lambda: written.append("a"))
+    assert written == ["a"]
+
+
+def test_deleting_a_project_cancels_its_save(tmp_path):
+    writer = BackgroundWriter(delay=10, max_delay=10)
+    manager = ProjectManager(tmp_path, writer=writer)
+    manager.save_project(Project(name="Table"))  # New, so written right away
+    manager.save_project(Project(name="Table", description="Changed"))
+    manager.delete_project("Table")
+    writer.close()
+    assert "Table" not in manager.get_available_projects()
+    assert not manager.store.path("Table").exists()
+
+
+def test_save_errors_are_reported(tmp_path):
+    writer = BackgroundWriter(delay=10, max_delay=10)
+    manager = ProjectManager(tmp_path, writer=writer)
+    manager.save_project(Project(name="Table"))
+    manager.store.read_only = True  # Fails the next write
+    manager.save_project(Project(name="Table", description="Changed"), wait=True)
+    assert isinstance(manager.save_error("Table"), PermissionError)
+    writer.close()
+
+
+def test_save_errors_reach_the_session_that_saved(tmp_path):
+    writer = BackgroundWriter(delay=10, max_delay=10)
+    first = ProjectManager(tmp_path, writer=writer)
+    second = ProjectManager(tmp_path, writer=writer)
+    first.save_project(Project(name="Table", assemblies=[Assembly(name="Top")]))
+    ours, theirs = first.load_project("Table"), second.load_project("Table")
+
+    ours.assemblies[0].units = 2
+    first.save_project(ours, wait=True)
+    theirs.assemblies[0].units = 3
+    second.save_project(theirs, wait=True)
+    assert isinstance(second.save_error("Table"), ConflictError)
+    assert first.save_error("Table") is None
+
+    # Another successful save of the first session keeps the second's error
+    ours.description = "Oak"
+    first.save_project(ours, wait=True)
+    assert first.save_error("Table") is None
+    assert isinstance(second.save_error("Table"), ConflictError)
+    writer.close()
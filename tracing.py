@@ -0,0 +1,162 @@
+"""Timing spans for finding out where a rerun spends its time.
+
+Code marks interesting sections with ``span`` or the ``traced`` decorator.
+Spans are only recorded while a ``Trace`` is active in the current context,
+e.g. during one Streamlit rerun with the debug panel on; otherwise a span
+costs a context variable lookup. A trace can be summarized per span name or
+exported as Chrome trace JSON, which chrome://tracing and Perfetto open.
+"""
+
+import cProfile
+import functools
+import io
+import json
+import os
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, TypeVar
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+class SpanRecord(NamedTuple):
+    """One finished span"""
+
+    name: str
+    start_ns: int  # Since the start of the trace
+    duration_ns: int
+    thread_id: int
+    args: Dict[str, Any]
+
+
+class Trace:
+    """The spans recorded while it was active"""
+
+    def __init__(self):
+        self.started_ns = time.perf_counter_ns()
+        self.spans: List[SpanRecord] = []
+        self._lock = threading.Lock()
+
+    def add(self, span: SpanRecord) -> None:
+        with self._lock:
+            self.spans.append(span)
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """Calls, total and longest time per span name, slowest first"""
+        totals: Dict[str, List[float]] = {}
+        for span in self.spans:
+            totals.setdefault(span.name, []).append(span.duration_ns / 1e6)
+        rows = [
+            {
+                "Span": name,
+                "Calls": len(durations),
+                "Total (ms)": round(sum(durations), 2),
+                "Max (ms)": round(max(durations), 2),
+            }
+            for name, durations in totals.items()
+        ]
+        return sorted(rows, key=lambda row: -row["Total (ms)"])
+
+    def to_chrome_trace(self) -> Dict[str, Any]:
+        """The trace in the Chrome trace event format"""
+        return {
+            "traceEvents": [
+                {
+                    "name": span.name,
+                    "ph": "X",  # Complete event: start and duration
+                    "ts": span.start_ns / 1000,
+                    "dur": span.duration_ns / 1000,
+                    "pid": os.getpid(),
+                    "tid": span.thread_id,
+                    "args": {key: str(value) for key, value in span.args.items()},
+                }
+                for span in self.spans
+            ],
+            "displayTimeUnit": "ms",
+        }
+
+    def chrome_trace_json(self) -> str:
+        return json.dumps(self.to_chrome_trace())
+
+
+_active: ContextVar[Optional[Trace]] = ContextVar("trace", default=None)
+
+
+@contextmanager
+def span(name: str, **args: Any) -> Iterator[None]:
+    """Time a block of code into the active trace, if any"""
+    trace = _active.get()
+    if trace is None:
+        yield
+        return
+    start = time.perf_counter_ns()
+    try:
+        yield
+    finally:
+        trace.add(
+            SpanRecord(
+                name,
+                start - trace.started_ns,
+                time.perf_counter_ns() - start,
+                threading.get_ident(),
+                args,
+            )
+        )
+
+
+def traced(name: Optional[str] = None) -> Callable[[F], F]:
+    """Decorator that times every call of a function as a span"""
+
+    def decorator(func: F) -> F:
+        span_name = name or f"{func.__module__}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _active.get() is None:
+                return func(*args, **kwargs)
+            with span(span_name):
+                return func(*args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
+
+
+@contextmanager
+def record_trace(enabled: bool = True) -> Iterator[Optional[Trace]]:
+    """Record the spans of the enclosed code into a new ``Trace``"""
+    if not enabled:
+        yield None
+        return
+    trace = Trace()
+    token = _active.set(trace)
+    try:
+        yield trace
+    finally:
+        _active.reset(token)
+
+
+@contextmanager
+def profile(enabled: bool = True) -> Iterator[Optional[cProfile.Profile]]:
+    """Run the enclosed code under cProfile"""
+    if not enabled:
+        yield None
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+
+
+def format_profile(
+    profiler: cProfile.Profile, limit: int = 40, sort: str = "cumulative"
+) -> str:
+    """The top functions of a profile, as pstats prints them"""
+    output = io.StringIO()
+    pstats.Stats(profiler, stream=output).sort_stats(sort).print_stats(limit)
+    return output.getvalue()